@@ -4,7 +4,10 @@ const CONFIG = {
     ENDPOINTS: {
         SETUP_AGENT: '/api/whatsapp-gpt/setup-whatsapp-agent',
         CHECK_CONNECTION: '/api/whatsapp-gpt/check-connection',
-        GET_QR_CODE: '/api/whatsapp-gpt/get-qr-code'
+        CONNECTION_STREAM: '/api/whatsapp-gpt/connection-stream',
+        GET_QR_CODE: '/api/whatsapp-gpt/get-qr-code',
+        QR_STREAM: '/api/whatsapp-gpt/qr-stream',
+        INGESTION_JOB: '/api/whatsapp-gpt/ingestion-jobs'
     },
     
     EVOLUTION_API: {
@@ -15,6 +18,7 @@ const CONFIG = {
     SETTINGS: {
         CONNECTION_CHECK_INTERVAL: 5000,
         QR_CODE_REFRESH_INTERVAL: 30000,
+        KNOWLEDGE_JOB_CHECK_INTERVAL: 3000,
         DEFAULT_LANGUAGE: 'pt',
         SUPPORTED_LANGUAGES: ['pt', 'en', 'fr']
     },
@@ -12,6 +12,10 @@ class WhatsAppGPTApp {
         };
         this.agentData = null;
         this.connectionCheckInterval = null;
+        this.connectionStream = null;
+        this.qrStream = null;
+        this.knowledgeJobInterval = null;
+        this.knowledgeStatus = null;
         
         this.init();
     }
@@ -189,7 +193,10 @@ class WhatsAppGPTApp {
                 this.agentData = result.data;
                 this.showStep('qrcode');
                 this.displayQRCode();
+                // startConnectionCheck() resets every stream, so the QR stream goes second
                 this.startConnectionCheck();
+                this.startQRStream();
+                this.startKnowledgeJobCheck();
             } else {
                 this.showError(result.error || this.translations[this.currentLanguage].errors.setup_failed);
             }
@@ -203,6 +210,34 @@ class WhatsAppGPTApp {
 
     // Start checking connection status
     startConnectionCheck() {
+        this.stopConnectionCheck();
+
+        // Prefer server-pushed updates; fall back to polling if streaming is unavailable
+        if (window.EventSource && this.agentData?.instance_id) {
+            this.connectionStream = new EventSource(`${CONFIG.API_BASE_URL}${CONFIG.ENDPOINTS.CONNECTION_STREAM}/${this.agentData.instance_id}`);
+
+            this.connectionStream.addEventListener('connection', (event) => {
+                const state = JSON.parse(event.data);
+                if (state.status === 'open') {
+                    this.onConnected();
+                }
+            });
+
+            this.connectionStream.onerror = () => {
+                // The server closes streams periodically; only give up if the browser does
+                if (this.connectionStream && this.connectionStream.readyState === EventSource.CLOSED) {
+                    this.connectionStream = null;
+                    this.startConnectionPolling();
+                }
+            };
+            return;
+        }
+
+        this.startConnectionPolling();
+    }
+
+    // Poll connection status
+    startConnectionPolling() {
         if (this.connectionCheckInterval) {
             clearInterval(this.connectionCheckInterval);
         }
@@ -213,6 +248,28 @@ class WhatsAppGPTApp {
         }, CONFIG.SETTINGS.CONNECTION_CHECK_INTERVAL);
     }
 
+    // Stop streaming and polling
+    stopConnectionCheck() {
+        this.stopQRStream();
+
+        if (this.connectionStream) {
+            this.connectionStream.close();
+            this.connectionStream = null;
+        }
+
+        if (this.connectionCheckInterval) {
+            clearInterval(this.connectionCheckInterval);
+            this.connectionCheckInterval = null;
+        }
+    }
+
+    // Move to the success step once WhatsApp is connected
+    onConnected() {
+        this.stopConnectionCheck();
+        this.showStep('success');
+        this.updateSuccessInfo();
+    }
+
     // Display QR Code
     displayQRCode() {
         const qrContainer = document.getElementById('qr-container');
@@ -230,6 +287,32 @@ class WhatsAppGPTApp {
         qrContainer.appendChild(qrImage);
     }
 
+    // Follow QR code rotations pushed by the server
+    startQRStream() {
+        this.stopQRStream();
+        if (!window.EventSource || !this.agentData?.instance_id) return;
+
+        this.qrStream = new EventSource(`${CONFIG.API_BASE_URL}${CONFIG.ENDPOINTS.QR_STREAM}/${this.agentData.instance_id}`);
+
+        this.qrStream.addEventListener('qrcode', (event) => {
+            const entry = JSON.parse(event.data);
+            if (entry.code && entry.code !== this.agentData?.qr_code) {
+                this.agentData.qr_code = entry.code;
+                this.displayQRCode();
+            }
+        });
+
+        this.qrStream.addEventListener('connected', () => this.stopQRStream());
+    }
+
+    // Stop following QR code rotations
+    stopQRStream() {
+        if (this.qrStream) {
+            this.qrStream.close();
+            this.qrStream = null;
+        }
+    }
+
     // Check WhatsApp connection status
     async checkConnection() {
         if (!this.agentData?.instance_id) return;
@@ -239,18 +322,70 @@ class WhatsAppGPTApp {
             const result = await response.json();
 
             if (result.success && result.status === 'open') {
-                if (this.connectionCheckInterval) {
-                    clearInterval(this.connectionCheckInterval);
-                    this.connectionCheckInterval = null;
-                }
-                this.showStep('success');
-                this.updateSuccessInfo();
+                this.onConnected();
             }
         } catch (err) {
             console.error('Connection check error:', err);
         }
     }
 
+    // Follow the knowledge ingestion job queued by setup
+    startKnowledgeJobCheck() {
+        this.stopKnowledgeJobCheck();
+
+        const jobId = this.agentData?.knowledge_job_id;
+        if (!jobId) {
+            this.updateKnowledgeStatus('none');
+            return;
+        }
+
+        this.updateKnowledgeStatus(this.agentData.knowledge_status || 'queued');
+        if (this.agentData.knowledge_processed) return;
+
+        this.knowledgeJobInterval = setInterval(() => {
+            this.checkKnowledgeJob();
+        }, CONFIG.SETTINGS.KNOWLEDGE_JOB_CHECK_INTERVAL);
+    }
+
+    // Stop following the knowledge ingestion job
+    stopKnowledgeJobCheck() {
+        if (this.knowledgeJobInterval) {
+            clearInterval(this.knowledgeJobInterval);
+            this.knowledgeJobInterval = null;
+        }
+    }
+
+    // Check knowledge ingestion job status
+    async checkKnowledgeJob() {
+        const jobId = this.agentData?.knowledge_job_id;
+        if (!jobId) return;
+
+        try {
+            const response = await fetch(`${CONFIG.API_BASE_URL}${CONFIG.ENDPOINTS.INGESTION_JOB}/${jobId}`);
+            const result = await response.json();
+
+            if (result.success) {
+                this.updateKnowledgeStatus(result.job.status);
+                if (['completed', 'failed', 'cancelled'].includes(result.job.status)) {
+                    this.stopKnowledgeJobCheck();
+                }
+            }
+        } catch (err) {
+            console.error('Knowledge job check error:', err);
+        }
+    }
+
+    // Show the knowledge ingestion status on the success step
+    updateKnowledgeStatus(status) {
+        this.knowledgeStatus = status;
+
+        const statusElement = document.getElementById('agent-knowledge-status');
+        if (statusElement) {
+            const labels = this.translations[this.currentLanguage].success.agent_info.knowledge_statuses;
+            statusElement.textContent = labels[status] || status;
+        }
+    }
+
     // Update success step with agent info
     updateSuccessInfo() {
         const businessNameElement = document.getElementById('agent-business-name');
@@ -271,10 +406,9 @@ class WhatsAppGPTApp {
         };
         this.agentData = null;
         
-        if (this.connectionCheckInterval) {
-            clearInterval(this.connectionCheckInterval);
-            this.connectionCheckInterval = null;
-        }
+        this.stopConnectionCheck();
+        this.stopKnowledgeJobCheck();
+        this.knowledgeStatus = null;
 
         // Reset form
         const form = document.getElementById('setup-form');
@@ -384,6 +518,12 @@ class WhatsAppGPTApp {
             this.updateElementText(infoItems[1], translations.success.agent_info.status);
             this.updateElementText(infoItems[2], translations.success.agent_info.ai);
         }
+        if (infoItems.length >= 4) {
+            this.updateElementText(infoItems[3], translations.success.agent_info.knowledge);
+        }
+        if (this.knowledgeStatus) {
+            this.updateKnowledgeStatus(this.knowledgeStatus);
+        }
 
         this.updateElementText('.next-steps-title', translations.success.next_steps.title);
         
@@ -494,7 +634,16 @@ class WhatsAppGPTApp {
                     title: "Informações do Seu Agente",
                     business_name: "Nome da Empresa:",
                     status: "Status:",
-                    ai: "IA:"
+                    ai: "IA:",
+                    knowledge: "Base de Conhecimento:",
+                    knowledge_statuses: {
+                        none: "—",
+                        queued: "⏳ Na fila",
+                        running: "⏳ Processando",
+                        completed: "✅ Pronta",
+                        failed: "❌ Falhou",
+                        cancelled: "Cancelada"
+                    }
                 },
                 next_steps: {
                     title: "O que acontece agora?",
@@ -596,7 +745,16 @@ class WhatsAppGPTApp {
                     title: "Your Agent Information",
                     business_name: "Company Name:",
                     status: "Status:",
-                    ai: "AI:"
+                    ai: "AI:",
+                    knowledge: "Knowledge Base:",
+                    knowledge_statuses: {
+                        none: "—",
+                        queued: "⏳ Queued",
+                        running: "⏳ Processing",
+                        completed: "✅ Ready",
+                        failed: "❌ Failed",
+                        cancelled: "Cancelled"
+                    }
                 },
                 next_steps: {
                     title: "What happens now?",
@@ -698,7 +856,16 @@ class WhatsAppGPTApp {
                     title: "Informations de Votre Agent",
                     business_name: "Nom de l'Entreprise:",
                     status: "Statut:",
-                    ai: "IA:"
+                    ai: "IA:",
+                    knowledge: "Base de Connaissances:",
+                    knowledge_statuses: {
+                        none: "—",
+                        queued: "⏳ En attente",
+                        running: "⏳ En traitement",
+                        completed: "✅ Prête",
+                        failed: "❌ Échec",
+                        cancelled: "Annulée"
+                    }
                 },
                 next_steps: {
                     title: "Que se passe-t-il maintenant?",
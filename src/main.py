@@ -6,8 +6,11 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 from flask import Flask, send_from_directory
 from flask_cors import CORS
 from src.models.user import db
+from src.models.ingestion_job import IngestionJob
+from src.models.tenant import Tenant
+from src.models.pooled_agent import PooledAgent
 from src.routes.user import user_bp
-from src.routes.whatsapp_gpt import whatsapp_gpt_bp
+from src.routes.whatsapp_gpt import whatsapp_gpt_bp, ingestion_queue, tenant_registry, provisioning_pool, message_pipeline, services
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(os.path.dirname(__file__)), 'whatsapp-gpt-vanilla-frontend'))
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
@@ -26,6 +29,22 @@ db.init_app(app)
 with app.app_context():
     db.create_all()
 
+# Start background knowledge ingestion workers
+ingestion_queue.init_app(app)
+
+# Start batched tenant registry writes
+tenant_registry.init_app(app)
+
+# Keep the warm pool of instances and workflows topped up (PROVISIONING_POOL_SIZE)
+provisioning_pool.init_app(app)
+
+# Tenant lookups for messages answered in-process
+message_pipeline.init_app(app)
+
+# Build service clients in the background so startup doesn't block on them
+if os.getenv('SERVICE_WARM_UP', 'true').lower() == 'true':
+    services.warm_up(background=True)
+
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
@@ -0,0 +1,37 @@
+import json
+from datetime import datetime
+from src.models.user import db
+
+class IngestionJob(db.Model):
+    id = db.Column(db.String(36), primary_key=True)
+    client_id = db.Column(db.String(80), nullable=False, index=True)
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True)
+    content = db.Column(db.Text, nullable=False)
+    options = db.Column(db.Text, nullable=False, default='{}')
+    chunks_embedded = db.Column(db.Integer, nullable=False, default=0)
+    chunks_upserted = db.Column(db.Integer, nullable=False, default=0)
+    result = db.Column(db.Text)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    started_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    finished_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<IngestionJob {self.id} {self.status}>'
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'client_id': self.client_id,
+            'status': self.status,
+            'progress': {
+                'chunks_embedded': self.chunks_embedded,
+                'chunks_upserted': self.chunks_upserted
+            },
+            'result': json.loads(self.result) if self.result else None,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
@@ -0,0 +1,28 @@
+from datetime import datetime
+from src.models.user import db
+
+class PooledAgent(db.Model):
+    id = db.Column(db.String(36), primary_key=True)
+    instance_id = db.Column(db.String(120), unique=True, nullable=False)
+    # None when instances are served by shared workflows
+    workflow_id = db.Column(db.String(80), unique=True)
+    webhook_url = db.Column(db.String(500))
+    status = db.Column(db.String(20), nullable=False, default='available', index=True)
+    client_id = db.Column(db.String(36), index=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    claimed_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<PooledAgent {self.instance_id} {self.status}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'instance_id': self.instance_id,
+            'workflow_id': self.workflow_id,
+            'webhook_url': self.webhook_url,
+            'status': self.status,
+            'client_id': self.client_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'claimed_at': self.claimed_at.isoformat() if self.claimed_at else None
+        }
@@ -0,0 +1,31 @@
+from datetime import datetime
+from src.models.user import db
+
+class Tenant(db.Model):
+    client_id = db.Column(db.String(36), primary_key=True)
+    instance_id = db.Column(db.String(120), unique=True, index=True)
+    workflow_id = db.Column(db.String(80), unique=True, index=True)
+    namespace = db.Column(db.String(80))
+    business_name = db.Column(db.String(200))
+    webhook_url = db.Column(db.String(500))
+    status = db.Column(db.String(20), nullable=False, default='provisioning', index=True)
+    connection_status = db.Column(db.String(20))
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    def __repr__(self):
+        return f'<Tenant {self.client_id} {self.instance_id}>'
+
+    def to_dict(self):
+        return {
+            'client_id': self.client_id,
+            'instance_id': self.instance_id,
+            'workflow_id': self.workflow_id,
+            'namespace': self.namespace,
+            'business_name': self.business_name,
+            'webhook_url': self.webhook_url,
+            'status': self.status,
+            'connection_status': self.connection_status,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
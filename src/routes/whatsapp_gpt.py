@@ -1,24 +1,122 @@
-from flask import Blueprint, request, jsonify
-from src.services.evolution_api import EvolutionAPIManager
-from src.services.n8n_manager import N8nFlowManager
-from src.services.vector_store import VectorStoreManager
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from src.services.service_registry import ServiceRegistry
+from src.services.ingestion_queue import IngestionJobQueue
+from src.services.http_client import get_transport_stats
+from src.services.circuit_breaker import get_breaker_stats
+from src.services.message_dispatcher import OutboundDispatcher, OutboundQueueFull
+from src.services.connection_state import ConnectionStateStore
+from src.services.qr_cache import QRCodeCache
+from src.services.tenant_registry import TenantRegistry
+from src.services.setup_orchestrator import SetupOrchestrator, SetupStep
+from src.services.provisioning_pool import ProvisioningPool
+from src.services.message_pipeline import MessagePipeline
+from src.services.conversation_memory import ConversationMemory
 import uuid
 import os
+import hmac
+import threading
 from datetime import datetime
 
 # Create blueprint
 whatsapp_gpt_bp = Blueprint('whatsapp_gpt', __name__)
 
-# Initialize services
-evolution_manager = EvolutionAPIManager()
-n8n_manager = N8nFlowManager()
-vector_manager = VectorStoreManager()
+def _create_evolution_manager():
+    from src.services.evolution_api import EvolutionAPIManager
+    return EvolutionAPIManager()
+
+def _create_evolution_async():
+    from src.services.evolution_api_async import EvolutionAsyncFacade
+    return EvolutionAsyncFacade()
+
+def _create_n8n_manager():
+    from src.services.n8n_manager import N8nFlowManager
+    return N8nFlowManager()
+
+def _create_vector_manager():
+    # Deferred: pulls in langchain and connects to the vector backend
+    from src.services.vector_store import VectorStoreManager
+    return VectorStoreManager()
+
+def _create_llm_client():
+    from src.services.llm_client import create_llm_client
+    return create_llm_client()
+
+# Register services; they are constructed on first use or by warm-up
+services = ServiceRegistry()
+services.register('evolution', _create_evolution_manager)
+services.register('evolution_async', _create_evolution_async)
+services.register('n8n', _create_n8n_manager)
+services.register('vector_store', _create_vector_manager)
+services.register('llm', _create_llm_client)
+
+evolution_manager = services.lazy('evolution')
+evolution_fleet = services.lazy('evolution_async')
+n8n_manager = services.lazy('n8n')
+vector_manager = services.lazy('vector_store')
+llm_client = services.lazy('llm')
+ingestion_queue = IngestionJobQueue(vector_manager)
+outbound_dispatcher = OutboundDispatcher(evolution_manager)
+connection_states = ConnectionStateStore()
+qr_codes = QRCodeCache()
+tenant_registry = TenantRegistry()
+setup_orchestrator = SetupOrchestrator()
+provisioning_pool = ProvisioningPool(evolution_manager, n8n_manager)
+conversation_memory = ConversationMemory()
+message_pipeline = MessagePipeline(
+    vector_manager, llm_client, outbound_dispatcher, tenant_registry.get_by_instance,
+    memory=conversation_memory
+)
+
+# Each open event stream holds a server worker thread for up to SSE_MAX_STREAM_SECONDS, so
+# keep this below the worker pool size (e.g. gunicorn --threads) to leave room for other requests
+sse_slots = threading.BoundedSemaphore(int(os.getenv('SSE_MAX_STREAMS', '16')))
+
+def _sse_response(open_stream):
+    """Stream SSE messages from open_stream(), or 503 when every stream slot is taken"""
+    if not sse_slots.acquire(blocking=False):
+        # Clients fall back to polling
+        response = jsonify({
+            'success': False,
+            'error': 'Too many open event streams'
+        })
+        response.status_code = 503
+        response.headers['Retry-After'] = '30'
+        return response
+
+    try:
+        stream = open_stream()
+    except Exception:
+        sse_slots.release()
+        raise
+
+    def release_when_closed():
+        try:
+            yield from stream
+        finally:
+            sse_slots.release()
+
+    return Response(
+        stream_with_context(release_when_closed()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+def _is_connected(instance_id: str) -> bool:
+    state, _ = connection_states.states.get(instance_id)
+    return state is not None and state['status'] == 'open'
 
 @whatsapp_gpt_bp.route('/setup-whatsapp-agent', methods=['POST'])
 def setup_whatsapp_agent():
     """
     Complete setup process for a new WhatsApp GPT agent
     """
+    # A claimed pool agent goes back to the pool unless it ends up bound to this client
+    pooled = None
+    setup = None
+    bound = False
     try:
         data = request.get_json()
         
@@ -31,51 +129,56 @@ def setup_whatsapp_agent():
         
         # Generate unique client ID
         client_id = str(uuid.uuid4())
+        app = current_app._get_current_object()
         
-        # Step 1: Create Evolution API instance
-        instance_result = evolution_manager.create_instance(
-            client_id=client_id,
-            business_name=business_name
-        )
-        
-        if not instance_result['success']:
-            return jsonify({
-                'success': False,
-                'error': f"Failed to create WhatsApp instance: {instance_result['error']}"
-            }), 500
-        
-        instance_data = instance_result['instance']
-        instance_id = instance_data['instance_id']
+        # Take a ready instance + workflow pair from the pool when one is available;
+        # otherwise name the instance up front so it and the workflow can be created concurrently
+        pooled = provisioning_pool.claim(client_id)
+        if pooled:
+            instance_id = pooled['instance_id']
+        else:
+            instance_id = evolution_manager.generate_instance_name(client_id)
         
-        # Step 2: Create n8n workflow
-        workflow_result = n8n_manager.create_client_workflow(
-            client_id=client_id,
-            instance_id=instance_id,
-            business_name=business_name
-        )
-        
-        if not workflow_result['success']:
-            return jsonify({
-                'success': False,
-                'error': f"Failed to create workflow: {workflow_result['error']}"
-            }), 500
+        def create_instance(inputs):
+            result = evolution_manager.create_instance(
+                client_id=client_id,
+                business_name=business_name,
+                instance_name=instance_id
+            )
+            
+            # Seed the QR cache so the first viewer does not hit Evolution again
+            if result.get('success') and result.get('qrcode', {}).get('code'):
+                qr_codes.put(instance_id, result['qrcode'], source='create')
+            
+            return result
         
-        workflow_data = workflow_result['workflow']
-        webhook_url = workflow_data['webhook_url']
+        def create_workflow(inputs):
+            # In shared mode onboarding only needs the instance pointed at a shared shard
+            if n8n_manager.shared:
+                return n8n_manager.get_shared_workflow(instance_id)
+            
+            return n8n_manager.create_client_workflow(
+                client_id=client_id,
+                instance_id=instance_id,
+                business_name=business_name
+            )
         
-        # Step 3: Configure webhook in Evolution API
-        if webhook_url:
-            webhook_result = evolution_manager.configure_webhook(
+        def configure_webhook(inputs):
+            webhook_url = inputs['workflow']['workflow']['webhook_url']
+            if not webhook_url:
+                return {'success': False, 'error': 'Workflow has no webhook URL'}
+            
+            result = evolution_manager.configure_webhook(
                 instance_name=instance_id,
                 webhook_url=webhook_url
             )
             
-            if not webhook_result['success']:
-                print(f"Warning: Failed to configure webhook: {webhook_result['error']}")
+            if not result['success']:
+                print(f"Warning: Failed to configure webhook: {result['error']}")
+            
+            return result
         
-        # Step 4: Process knowledge base
-        knowledge_result = None
-        if knowledge_text:
+        def queue_knowledge(inputs):
             # Combine business information with knowledge text
             full_knowledge = f"""
 Informações da Empresa:
@@ -88,17 +191,147 @@ Conhecimento Adicional:
 {knowledge_text}
 """
             
-            knowledge_result = vector_manager.process_text_content(
-                client_id=client_id,
-                content=full_knowledge,
-                metadata={
-                    'business_name': business_name,
-                    'source_type': 'setup_form'
-                }
+            with app.app_context():
+                job = ingestion_queue.submit(
+                    client_id=client_id,
+                    content=full_knowledge,
+                    metadata={
+                        'business_name': business_name,
+                        'source_type': 'setup_form'
+                    }
+                )
+            
+            return {'success': True, 'job': job}
+        
+        def cancel_knowledge(result):
+            with app.app_context():
+                if ingestion_queue.cancel(result['job']['job_id']):
+                    return {'success': True}
+            # Already claimed by a worker: remove whatever it wrote
+            return vector_manager.delete_client_data(client_id)
+        
+        def activate_workflow(inputs):
+            return n8n_manager.activate_workflow(inputs['workflow']['workflow']['workflow_id'])
+        
+        def fetch_qr_code(inputs):
+            # Pooled instances were created a while ago, so their first QR code has expired
+            return qr_codes.get(instance_id, evolution_manager.get_qr_code)
+        
+        def bind_workflow(inputs):
+            return n8n_manager.rename_workflow(
+                pooled['workflow_id'],
+                f"WhatsApp GPT - {business_name or client_id}"
             )
         
-        # Step 5: Activate workflow
-        activation_result = n8n_manager.activate_workflow(workflow_data['workflow_id'])
+        if pooled:
+            steps = [
+                SetupStep(
+                    name='qrcode',
+                    run=fetch_qr_code,
+                    required=False
+                )
+            ]
+            if not n8n_manager.shared:
+                steps.extend([
+                    SetupStep(
+                        name='workflow_name',
+                        run=bind_workflow,
+                        rollback=lambda result: provisioning_pool.restore_workflow(pooled),
+                        required=False
+                    ),
+                    SetupStep(
+                        name='activation',
+                        run=lambda inputs: n8n_manager.activate_workflow(pooled['workflow_id']),
+                        rollback=lambda result: n8n_manager.deactivate_workflow(pooled['workflow_id']),
+                        required=False
+                    )
+                ])
+        else:
+            steps = [
+                SetupStep(
+                    name='instance',
+                    run=create_instance,
+                    rollback=lambda result: evolution_manager.delete_instance(instance_id)
+                ),
+                SetupStep(
+                    name='workflow',
+                    run=create_workflow,
+                    # Shared workflows outlive any one client
+                    rollback=None if n8n_manager.shared else (
+                        lambda result: n8n_manager.delete_workflow(result['workflow']['workflow_id'])
+                    )
+                ),
+                SetupStep(
+                    name='webhook',
+                    run=configure_webhook,
+                    depends_on=['instance', 'workflow'],
+                    required=False
+                )
+            ]
+            if not n8n_manager.shared:
+                steps.append(SetupStep(
+                    name='activation',
+                    run=activate_workflow,
+                    depends_on=['workflow'],
+                    required=False
+                ))
+        
+        # Ingest only once the client exists, so a failed setup never leaves vectors behind
+        if knowledge_text:
+            steps.append(SetupStep(
+                name='knowledge',
+                run=queue_knowledge,
+                depends_on=[] if pooled else ['instance', 'workflow'],
+                rollback=cancel_knowledge
+            ))
+        
+        setup = setup_orchestrator.run(steps)
+        results = setup['results']
+        
+        if not setup['success']:
+            tenant_registry.record(client_id, business_name=business_name, status='failed')
+            
+            step_errors = {
+                'instance': 'Failed to create WhatsApp instance',
+                'workflow': 'Failed to create workflow',
+                'knowledge': 'Failed to queue knowledge ingestion'
+            }
+            return jsonify({
+                'success': False,
+                'error': f"{step_errors.get(setup['failed_step'], 'Setup failed')}: {setup['error']}",
+                'steps': setup['timings'],
+                'total_ms': setup['total_ms']
+            }), 500
+        
+        if pooled:
+            qr_code = (results['qrcode'].get('qrcode') or {}).get('code') if 'qrcode' in results else None
+            workflow_data = pooled
+            if n8n_manager.shared:
+                shard = n8n_manager.get_shared_workflow(instance_id)
+                if shard['success']:
+                    workflow_data = shard['workflow']
+        else:
+            qr_code = results['instance']['instance'].get('qr_code')
+            workflow_data = results['workflow']['workflow']
+        knowledge_job = results['knowledge']['job'] if 'knowledge' in results else None
+        if knowledge_job:
+            # The job may already have finished while the other setup steps ran
+            knowledge_job = ingestion_queue.get_job(knowledge_job['job_id']) or knowledge_job
+        # Shared workflows are activated once, when the shard is created
+        workflow_active = n8n_manager.shared or results.get('activation', {}).get('success', False)
+        
+        tenant_registry.record(
+            client_id,
+            instance_id=instance_id,
+            # A shared shard serves many tenants, so it is not a per-client workflow ID
+            workflow_id=None if n8n_manager.shared else workflow_data['workflow_id'],
+            # Same namespace VectorStoreManager.create_namespace derives
+            namespace=f"client_{client_id}",
+            business_name=business_name,
+            webhook_url=workflow_data['webhook_url'],
+            status='active' if workflow_active else 'inactive'
+        )
+        bound = True
         
         return jsonify({
             'success': True,
@@ -106,11 +339,16 @@ Conhecimento Adicional:
                 'client_id': client_id,
                 'instance_id': instance_id,
                 'workflow_id': workflow_data['workflow_id'],
-                'qr_code': instance_data.get('qr_code'),
-                'webhook_url': webhook_url,
-                'knowledge_processed': knowledge_result['success'] if knowledge_result else False,
-                'workflow_active': activation_result['success'] if activation_result else False
+                'qr_code': qr_code,
+                'webhook_url': workflow_data['webhook_url'],
+                'knowledge_processed': bool(knowledge_job) and knowledge_job['status'] == 'completed',
+                'knowledge_job_id': knowledge_job['job_id'] if knowledge_job else None,
+                'knowledge_status': knowledge_job['status'] if knowledge_job else None,
+                'workflow_active': workflow_active
             },
+            'pooled': bool(pooled),
+            'steps': setup['timings'],
+            'total_ms': setup['total_ms'],
             'message': 'WhatsApp GPT agent setup completed successfully'
         })
         
@@ -119,6 +357,15 @@ Conhecimento Adicional:
             'success': False,
             'error': f"Setup failed: {str(e)}"
         }), 500
+    
+    finally:
+        if pooled and not bound:
+            try:
+                # A failed setup already rolled the binding back; one that succeeded before the route raised did not
+                if setup is not None and setup['success']:
+                    provisioning_pool.restore_workflow(pooled)
+            finally:
+                provisioning_pool.release(pooled['id'])
 
 @whatsapp_gpt_bp.route('/check-connection/<instance_id>', methods=['GET'])
 def check_connection(instance_id):
@@ -126,7 +373,8 @@ def check_connection(instance_id):
     Check WhatsApp connection status
     """
     try:
-        result = evolution_manager.check_connection_status(instance_id)
+        # Served from webhook-fed state; Evolution is only asked when nothing fresh is known
+        result = connection_states.get_status(instance_id, evolution_manager.check_connection_status)
         return jsonify(result)
     except Exception as e:
         return jsonify({
@@ -134,13 +382,311 @@ def check_connection(instance_id):
             'error': str(e)
         }), 500
 
+@whatsapp_gpt_bp.route('/connection-stream/<instance_id>', methods=['GET'])
+def connection_stream(instance_id):
+    """
+    Server-Sent Events stream of connection state changes for an instance
+
+    Each stream holds a worker thread for up to SSE_MAX_STREAM_SECONDS; beyond SSE_MAX_STREAMS
+    open streams per process the request gets a 503 and the frontend falls back to polling.
+    """
+    return _sse_response(lambda: connection_states.stream(
+        instance_id,
+        evolution_manager.check_connection_status,
+        max_seconds=float(os.getenv('SSE_MAX_STREAM_SECONDS', '300'))
+    ))
+
+@whatsapp_gpt_bp.route('/webhook/evolution', methods=['POST'])
+@whatsapp_gpt_bp.route('/webhook/evolution/<event_name>', methods=['POST'])
+# Token in the path: Evolution appends /<event-name> to the URL, which would corrupt a query string
+@whatsapp_gpt_bp.route('/webhook/evolution/t/<token>', methods=['POST'])
+@whatsapp_gpt_bp.route('/webhook/evolution/t/<token>/<event_name>', methods=['POST'])
+def evolution_webhook(event_name=None, token=None):
+    """
+    Receive Evolution API webhook events
+    """
+    try:
+        webhook_token = os.getenv('EVOLUTION_WEBHOOK_TOKEN')
+        token = token or request.args.get('token') or ''
+        token_valid = bool(webhook_token) and hmac.compare_digest(token, webhook_token)
+        if webhook_token and not token_valid:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid webhook token'
+            }), 403
+        
+        payload = request.get_json(silent=True) or {}
+        handled = connection_states.ingest_event(payload, event_name) or qr_codes.ingest_event(payload, event_name)
+        
+        # Instances whose webhook points here directly get their messages answered in-process.
+        # Answering costs an LLM call and sends from the tenant's number, so it needs the token.
+        run = message_pipeline.submit(payload, event_name) if token_valid and not handled else None
+        
+        instance_name = payload.get('instance')
+        if instance_name:
+            state, _ = connection_states.states.get(instance_name)
+            if state is not None:
+                tenant_registry.update_instance(instance_name, connection_status=state['status'])
+            
+            # A connected instance has no QR code to show anymore
+            if _is_connected(instance_name):
+                qr_codes.invalidate(instance_name)
+        
+        return jsonify({
+            'success': True,
+            'handled': handled or run is not None,
+            'run_id': run['run_id'] if run else None
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@whatsapp_gpt_bp.route('/instances/<instance_id>/message-handler', methods=['POST'])
+def set_message_handler(instance_id):
+    """
+    Route an instance's messages to the in-process pipeline ('native') or its n8n workflow ('n8n')
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        handler = data.get('handler')
+        
+        if handler not in ('native', 'n8n'):
+            return jsonify({
+                'success': False,
+                'error': "handler must be 'native' or 'n8n'"
+            }), 400
+        
+        tenant = tenant_registry.get_by_instance(instance_id)
+        if tenant is None:
+            return jsonify({
+                'success': False,
+                'error': 'Tenant not found'
+            }), 404
+        
+        if handler == 'native':
+            webhook_token = os.getenv('EVOLUTION_WEBHOOK_TOKEN')
+            if not webhook_token:
+                return jsonify({
+                    'success': False,
+                    'error': 'EVOLUTION_WEBHOOK_TOKEN must be set to answer messages in-process'
+                }), 400
+            
+            api_url = os.getenv('WHATSAPP_GPT_API_URL', request.host_url).rstrip('/')
+            webhook_url = f"{api_url}/api/whatsapp-gpt/webhook/evolution/t/{webhook_token}"
+        else:
+            webhook_url = tenant['webhook_url']
+        
+        if not webhook_url:
+            return jsonify({
+                'success': False,
+                'error': 'Tenant has no workflow webhook URL'
+            }), 400
+        
+        result = evolution_manager.configure_webhook(
+            instance_name=instance_id,
+            webhook_url=webhook_url
+        )
+        
+        if not result['success']:
+            return jsonify(result), 502
+        
+        return jsonify({
+            'success': True,
+            'instance_id': instance_id,
+            'handler': handler
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@whatsapp_gpt_bp.route('/message-pipeline', methods=['GET'])
+def message_pipeline_stats():
+    """
+    Get in-process message pipeline counters and per-stage latency
+    """
+    try:
+        return jsonify({
+            'success': True,
+            'pipeline': message_pipeline.get_stats(),
+            'memory': conversation_memory.get_stats(),
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@whatsapp_gpt_bp.route('/message-pipeline/runs/<run_id>', methods=['GET'])
+def message_pipeline_run(run_id):
+    """
+    Get the status and stage timings of one pipeline run
+    """
+    try:
+        run = message_pipeline.get_run(run_id)
+        
+        if run is None:
+            return jsonify({
+                'success': False,
+                'error': 'Run not found'
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'run': run
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@whatsapp_gpt_bp.route('/tenants', methods=['GET'])
+def list_tenants():
+    """
+    List registered tenants
+    """
+    try:
+        tenants = tenant_registry.list_tenants(
+            status=request.args.get('status'),
+            limit=request.args.get('limit', 1000, type=int),
+            offset=request.args.get('offset', 0, type=int)
+        )
+        
+        return jsonify({
+            'success': True,
+            'tenants': tenants,
+            'count': len(tenants)
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@whatsapp_gpt_bp.route('/tenants/<client_id>', methods=['GET'])
+@whatsapp_gpt_bp.route('/tenants/by-instance/<instance_id>', methods=['GET'])
+@whatsapp_gpt_bp.route('/tenants/by-workflow/<workflow_id>', methods=['GET'])
+def get_tenant(client_id=None, instance_id=None, workflow_id=None):
+    """
+    Resolve a tenant by client, instance or workflow ID
+    """
+    try:
+        if client_id:
+            tenant = tenant_registry.get_by_client(client_id)
+        elif instance_id:
+            tenant = tenant_registry.get_by_instance(instance_id)
+        else:
+            tenant = tenant_registry.get_by_workflow(workflow_id)
+        
+        if tenant is None:
+            return jsonify({
+                'success': False,
+                'error': 'Tenant not found'
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'tenant': tenant
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@whatsapp_gpt_bp.route('/tenant-config/<instance_id>', methods=['GET'])
+def tenant_config(instance_id):
+    """
+    Resolve tenant configuration for an instance (used by the shared n8n workflow)
+    """
+    try:
+        tenant = tenant_registry.get_by_instance(instance_id)
+        
+        if tenant is None or tenant['status'] == 'failed':
+            return jsonify({
+                'success': False,
+                'error': 'Tenant not found'
+            }), 404
+        
+        response = jsonify({
+            'success': True,
+            'tenant': {
+                'client_id': tenant['client_id'],
+                'instance_id': tenant['instance_id'],
+                'namespace': tenant['namespace'],
+                'business_name': tenant['business_name'],
+                'status': tenant['status']
+            }
+        })
+        response.headers['Cache-Control'] = f"max-age={os.getenv('TENANT_CONFIG_MAX_AGE_SECONDS', '60')}"
+        return response
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@whatsapp_gpt_bp.route('/fleet/connection-status', methods=['POST'])
+def fleet_connection_status():
+    """
+    Check WhatsApp connection status for many instances concurrently
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        instance_ids = data.get('instance_ids')
+        
+        # Default to every active tenant, resolved from the local registry
+        if instance_ids is None:
+            instance_ids = [
+                tenant['instance_id']
+                for tenant in tenant_registry.list_tenants(status='active')
+                if tenant['instance_id']
+            ]
+            if not instance_ids:
+                return jsonify({
+                    'success': True,
+                    'instances': {},
+                    'connected': 0
+                })
+        
+        if not isinstance(instance_ids, list) or not instance_ids:
+            return jsonify({
+                'success': False,
+                'error': 'instance_ids must be a non-empty list'
+            }), 400
+        
+        results = evolution_fleet.check_connection_status_many(instance_ids)
+        
+        return jsonify({
+            'success': True,
+            'instances': results,
+            'connected': sum(1 for result in results.values() if result.get('status') == 'open')
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @whatsapp_gpt_bp.route('/get-qr-code/<instance_id>', methods=['GET'])
 def get_qr_code(instance_id):
     """
     Get QR code for WhatsApp connection
     """
     try:
-        result = evolution_manager.get_qr_code(instance_id)
+        result = qr_codes.get(instance_id, evolution_manager.get_qr_code)
         return jsonify(result)
     except Exception as e:
         return jsonify({
@@ -148,6 +694,21 @@ def get_qr_code(instance_id):
             'error': str(e)
         }), 500
 
+@whatsapp_gpt_bp.route('/qr-stream/<instance_id>', methods=['GET'])
+def qr_stream(instance_id):
+    """
+    Server-Sent Events stream of QR codes for an instance as they rotate
+
+    Each stream holds a worker thread for up to SSE_MAX_STREAM_SECONDS; beyond SSE_MAX_STREAMS
+    open streams per process the request gets a 503 and the page keeps the QR code it has.
+    """
+    return _sse_response(lambda: qr_codes.stream(
+        instance_id,
+        evolution_manager.get_qr_code,
+        max_seconds=float(os.getenv('SSE_MAX_STREAM_SECONDS', '300')),
+        is_done=lambda: _is_connected(instance_id)
+    ))
+
 @whatsapp_gpt_bp.route('/add-knowledge', methods=['POST'])
 def add_knowledge():
     """
@@ -165,13 +726,57 @@ def add_knowledge():
                 'error': 'client_id and content are required'
             }), 400
         
-        result = vector_manager.process_text_content(
+        # Run inline only when explicitly asked to; otherwise hand off to the job queue
+        if data.get('sync', False):
+            result = vector_manager.process_text_content(
+                client_id=client_id,
+                content=content,
+                metadata=metadata,
+                incremental=bool(data.get('incremental', False)),
+                source_id=data.get('source_id')
+            )
+            
+            return jsonify(result)
+        
+        job = ingestion_queue.submit(
             client_id=client_id,
             content=content,
-            metadata=metadata
+            metadata=metadata,
+            incremental=bool(data.get('incremental', False)),
+            source_id=data.get('source_id')
         )
         
-        return jsonify(result)
+        return jsonify({
+            'success': True,
+            'job_id': job['job_id'],
+            'job': job,
+            'message': 'Knowledge ingestion queued'
+        }), 202
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@whatsapp_gpt_bp.route('/ingestion-jobs/<job_id>', methods=['GET'])
+def ingestion_job_status(job_id):
+    """
+    Get status and progress of a knowledge ingestion job
+    """
+    try:
+        job = ingestion_queue.get_job(job_id)
+        
+        if job is None:
+            return jsonify({
+                'success': False,
+                'error': 'Ingestion job not found'
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'job': job
+        })
         
     except Exception as e:
         return jsonify({
@@ -179,6 +784,23 @@ def add_knowledge():
             'error': str(e)
         }), 500
 
+@whatsapp_gpt_bp.route('/ingestion-queue', methods=['GET'])
+def ingestion_queue_stats():
+    """
+    Get ingestion scheduler queue depth and worker statistics
+    """
+    try:
+        return jsonify({
+            'success': True,
+            'queue': ingestion_queue.get_queue_stats(),
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @whatsapp_gpt_bp.route('/query-knowledge', methods=['POST'])
 def query_knowledge():
     """
@@ -196,12 +818,30 @@ def query_knowledge():
                 'error': 'client_id and query are required'
             }), 400
         
+        history_tokens = data.get('history_tokens')
+        if history_tokens is not None and (
+            isinstance(history_tokens, bool) or not isinstance(history_tokens, int) or history_tokens < 0
+        ):
+            return jsonify({
+                'success': False,
+                'error': 'history_tokens must be a non-negative integer'
+            }), 400
+        
         result = vector_manager.query_knowledge_base(
             client_id=client_id,
             query=query,
             top_k=top_k
         )
         
+        # Include the chat's recent turns when the query comes from a conversation
+        instance_id = data.get('instance_id')
+        remote_jid = data.get('remote_jid')
+        if instance_id and remote_jid:
+            result = {
+                **result,
+                'history': conversation_memory.get_history(instance_id, remote_jid, history_tokens)
+            }
+        
         return jsonify(result)
         
     except Exception as e:
@@ -210,6 +850,75 @@ def query_knowledge():
             'error': str(e)
         }), 500
 
+@whatsapp_gpt_bp.route('/conversations/<instance_id>/<remote_jid>', methods=['GET', 'DELETE'])
+def conversation_history(instance_id, remote_jid):
+    """
+    Get (token-budgeted via ?max_tokens=) or forget the recent turns of a chat
+    """
+    try:
+        if request.method == 'DELETE':
+            return jsonify({
+                'success': True,
+                'cleared': conversation_memory.clear(instance_id, remote_jid)
+            })
+        
+        history = conversation_memory.get_history(
+            instance_id,
+            remote_jid,
+            request.args.get('max_tokens', type=int)
+        )
+        
+        return jsonify({
+            'success': True,
+            'instance_id': instance_id,
+            'remote_jid': remote_jid,
+            'history': history,
+            'tokens': sum(turn['tokens'] for turn in history)
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@whatsapp_gpt_bp.route('/query-knowledge-batch', methods=['POST'])
+def query_knowledge_batch():
+    """
+    Query knowledge bases for many (client_id, query, top_k) items at once
+    """
+    try:
+        data = request.get_json()
+        items = data.get('items')
+        max_items = int(os.getenv('QUERY_BATCH_MAX_ITEMS', '100'))
+        
+        if not isinstance(items, list) or not items:
+            return jsonify({
+                'success': False,
+                'error': 'items must be a non-empty list'
+            }), 400
+        
+        if len(items) > max_items:
+            return jsonify({
+                'success': False,
+                'error': f'At most {max_items} items per batch'
+            }), 400
+        
+        results = vector_manager.query_knowledge_batch(items)
+        
+        return jsonify({
+            'success': True,
+            'results': results,
+            'total_items': len(results),
+            'failed_items': sum(1 for result in results if not result['success'])
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @whatsapp_gpt_bp.route('/workflow-status/<workflow_id>', methods=['GET'])
 def workflow_status(workflow_id):
     """
@@ -241,10 +950,11 @@ def send_test_message():
                 'error': 'instance_id and number are required'
             }), 400
         
-        result = evolution_manager.send_message(
+        # Goes through the paced per-instance queue like every other outbound message
+        result = outbound_dispatcher.send(
             instance_name=instance_id,
             number=number,
-            message=message
+            text=message
         )
         
         return jsonify(result)
@@ -255,6 +965,119 @@ def send_test_message():
             'error': str(e)
         }), 500
 
+@whatsapp_gpt_bp.route('/broadcast', methods=['POST'])
+def broadcast_messages():
+    """
+    Queue many (number, text) messages for paced delivery from one instance
+    """
+    try:
+        data = request.get_json()
+        instance_id = data.get('instance_id')
+        messages = data.get('messages')
+        max_messages = int(os.getenv('BROADCAST_MAX_MESSAGES', '10000'))
+        
+        if not instance_id or not isinstance(messages, list) or not messages:
+            return jsonify({
+                'success': False,
+                'error': 'instance_id and a non-empty messages list are required'
+            }), 400
+        
+        if len(messages) > max_messages:
+            return jsonify({
+                'success': False,
+                'error': f'At most {max_messages} messages per broadcast'
+            }), 400
+        
+        items = []
+        for item in messages:
+            number = item.get('number') if isinstance(item, dict) else None
+            text = item.get('text') if isinstance(item, dict) else None
+            if not number or not text:
+                return jsonify({
+                    'success': False,
+                    'error': 'Every message needs a number and a text'
+                }), 400
+            items.append((number, text))
+        
+        if data.get('rate_per_second') is not None:
+            try:
+                rate = float(data['rate_per_second'])
+                burst = int(data['burst']) if data.get('burst') is not None else None
+            except (TypeError, ValueError):
+                rate, burst = 0, None
+            if not rate > 0 or (burst is not None and burst < 1):
+                return jsonify({
+                    'success': False,
+                    'error': 'rate_per_second must be a positive number and burst an integer of at least 1'
+                }), 400
+            
+            outbound_dispatcher.set_rate(instance_id, rate, burst)
+        
+        broadcast = outbound_dispatcher.broadcast(instance_id, items)
+        
+        return jsonify({
+            'success': True,
+            'broadcast': broadcast,
+            'message': 'Broadcast queued'
+        }), 202
+        
+    except OutboundQueueFull as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 429
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@whatsapp_gpt_bp.route('/broadcast/<broadcast_id>', methods=['GET'])
+def broadcast_status(broadcast_id):
+    """
+    Get delivery progress for a broadcast
+    """
+    try:
+        broadcast = outbound_dispatcher.get_broadcast(broadcast_id)
+        
+        if broadcast is None:
+            return jsonify({
+                'success': False,
+                'error': 'Broadcast not found'
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'broadcast': broadcast
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@whatsapp_gpt_bp.route('/outbound-stats', methods=['GET'])
+def outbound_stats():
+    """
+    Get per-instance outbound queue statistics
+    """
+    try:
+        return jsonify({
+            'success': True,
+            'instances': outbound_dispatcher.get_stats()
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @whatsapp_gpt_bp.route('/client-stats/<client_id>', methods=['GET'])
 def client_stats(client_id):
     """
@@ -270,6 +1093,7 @@ def client_stats(client_id):
             'success': True,
             'stats': {
                 'knowledge_base': vector_stats,
+                'tenant': tenant_registry.get_by_client(client_id),
                 'client_id': client_id,
                 'last_updated': datetime.now().isoformat()
             }
@@ -281,14 +1105,69 @@ def client_stats(client_id):
             'error': str(e)
         }), 500
 
+@whatsapp_gpt_bp.route('/provisioning-pool', methods=['GET'])
+def provisioning_pool_stats():
+    """
+    Get warm pool level and hit/miss statistics
+    """
+    try:
+        return jsonify({
+            'success': True,
+            'pool': provisioning_pool.get_stats(),
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@whatsapp_gpt_bp.route('/upstream-stats', methods=['GET'])
+def upstream_stats():
+    """
+    Get connection pool and latency statistics for upstream services
+    """
+    try:
+        return jsonify({
+            'success': True,
+            'upstreams': get_transport_stats(),
+            'circuits': get_breaker_stats(),
+            'connection_state': connection_states.get_stats(),
+            'qr_cache': qr_codes.get_stats(),
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @whatsapp_gpt_bp.route('/health', methods=['GET'])
 def health_check():
     """
     Health check endpoint
     """
+    readiness = services.get_status()
+    
     return jsonify({
         'success': True,
         'message': 'WhatsApp GPT API is running',
+        'status': readiness['state'],
+        'ready': readiness['state'] == 'ready',
         'timestamp': datetime.now().isoformat()
     })
 
+@whatsapp_gpt_bp.route('/ready', methods=['GET'])
+def readiness_check():
+    """
+    Readiness check endpoint (503 until every service is initialized)
+    """
+    readiness = services.get_status()
+    ready = readiness['state'] == 'ready'
+    
+    return jsonify({
+        'success': ready,
+        'status': readiness['state'],
+        'services': readiness['services'],
+        'timestamp': datetime.now().isoformat()
+    }), 200 if ready else 503
@@ -0,0 +1,78 @@
+import os
+import sqlite3
+import threading
+from typing import Dict
+
+DEFAULT_MANIFEST_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), 'database', 'chunk_manifest.db'
+)
+
+class ChunkManifest:
+    """Per-namespace record of which chunk IDs each knowledge source produced"""
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or os.getenv('CHUNK_MANIFEST_PATH', DEFAULT_MANIFEST_PATH)
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS chunk_manifest ('
+            'namespace TEXT NOT NULL, '
+            'source_id TEXT NOT NULL, '
+            'chunk_id TEXT NOT NULL, '
+            'content_hash TEXT NOT NULL, '
+            'PRIMARY KEY (namespace, source_id, chunk_id))'
+        )
+        self._conn.commit()
+
+    def get_chunks(self, namespace: str, source_id: str) -> Dict[str, str]:
+        """
+        Get the chunks recorded for a source
+
+        Args:
+            namespace: Namespace identifier
+            source_id: Knowledge source identifier
+
+        Returns:
+            Dictionary mapping chunk ID to content hash
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT chunk_id, content_hash FROM chunk_manifest WHERE namespace = ? AND source_id = ?',
+                (namespace, source_id)
+            ).fetchall()
+
+        return dict(rows)
+
+    def replace_chunks(self, namespace: str, source_id: str, chunks: Dict[str, str]):
+        """
+        Replace the chunks recorded for a source
+
+        Args:
+            namespace: Namespace identifier
+            source_id: Knowledge source identifier
+            chunks: Dictionary mapping chunk ID to content hash
+        """
+        with self._lock:
+            self._conn.execute(
+                'DELETE FROM chunk_manifest WHERE namespace = ? AND source_id = ?',
+                (namespace, source_id)
+            )
+            self._conn.executemany(
+                'INSERT INTO chunk_manifest (namespace, source_id, chunk_id, content_hash) VALUES (?, ?, ?, ?)',
+                [(namespace, source_id, chunk_id, content_hash) for chunk_id, content_hash in chunks.items()]
+            )
+            self._conn.commit()
+
+    def delete_namespace(self, namespace: str):
+        """
+        Forget every source recorded for a namespace
+
+        Args:
+            namespace: Namespace identifier
+        """
+        with self._lock:
+            self._conn.execute('DELETE FROM chunk_manifest WHERE namespace = ?', (namespace,))
+            self._conn.commit()
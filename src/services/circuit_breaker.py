@@ -0,0 +1,255 @@
+import os
+import time
+import threading
+from collections import deque
+from typing import Callable, Dict
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+def upstream_setting(name: str, key: str, default: str) -> str:
+    """Read <NAME>_<KEY>, falling back to the global <KEY>, then to the default"""
+    return os.getenv(f"{name.upper()}_{key}", os.getenv(key, default))
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the upstream's circuit is open"""
+
+class CircuitBreaker:
+    """Rolling-window circuit breaker with half-open probing and p99-derived timeouts"""
+
+    def __init__(self, name: str, window_seconds: float = None, min_requests: int = None,
+                 error_threshold: float = None, open_seconds: float = None,
+                 half_open_probes: int = None, timeout_multiplier: float = None,
+                 min_timeout: float = None):
+        self.name = name
+        # Outcomes older than this are forgotten
+        self.window_seconds = window_seconds or float(upstream_setting(name, 'CIRCUIT_WINDOW_SECONDS', '60'))
+        # No tripping or timeout adaptation until the window holds this many calls
+        self.min_requests = min_requests or int(upstream_setting(name, 'CIRCUIT_MIN_REQUESTS', '20'))
+        # Error rate (failures / calls in window) that opens the circuit
+        self.error_threshold = error_threshold or float(upstream_setting(name, 'CIRCUIT_ERROR_THRESHOLD', '0.5'))
+        # How long an open circuit rejects calls before letting probes through
+        self.open_seconds = open_seconds or float(upstream_setting(name, 'CIRCUIT_OPEN_SECONDS', '30'))
+        self.half_open_probes = half_open_probes or int(upstream_setting(name, 'CIRCUIT_HALF_OPEN_PROBES', '1'))
+        # Adaptive timeout = p99 latency * multiplier, never below min_timeout
+        self.timeout_multiplier = timeout_multiplier or float(upstream_setting(name, 'CIRCUIT_TIMEOUT_MULTIPLIER', '3'))
+        self.min_timeout = min_timeout or float(upstream_setting(name, 'CIRCUIT_MIN_TIMEOUT', '1'))
+
+        self.state = CLOSED
+        # (monotonic time, latency seconds, succeeded, route)
+        self._outcomes = deque(maxlen=int(upstream_setting(name, 'CIRCUIT_MAX_SAMPLES', '1000')))
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        # route (None for all calls) -> (computed at, percentiles)
+        self._percentiles = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            'calls': 0,
+            'failures': 0,
+            'rejected': 0,
+            'opened': 0
+        }
+
+    def allow(self):
+        """
+        Check that a call may proceed
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with all probes in flight
+        """
+        with self._lock:
+            if self.state == OPEN:
+                remaining = self._opened_at + self.open_seconds - time.monotonic()
+                if remaining > 0:
+                    self._stats['rejected'] += 1
+                    raise CircuitOpenError(f"Circuit open for {self.name}; retry in {remaining:.1f}s")
+                self.state = HALF_OPEN
+                self._probes_in_flight = 0
+
+            if self.state == HALF_OPEN:
+                if self._probes_in_flight >= self.half_open_probes:
+                    self._stats['rejected'] += 1
+                    raise CircuitOpenError(f"Circuit half-open for {self.name}; probe in progress")
+                self._probes_in_flight += 1
+
+    def record(self, latency: float, succeeded: bool, route: str = None):
+        """
+        Record the outcome of a call that allow() let through
+
+        Args:
+            latency: Call duration in seconds
+            succeeded: Whether the upstream behaved (4xx responses count as success)
+            route: Endpoint the call went to; latencies are tracked per route
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._stats['calls'] += 1
+            if not succeeded:
+                self._stats['failures'] += 1
+
+            if self.state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if succeeded:
+                    # Recovered: start over with a clean window
+                    self.state = CLOSED
+                    self._outcomes.clear()
+                    self._percentiles = {}
+                else:
+                    self._open(now)
+
+            self._outcomes.append((now, latency, succeeded, route))
+            self._trim(now)
+
+            if self.state == CLOSED and len(self._outcomes) >= self.min_requests:
+                failures = sum(1 for outcome in self._outcomes if not outcome[2])
+                if failures / len(self._outcomes) >= self.error_threshold:
+                    self._open(now)
+
+    def call(self, fn: Callable, *args, slow_after: float = None, route: str = None, **kwargs):
+        """
+        Run a call through the breaker
+
+        Args:
+            fn: Callable to run
+            *args: Positional arguments for fn
+            slow_after: Count calls slower than this many seconds as failures
+            route: Endpoint the call goes to (for per-route latency)
+            **kwargs: Keyword arguments for fn
+
+        Returns:
+            Whatever fn returns
+        """
+        self.allow()
+        started = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.record(time.perf_counter() - started, False, route)
+            raise
+
+        latency = time.perf_counter() - started
+        self.record(latency, slow_after is None or latency <= slow_after, route)
+        return result
+
+    def timeout(self, ceiling: float, route: str = None) -> float:
+        """
+        Get the adaptive timeout for the next call
+
+        Fast polling endpoints would otherwise set the timeout for slow ones
+        (instance or workflow creation), so the p99 comes from the route's own
+        calls; routes without enough samples get the ceiling.
+
+        Args:
+            ceiling: Configured timeout, used until enough latencies are observed
+            route: Endpoint the call goes to
+
+        Returns:
+            Timeout in seconds, derived from observed p99 and capped at the ceiling
+        """
+        p99 = self.percentiles(route).get('p99')
+        if p99 is None:
+            return ceiling
+        return min(ceiling, max(self.min_timeout, p99 * self.timeout_multiplier))
+
+    def percentiles(self, route: str = None) -> Dict:
+        """
+        Get p50/p95/p99 latency of successful calls in the window (refreshed at most once a second)
+
+        Args:
+            route: Only consider calls to this route (all calls if omitted)
+
+        Returns:
+            Dictionary of percentile -> seconds (empty until min_requests samples)
+        """
+        now = time.monotonic()
+        with self._lock:
+            cached = self._percentiles.get(route)
+            if cached is not None and now - cached[0] < 1.0:
+                return cached[1]
+
+            self._trim(now)
+            latencies = sorted(
+                latency for _, latency, ok, call_route in self._outcomes
+                if ok and (route is None or call_route == route)
+            )
+            if len(latencies) < self.min_requests:
+                percentiles = {}
+            else:
+                percentiles = {
+                    name: latencies[min(len(latencies) - 1, int(len(latencies) * fraction))]
+                    for name, fraction in (('p50', 0.50), ('p95', 0.95), ('p99', 0.99))
+                }
+            self._percentiles[route] = (now, percentiles)
+            return percentiles
+
+    def get_stats(self) -> Dict:
+        """
+        Get breaker state, rolling error rate and latency percentiles
+
+        Returns:
+            Dictionary with state, counters and percentiles in milliseconds
+        """
+        percentiles = self.percentiles()
+        with self._lock:
+            self._trim(time.monotonic())
+            window_calls = len(self._outcomes)
+            window_failures = sum(1 for outcome in self._outcomes if not outcome[2])
+            routes = {outcome[3] for outcome in self._outcomes if outcome[3] is not None}
+            stats = dict(self._stats)
+            state = self.state
+
+        stats.update({
+            'state': state,
+            'window_calls': window_calls,
+            'error_rate': round(window_failures / window_calls, 4) if window_calls else 0.0,
+            'latency_ms': {name: round(value * 1000, 2) for name, value in percentiles.items()},
+            'route_p99_ms': {
+                route: round(self.percentiles(route)['p99'] * 1000, 2)
+                for route in sorted(routes) if self.percentiles(route)
+            }
+        })
+        return stats
+
+    def _open(self, now: float):
+        self.state = OPEN
+        self._opened_at = now
+        self._probes_in_flight = 0
+        self._stats['opened'] += 1
+
+    def _trim(self, now: float):
+        cutoff = now - self.window_seconds
+        while self._outcomes and self._outcomes[0][0] < cutoff:
+            self._outcomes.popleft()
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """
+    Get the shared circuit breaker for an upstream, creating it on first use
+
+    Args:
+        name: Upstream name (e.g. 'evolution', 'n8n', 'pinecone')
+
+    Returns:
+        Shared CircuitBreaker instance
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name)
+            _breakers[name] = breaker
+        return breaker
+
+def get_breaker_stats() -> Dict:
+    """
+    Get statistics for every circuit breaker
+
+    Returns:
+        Dictionary mapping upstream name to its breaker statistics
+    """
+    with _breakers_lock:
+        breakers = dict(_breakers)
+
+    return {name: breaker.get_stats() for name, breaker in breakers.items()}
@@ -0,0 +1,174 @@
+import os
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterator
+
+from src.services.event_stream import VersionedStore
+
+def normalize_event_name(event: str) -> str:
+    """
+    Normalize Evolution event names ('CONNECTION_UPDATE', 'connection-update',
+    'connection.update') to the dotted form
+
+    Args:
+        event: Raw event name
+
+    Returns:
+        Dotted lower-case event name
+    """
+    return (event or '').strip().lower().replace('_', '.').replace('-', '.')
+
+class ConnectionStateStore:
+    """In-memory WhatsApp connection state per instance, fed by Evolution webhooks"""
+
+    def __init__(self, upstream_ttl: float = None, webhook_ttl: float = None):
+        # States fetched from Evolution are refreshed after this long
+        self.upstream_ttl = upstream_ttl or float(os.getenv('CONNECTION_STATE_TTL_SECONDS', '30'))
+        # States pushed by webhooks are trusted for longer
+        self.webhook_ttl = webhook_ttl or float(os.getenv('CONNECTION_STATE_WEBHOOK_TTL_SECONDS', '900'))
+
+        self.states = VersionedStore()
+        self._expires = {}
+        self._stats = {
+            'webhook_updates': 0,
+            'served_from_store': 0,
+            'upstream_fetches': 0
+        }
+
+    def update(self, instance_name: str, state: str, source: str = 'webhook', data: Dict = None) -> Dict:
+        """
+        Record a connection state
+
+        Args:
+            instance_name: Name of the Evolution API instance
+            state: Connection state ('open', 'connecting', 'close', ...)
+            source: 'webhook' or 'upstream'
+            data: Raw payload the state came from
+
+        Returns:
+            Stored state entry
+        """
+        ttl = self.webhook_ttl if source == 'webhook' else self.upstream_ttl
+        self._expires[instance_name] = time.monotonic() + ttl
+
+        if source == 'webhook':
+            self._stats['webhook_updates'] += 1
+
+        # Only wake stream listeners when the state actually changes
+        current, _ = self.states.get(instance_name)
+        if current is not None and current['status'] == state:
+            return current
+
+        entry = {
+            'instance_id': instance_name,
+            'status': state,
+            'source': source,
+            'updated_at': datetime.now().isoformat(),
+            'data': data
+        }
+
+        self.states.set(instance_name, entry)
+
+        return entry
+
+    def ingest_event(self, payload: Dict, event_name: str = None) -> bool:
+        """
+        Apply an Evolution webhook event if it carries connection state
+
+        Args:
+            payload: Webhook JSON body
+            event_name: Event name from the URL (webhook_by_events mode)
+
+        Returns:
+            True if the event updated the store
+        """
+        event = normalize_event_name(payload.get('event') or event_name)
+        if event != 'connection.update':
+            return False
+
+        data = payload.get('data') or {}
+        instance_name = payload.get('instance') or data.get('instance')
+        state = data.get('state')
+        if not instance_name or not state:
+            return False
+
+        self.update(instance_name, state, source='webhook', data=data)
+        return True
+
+    def get_status(self, instance_name: str, fetch: Callable[[str], Dict]) -> Dict:
+        """
+        Get connection status, calling Evolution only when the store has nothing fresh
+
+        Args:
+            instance_name: Name of the Evolution API instance
+            fetch: Upstream status call (EvolutionAPIManager.check_connection_status)
+
+        Returns:
+            Dictionary with connection status
+        """
+        entry, _ = self.states.get(instance_name)
+        if entry is not None and self._expires.get(instance_name, 0) > time.monotonic():
+            self._stats['served_from_store'] += 1
+            return {
+                'success': True,
+                'status': entry['status'],
+                'source': entry['source'],
+                'updated_at': entry['updated_at']
+            }
+
+        self._stats['upstream_fetches'] += 1
+        result = fetch(instance_name)
+        if result.get('success'):
+            entry = self.update(instance_name, result.get('status', 'unknown'), source='upstream', data=result.get('data'))
+            return {
+                **result,
+                'source': entry['source'],
+                'updated_at': entry['updated_at']
+            }
+
+        return result
+
+    def stream(self, instance_name: str, fetch: Callable[[str], Dict], max_seconds: float,
+               heartbeat_seconds: float = 15) -> Iterator[str]:
+        """
+        Stream every connection state change of an instance as SSE messages
+
+        Waits for webhook pushes and asks Evolution again whenever the stored state
+        goes stale without one, so a lost or rejected webhook delays detection by
+        at most the upstream TTL instead of the whole stream lifetime.
+
+        Args:
+            instance_name: Name of the Evolution API instance
+            fetch: Upstream status call (EvolutionAPIManager.check_connection_status)
+            max_seconds: Close the stream after this long (clients reconnect)
+            heartbeat_seconds: Interval for keep-alive comments
+
+        Returns:
+            Iterator of SSE-formatted strings
+        """
+        def refresh() -> float:
+            # Served from the store while fresh, so this only calls Evolution once the state is stale
+            self.get_status(instance_name, fetch)
+            remaining = self._expires.get(instance_name, 0) - time.monotonic()
+            # After a failed refresh, wait a full upstream TTL before asking Evolution again
+            return remaining if remaining > 0 else self.upstream_ttl
+
+        # Seed the store so the first event is sent immediately
+        refresh_in = refresh()
+
+        return self.states.stream(
+            instance_name, 'connection', max_seconds, heartbeat_seconds,
+            refresh=refresh, refresh_in=refresh_in
+        )
+
+    def get_stats(self) -> Dict:
+        """
+        Get store statistics
+
+        Returns:
+            Dictionary with webhook, store and upstream counters
+        """
+        return {
+            **self._stats,
+            'instances': len(self._expires)
+        }
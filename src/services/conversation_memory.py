@@ -0,0 +1,183 @@
+import os
+import math
+import time
+import threading
+from collections import deque, OrderedDict
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the token count of a text (about four characters per token for GPT models)
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Estimated number of tokens
+    """
+    return max(1, math.ceil(len(text) / 4))
+
+class _Chat:
+    def __init__(self, max_turns: int):
+        # Ring buffer of {'role', 'content', 'tokens', 'at'}, oldest first
+        self.turns = deque(maxlen=max_turns)
+        self.tokens = 0
+        self.last_active = 0.0
+
+class ConversationMemory:
+    """Recent turns per (instance, chat) in bounded ring buffers with TTL and a global token cap"""
+
+    def __init__(self, max_turns: int = None, ttl_seconds: float = None, max_total_tokens: int = None,
+                 history_tokens: int = None):
+        # Turns kept per chat; older ones fall out of the ring buffer
+        self.max_turns = max_turns or int(os.getenv('CONVERSATION_MAX_TURNS', '12'))
+        # Chats idle for longer than this are forgotten
+        self.ttl_seconds = ttl_seconds or float(os.getenv('CONVERSATION_TTL_SECONDS', '1800'))
+        # Least recently active chats are dropped while the store holds more than this
+        self.max_total_tokens = max_total_tokens or int(os.getenv('CONVERSATION_MAX_TOTAL_TOKENS', '2000000'))
+        # Default history budget for get_history()
+        self.history_tokens = history_tokens or int(os.getenv('CONVERSATION_HISTORY_TOKENS', '1000'))
+
+        # (instance_id, remote_jid) -> _Chat, least recently active first
+        self._chats = OrderedDict()
+        self._total_tokens = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            'turns_added': 0,
+            'expired_chats': 0,
+            'evicted_chats': 0
+        }
+
+    def append(self, instance_id: str, remote_jid: str, role: str, content: str) -> Dict:
+        """
+        Add a turn to a chat
+
+        Args:
+            instance_id: Evolution API instance name
+            remote_jid: WhatsApp chat ID
+            role: 'user' or 'assistant'
+            content: Turn text
+
+        Returns:
+            The stored turn
+        """
+        now = time.monotonic()
+        turn = {
+            'role': role,
+            'content': content,
+            'tokens': estimate_tokens(content),
+            'at': datetime.now().isoformat()
+        }
+
+        with self._lock:
+            key = (instance_id, remote_jid)
+            chat = self._chats.get(key)
+            if chat is None:
+                chat = _Chat(self.max_turns)
+                self._chats[key] = chat
+
+            if len(chat.turns) == chat.turns.maxlen:
+                dropped = chat.turns[0]['tokens']
+                chat.tokens -= dropped
+                self._total_tokens -= dropped
+
+            chat.turns.append(turn)
+            chat.tokens += turn['tokens']
+            chat.last_active = now
+            self._total_tokens += turn['tokens']
+            self._chats.move_to_end(key)
+            self._stats['turns_added'] += 1
+
+            self._evict(now)
+
+        return dict(turn)
+
+    def get_history(self, instance_id: str, remote_jid: str, max_tokens: int = None) -> List[Dict]:
+        """
+        Get the most recent turns of a chat that fit a token budget
+
+        Args:
+            instance_id: Evolution API instance name
+            remote_jid: WhatsApp chat ID
+            max_tokens: Token budget (default CONVERSATION_HISTORY_TOKENS)
+
+        Returns:
+            Turns in chronological order, newest last
+        """
+        budget = self.history_tokens if max_tokens is None else max_tokens
+
+        with self._lock:
+            self._evict(time.monotonic())
+            chat = self._chats.get((instance_id, remote_jid))
+            if chat is None:
+                return []
+
+            history = []
+            used = 0
+            for turn in reversed(chat.turns):
+                if used + turn['tokens'] > budget:
+                    break
+                history.append(dict(turn))
+                used += turn['tokens']
+
+        history.reverse()
+        return history
+
+    def clear(self, instance_id: str, remote_jid: str = None) -> int:
+        """
+        Forget one chat, or every chat of an instance
+
+        Args:
+            instance_id: Evolution API instance name
+            remote_jid: WhatsApp chat ID (all chats of the instance if omitted)
+
+        Returns:
+            Number of chats removed
+        """
+        with self._lock:
+            keys = [
+                key for key in self._chats
+                if key[0] == instance_id and (remote_jid is None or key[1] == remote_jid)
+            ]
+            for key in keys:
+                self._drop(key)
+
+        return len(keys)
+
+    def get_stats(self) -> Dict:
+        """
+        Get memory usage statistics
+
+        Returns:
+            Dictionary with chat, turn and token counts
+        """
+        with self._lock:
+            self._evict(time.monotonic())
+            stats = dict(self._stats)
+            stats.update({
+                'chats': len(self._chats),
+                'turns': sum(len(chat.turns) for chat in self._chats.values()),
+                'total_tokens': self._total_tokens,
+                'max_total_tokens': self.max_total_tokens,
+                'max_turns': self.max_turns
+            })
+
+        return stats
+
+    def _drop(self, key: Tuple[str, str]):
+        chat = self._chats.pop(key)
+        self._total_tokens -= chat.tokens
+
+    def _evict(self, now: float):
+        """Drop idle chats, then the least recently active ones while over the token cap"""
+        while self._chats:
+            key, chat = next(iter(self._chats.items()))
+            if chat.last_active + self.ttl_seconds > now:
+                break
+            self._drop(key)
+            self._stats['expired_chats'] += 1
+
+        while self._total_tokens > self.max_total_tokens and len(self._chats) > 1:
+            self._drop(next(iter(self._chats)))
+            self._stats['evicted_chats'] += 1
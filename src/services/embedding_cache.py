@@ -0,0 +1,243 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), 'database', 'embedding_cache.db'
+)
+
+class EmbeddingCache:
+    """Two-tier embedding cache: in-memory LRU backed by a SQLite store"""
+
+    def __init__(self, db_path: str = None, max_memory_bytes: int = None, max_disk_bytes: int = None):
+        self.db_path = db_path or os.getenv('EMBEDDING_CACHE_PATH', DEFAULT_CACHE_PATH)
+        self.max_memory_bytes = max_memory_bytes or int(os.getenv('EMBEDDING_CACHE_MEMORY_MB', '64')) * 1024 * 1024
+        self.max_disk_bytes = max_disk_bytes or int(os.getenv('EMBEDDING_CACHE_DISK_MB', '512')) * 1024 * 1024
+
+        # key -> float32 array, ordered from least to most recently used
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+        self._stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'writes': 0,
+            'memory_evictions': 0,
+            'disk_evictions': 0
+        }
+
+        self._conn = None
+        self._disk_bytes = 0
+        self._initialize_db()
+
+    def _initialize_db(self):
+        """Open (or create) the on-disk cache"""
+        try:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS embeddings ('
+                'key TEXT PRIMARY KEY, '
+                'vector BLOB NOT NULL, '
+                'size INTEGER NOT NULL, '
+                'last_access REAL NOT NULL)'
+            )
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings (last_access)'
+            )
+            self._conn.commit()
+
+            row = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM embeddings').fetchone()
+            self._disk_bytes = row[0]
+        except Exception as e:
+            print(f"Warning: Embedding cache running memory-only: {str(e)}")
+            self._conn = None
+
+    @staticmethod
+    def content_hash(content: str) -> str:
+        """
+        Hash chunk content the same way chunk IDs are built
+
+        Args:
+            content: Chunk text
+
+        Returns:
+            md5 hex digest of the content
+        """
+        return hashlib.md5(content.encode()).hexdigest()
+
+    @staticmethod
+    def _make_key(model: str, content_hash: str) -> str:
+        return f"{model}:{content_hash}"
+
+    def get_many(self, model: str, content_hashes: Iterable[str]) -> Dict[str, List[float]]:
+        """
+        Look up cached embeddings
+
+        Args:
+            model: Embedding model name
+            content_hashes: Content hashes to look up
+
+        Returns:
+            Dictionary mapping each cached content hash to its embedding
+        """
+        content_hashes = set(content_hashes)
+        found = {}
+        disk_lookup = {}
+
+        with self._lock:
+            for content_hash in content_hashes:
+                key = self._make_key(model, content_hash)
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    self._stats['memory_hits'] += 1
+                    found[content_hash] = vector.tolist()
+                else:
+                    disk_lookup[key] = content_hash
+
+            if disk_lookup and self._conn is not None:
+                try:
+                    keys = list(disk_lookup)
+                    now = time.time()
+                    # Stay well under SQLite's bound-parameter limit
+                    for start in range(0, len(keys), 500):
+                        key_batch = keys[start:start + 500]
+                        placeholders = ','.join('?' * len(key_batch))
+                        rows = self._conn.execute(
+                            f'SELECT key, vector FROM embeddings WHERE key IN ({placeholders})',
+                            key_batch
+                        ).fetchall()
+
+                        for key, blob in rows:
+                            vector = array('f')
+                            vector.frombytes(blob)
+                            self._remember(key, vector)
+                            self._stats['disk_hits'] += 1
+                            found[disk_lookup.pop(key)] = vector.tolist()
+
+                        if rows:
+                            self._conn.executemany(
+                                'UPDATE embeddings SET last_access = ? WHERE key = ?',
+                                [(now, key) for key, _ in rows]
+                            )
+                    self._conn.commit()
+                except Exception as e:
+                    # A locked or damaged store only costs cache hits, never the ingestion
+                    print(f"Error reading embedding cache: {str(e)}")
+                    self._stats['misses'] += len(content_hashes)
+                    return {}
+
+            self._stats['misses'] += len(disk_lookup)
+
+        return found
+
+    def put_many(self, model: str, embeddings: Dict[str, List[float]]):
+        """
+        Store embeddings in both tiers
+
+        Args:
+            model: Embedding model name
+            embeddings: Dictionary mapping content hash to embedding
+        """
+        if not embeddings:
+            return
+
+        now = time.time()
+        rows = []
+
+        with self._lock:
+            for content_hash, values in embeddings.items():
+                key = self._make_key(model, content_hash)
+                vector = array('f', values)
+                self._remember(key, vector)
+                blob = vector.tobytes()
+                rows.append((key, blob, len(blob), now))
+
+            self._stats['writes'] += len(rows)
+
+            if self._conn is not None:
+                try:
+                    keys = [row[0] for row in rows]
+                    for start in range(0, len(keys), 500):
+                        key_batch = keys[start:start + 500]
+                        placeholders = ','.join('?' * len(key_batch))
+                        replaced = self._conn.execute(
+                            f'SELECT COALESCE(SUM(size), 0) FROM embeddings WHERE key IN ({placeholders})',
+                            key_batch
+                        ).fetchone()[0]
+                        self._disk_bytes -= replaced
+
+                    self._conn.executemany(
+                        'INSERT OR REPLACE INTO embeddings (key, vector, size, last_access) VALUES (?, ?, ?, ?)',
+                        rows
+                    )
+                    self._disk_bytes += sum(row[2] for row in rows)
+                    self._evict_disk()
+                    self._conn.commit()
+                except Exception as e:
+                    print(f"Error writing embedding cache: {str(e)}")
+
+    def _remember(self, key: str, vector: array):
+        """Insert into the memory tier and evict least recently used entries over the size cap"""
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= previous.itemsize * len(previous)
+
+        self._memory[key] = vector
+        self._memory_bytes += vector.itemsize * len(vector)
+
+        while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.itemsize * len(evicted)
+            self._stats['memory_evictions'] += 1
+
+    def _evict_disk(self):
+        """Drop least recently used rows until the store is back under its size cap"""
+        if self._disk_bytes <= self.max_disk_bytes:
+            return
+
+        # Evict down to 90% of the cap so we don't evict on every write
+        target = int(self.max_disk_bytes * 0.9)
+        cursor = self._conn.execute('SELECT key, size FROM embeddings ORDER BY last_access ASC')
+
+        evicted_keys = []
+        for key, size in cursor:
+            if self._disk_bytes <= target:
+                break
+            evicted_keys.append((key,))
+            self._disk_bytes -= size
+
+        self._conn.executemany('DELETE FROM embeddings WHERE key = ?', evicted_keys)
+        self._stats['disk_evictions'] += len(evicted_keys)
+
+    def get_stats(self) -> Dict:
+        """
+        Get cache statistics
+
+        Returns:
+            Dictionary with hit/miss counters and tier sizes
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            hits = stats['memory_hits'] + stats['disk_hits']
+            lookups = hits + stats['misses']
+
+            stats.update({
+                'hits': hits,
+                'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'disk_bytes': self._disk_bytes,
+                'disk_enabled': self._conn is not None
+            })
+
+        return stats
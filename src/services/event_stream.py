@@ -0,0 +1,132 @@
+import json
+import time
+import threading
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+def format_sse(data: Dict, event: str = None) -> str:
+    """
+    Format a Server-Sent Events message
+
+    Args:
+        data: JSON-serializable payload
+        event: Optional event name
+
+    Returns:
+        SSE wire-format string
+    """
+    lines = []
+    if event:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+class VersionedStore:
+    """Keyed values with per-key versions and blocking waits for changes"""
+
+    def __init__(self):
+        self._values = {}
+        self._versions = {}
+        self._condition = threading.Condition()
+
+    def set(self, key: str, value: Any) -> int:
+        """
+        Store a value and wake up anyone waiting on the key
+
+        Args:
+            key: Key to update
+            value: New value
+
+        Returns:
+            New version of the key
+        """
+        with self._condition:
+            version = self._versions.get(key, 0) + 1
+            self._values[key] = value
+            self._versions[key] = version
+            self._condition.notify_all()
+            return version
+
+    def get(self, key: str) -> Tuple[Optional[Any], int]:
+        """
+        Get the current value and version of a key
+
+        Args:
+            key: Key to read
+
+        Returns:
+            Tuple of (value or None, version)
+        """
+        with self._condition:
+            return self._values.get(key), self._versions.get(key, 0)
+
+    def wait_for_change(self, key: str, after_version: int, timeout: float) -> Optional[Tuple[Any, int]]:
+        """
+        Block until a key moves past a version
+
+        Args:
+            key: Key to watch
+            after_version: Last version the caller has seen
+            timeout: Seconds to wait
+
+        Returns:
+            Tuple of (value, version), or None on timeout
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while self._versions.get(key, 0) <= after_version:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+            return self._values[key], self._versions[key]
+
+    def stream(self, key: str, event: str, max_seconds: float, heartbeat_seconds: float = 15,
+               refresh: Callable[[], float] = None, refresh_in: float = 0,
+               is_done: Callable[[], Optional[Dict]] = None, done_event: str = 'done') -> Iterator[str]:
+        """
+        Yield SSE messages for every change of a key
+
+        Args:
+            key: Key to watch
+            event: SSE event name
+            max_seconds: Close the stream after this long (clients reconnect)
+            heartbeat_seconds: Interval for keep-alive comments
+            refresh: Called when the value is due to be re-read from its source; stores any
+                change and returns the seconds until the next call
+            refresh_in: Seconds until the first refresh call
+            is_done: Checked before every wait; a returned payload is sent as done_event and ends the stream
+            done_event: SSE event name for the is_done payload
+
+        Returns:
+            Iterator of SSE-formatted strings
+        """
+        value, version = self.get(key)
+        if value is not None:
+            yield format_sse(value, event)
+
+        now = time.monotonic()
+        deadline = now + max_seconds
+        refresh_at = now + refresh_in if refresh is not None else float('inf')
+
+        while True:
+            now = time.monotonic()
+            if now >= deadline:
+                return
+
+            if is_done is not None:
+                payload = is_done()
+                if payload is not None:
+                    yield format_sse(payload, done_event)
+                    return
+
+            change = self.wait_for_change(key, version, max(0.0, min(heartbeat_seconds, refresh_at - now, deadline - now)))
+            if change is None and time.monotonic() >= refresh_at:
+                refresh_at = time.monotonic() + refresh()
+                change = self.wait_for_change(key, version, 0)
+
+            if change is None:
+                yield ": keep-alive\n\n"
+                continue
+
+            value, version = change
+            yield format_sse(value, event)
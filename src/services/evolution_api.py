@@ -1,10 +1,10 @@
-import requests
 import json
 import uuid
 from typing import Dict, Optional, List
 from dataclasses import dataclass
 import os
 from datetime import datetime
+from src.services.http_client import get_transport
 
 @dataclass
 class EvolutionInstance:
@@ -31,21 +31,38 @@ class EvolutionAPIManager:
             'Content-Type': 'application/json',
             'apikey': self.api_key
         }
+        
+        # Shared pooled keep-alive transport
+        self.http = get_transport('evolution')
+    
+    @staticmethod
+    def generate_instance_name(client_id: str) -> str:
+        """
+        Generate a unique instance name for a client
+        
+        Args:
+            client_id: Unique identifier for the client
+            
+        Returns:
+            Instance name
+        """
+        return f"whatsapp_gpt_{client_id}_{uuid.uuid4().hex[:8]}"
     
-    def create_instance(self, client_id: str, business_name: str = None) -> Dict:
+    def create_instance(self, client_id: str, business_name: str = None, instance_name: str = None) -> Dict:
         """
         Create a new Evolution API instance for a client
         
         Args:
             client_id: Unique identifier for the client
             business_name: Optional business name for the instance
+            instance_name: Instance name to use (generated when omitted)
             
         Returns:
             Dictionary with instance details and QR code
         """
         try:
             # Generate unique instance name
-            instance_name = f"whatsapp_gpt_{client_id}_{uuid.uuid4().hex[:8]}"
+            instance_name = instance_name or self.generate_instance_name(client_id)
             
             # Create instance payload
             payload = {
@@ -57,7 +74,7 @@ class EvolutionAPIManager:
             }
             
             # Create instance
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/instance/create",
                 headers=self.headers,
                 json=payload
@@ -66,20 +83,25 @@ class EvolutionAPIManager:
             if response.status_code == 201:
                 result = response.json()
                 
-                # Get QR code
-                qr_response = self.get_qr_code(instance_name)
+                # The create response already carries the first QR code;
+                # only ask /instance/connect when it does not
+                qrcode = result.get('qrcode') or {}
+                if not qrcode.get('code'):
+                    qr_response = self.get_qr_code(instance_name)
+                    qrcode = qr_response.get('qrcode') or {} if qr_response else {}
                 
                 instance = EvolutionInstance(
                     instance_id=instance_name,
                     instance_name=instance_name,
                     client_id=client_id,
                     status="created",
-                    qr_code=qr_response.get('qrcode', {}).get('code') if qr_response else None
+                    qr_code=qrcode.get('code')
                 )
                 
                 return {
                     "success": True,
                     "instance": instance.__dict__,
+                    "qrcode": qrcode,
                     "message": "Instance created successfully"
                 }
             else:
@@ -106,7 +128,7 @@ class EvolutionAPIManager:
             Dictionary with QR code data
         """
         try:
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/instance/connect/{instance_name}",
                 headers=self.headers
             )
@@ -139,7 +161,7 @@ class EvolutionAPIManager:
             Dictionary with connection status
         """
         try:
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/instance/connectionState/{instance_name}",
                 headers=self.headers
             )
@@ -180,6 +202,7 @@ class EvolutionAPIManager:
                 events = [
                     "MESSAGES_UPSERT",
                     "CONNECTION_UPDATE",
+                    "QRCODE_UPDATED",
                     "CALL",
                     "GROUPS_UPSERT",
                     "CONTACTS_UPDATE"
@@ -192,7 +215,7 @@ class EvolutionAPIManager:
                 "webhook_by_events": True
             }
             
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/webhook/set/{instance_name}",
                 headers=self.headers,
                 json=payload
@@ -234,7 +257,7 @@ class EvolutionAPIManager:
                 "text": message
             }
             
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/message/sendText/{instance_name}",
                 headers=self.headers,
                 json=payload
@@ -269,7 +292,7 @@ class EvolutionAPIManager:
             Dictionary with deletion result
         """
         try:
-            response = requests.delete(
+            response = self.http.delete(
                 f"{self.base_url}/instance/delete/{instance_name}",
                 headers=self.headers
             )
@@ -299,7 +322,7 @@ class EvolutionAPIManager:
             Dictionary with list of instances
         """
         try:
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/instance/fetchInstances",
                 headers=self.headers
             )
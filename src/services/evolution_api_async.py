@@ -0,0 +1,420 @@
+import os
+import json
+import time
+import asyncio
+import threading
+from typing import Dict, List, Optional
+
+try:
+    import aiohttp
+except ImportError as e:
+    aiohttp = None
+    print(f"Warning: Some dependencies not available: {e}")
+
+from src.services.evolution_api import EvolutionAPIManager, EvolutionInstance
+from src.services.circuit_breaker import get_breaker
+from src.services.http_client import route_key
+
+class AsyncEvolutionAPIManager:
+    """Asyncio Evolution API client with a shared connection pool and per-host limits"""
+
+    def __init__(self, base_url: str = None, api_key: str = None,
+                 max_connections: int = None, per_host_limit: int = None):
+        self.base_url = base_url or os.getenv('EVOLUTION_API_URL', 'http://localhost:8080')
+        self.api_key = api_key or os.getenv('EVOLUTION_API_KEY', 'change-me')
+        self.headers = {
+            'Content-Type': 'application/json',
+            'apikey': self.api_key
+        }
+
+        self.max_connections = max_connections or int(os.getenv('EVOLUTION_ASYNC_MAX_CONNECTIONS', '100'))
+        self.per_host_limit = per_host_limit or int(os.getenv('EVOLUTION_ASYNC_PER_HOST_LIMIT', '20'))
+        self.connect_timeout = float(os.getenv('EVOLUTION_HTTP_CONNECT_TIMEOUT', os.getenv('HTTP_CONNECT_TIMEOUT', '3.05')))
+        self.read_timeout = float(os.getenv('EVOLUTION_HTTP_READ_TIMEOUT', os.getenv('HTTP_READ_TIMEOUT', '30')))
+
+        # Shares the 'evolution' breaker with the synchronous transport
+        self.breaker = get_breaker('evolution')
+
+        self._session = None
+
+    async def _get_session(self) -> 'aiohttp.ClientSession':
+        """Create the pooled session on first use (it must live on the running loop)"""
+        if aiohttp is None:
+            raise RuntimeError("aiohttp package not available")
+
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.per_host_limit
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(
+                    sock_connect=self.connect_timeout,
+                    sock_read=self.read_timeout
+                )
+            )
+        return self._session
+
+    async def _request(self, method: str, path: str, payload: Dict = None):
+        """
+        Send a request and return (status code, parsed body, raw text)
+        """
+        session = await self._get_session()
+        route = route_key(method, path)
+        self.breaker.allow()
+        timeout = aiohttp.ClientTimeout(
+            sock_connect=self.connect_timeout,
+            sock_read=self.breaker.timeout(self.read_timeout, route)
+        )
+
+        started = time.perf_counter()
+        try:
+            async with session.request(method, f"{self.base_url}{path}", json=payload, timeout=timeout) as response:
+                text = await response.text()
+        except Exception:
+            self.breaker.record(time.perf_counter() - started, False, route)
+            raise
+
+        self.breaker.record(time.perf_counter() - started, response.status < 500, route)
+
+        try:
+            body = json.loads(text) if text else None
+        except ValueError:
+            body = None
+        return response.status, body, text
+
+    async def close(self):
+        """Close the pooled session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def create_instance(self, client_id: str, business_name: str = None, instance_name: str = None) -> Dict:
+        """
+        Create a new Evolution API instance for a client
+
+        Args:
+            client_id: Unique identifier for the client
+            business_name: Optional business name for the instance
+            instance_name: Instance name to use (generated when omitted)
+
+        Returns:
+            Dictionary with instance details and QR code
+        """
+        try:
+            instance_name = instance_name or EvolutionAPIManager.generate_instance_name(client_id)
+
+            payload = {
+                "instanceName": instance_name,
+                "token": self.api_key,
+                "qrcode": True,
+                "number": "",
+                "integration": "WHATSAPP-BAILEYS"
+            }
+
+            status, body, text = await self._request('POST', '/instance/create', payload)
+
+            if status == 201:
+                # The create response already carries the first QR code
+                qrcode = (body or {}).get('qrcode') or {}
+                if not qrcode.get('code'):
+                    qr_response = await self.get_qr_code(instance_name)
+                    qrcode = qr_response.get('qrcode') or {} if qr_response else {}
+
+                instance = EvolutionInstance(
+                    instance_id=instance_name,
+                    instance_name=instance_name,
+                    client_id=client_id,
+                    status="created",
+                    qr_code=qrcode.get('code')
+                )
+
+                return {
+                    "success": True,
+                    "instance": instance.__dict__,
+                    "qrcode": qrcode,
+                    "message": "Instance created successfully"
+                }
+            else:
+                return {
+                    "success": False,
+                    "error": f"Failed to create instance: {text}",
+                    "status_code": status
+                }
+
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Exception creating instance: {str(e)}"
+            }
+
+    async def get_qr_code(self, instance_name: str) -> Dict:
+        """
+        Get QR code for WhatsApp connection
+
+        Args:
+            instance_name: Name of the Evolution API instance
+
+        Returns:
+            Dictionary with QR code data
+        """
+        try:
+            status, body, text = await self._request('GET', f"/instance/connect/{instance_name}")
+
+            if status == 200:
+                return {
+                    "success": True,
+                    "qrcode": body
+                }
+            else:
+                return {
+                    "success": False,
+                    "error": f"Failed to get QR code: {text}"
+                }
+
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Exception getting QR code: {str(e)}"
+            }
+
+    async def check_connection_status(self, instance_name: str) -> Dict:
+        """
+        Check WhatsApp connection status for an instance
+
+        Args:
+            instance_name: Name of the Evolution API instance
+
+        Returns:
+            Dictionary with connection status
+        """
+        try:
+            status, body, text = await self._request('GET', f"/instance/connectionState/{instance_name}")
+
+            if status == 200:
+                return {
+                    "success": True,
+                    "status": (body or {}).get("instance", {}).get("state", "unknown"),
+                    "data": body
+                }
+            else:
+                return {
+                    "success": False,
+                    "error": f"Failed to check status: {text}"
+                }
+
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Exception checking status: {str(e)}"
+            }
+
+    async def configure_webhook(self, instance_name: str, webhook_url: str, events: List[str] = None) -> Dict:
+        """
+        Configure webhook for an instance
+
+        Args:
+            instance_name: Name of the Evolution API instance
+            webhook_url: URL to receive webhook events
+            events: List of events to monitor (default: all message events)
+
+        Returns:
+            Dictionary with configuration result
+        """
+        try:
+            if events is None:
+                events = [
+                    "MESSAGES_UPSERT",
+                    "CONNECTION_UPDATE",
+                    "QRCODE_UPDATED",
+                    "CALL",
+                    "GROUPS_UPSERT",
+                    "CONTACTS_UPDATE"
+                ]
+
+            payload = {
+                "url": webhook_url,
+                "enabled": True,
+                "events": events,
+                "webhook_by_events": True
+            }
+
+            status, body, text = await self._request('POST', f"/webhook/set/{instance_name}", payload)
+
+            if status in [200, 201]:
+                return {
+                    "success": True,
+                    "message": "Webhook configured successfully",
+                    "data": body
+                }
+            else:
+                return {
+                    "success": False,
+                    "error": f"Failed to configure webhook: {text}"
+                }
+
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Exception configuring webhook: {str(e)}"
+            }
+
+    async def send_message(self, instance_name: str, number: str, message: str) -> Dict:
+        """
+        Send a WhatsApp message
+
+        Args:
+            instance_name: Name of the Evolution API instance
+            number: Phone number to send message to
+            message: Message content
+
+        Returns:
+            Dictionary with send result
+        """
+        try:
+            payload = {
+                "number": number,
+                "text": message
+            }
+
+            status, body, text = await self._request('POST', f"/message/sendText/{instance_name}", payload)
+
+            if status == 201:
+                return {
+                    "success": True,
+                    "message": "Message sent successfully",
+                    "data": body
+                }
+            else:
+                return {
+                    "success": False,
+                    "error": f"Failed to send message: {text}"
+                }
+
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Exception sending message: {str(e)}"
+            }
+
+    async def delete_instance(self, instance_name: str) -> Dict:
+        """
+        Delete an Evolution API instance
+
+        Args:
+            instance_name: Name of the Evolution API instance
+
+        Returns:
+            Dictionary with deletion result
+        """
+        try:
+            status, body, text = await self._request('DELETE', f"/instance/delete/{instance_name}")
+
+            if status == 200:
+                return {
+                    "success": True,
+                    "message": "Instance deleted successfully"
+                }
+            else:
+                return {
+                    "success": False,
+                    "error": f"Failed to delete instance: {text}"
+                }
+
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Exception deleting instance: {str(e)}"
+            }
+
+    async def list_instances(self) -> Dict:
+        """
+        List all Evolution API instances
+
+        Returns:
+            Dictionary with list of instances
+        """
+        try:
+            status, body, text = await self._request('GET', '/instance/fetchInstances')
+
+            if status == 200:
+                return {
+                    "success": True,
+                    "instances": body
+                }
+            else:
+                return {
+                    "success": False,
+                    "error": f"Failed to list instances: {text}"
+                }
+
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Exception listing instances: {str(e)}"
+            }
+
+    async def check_connection_status_many(self, instance_names: List[str]) -> Dict[str, Dict]:
+        """
+        Check connection status for many instances concurrently
+
+        Args:
+            instance_names: Names of the Evolution API instances
+
+        Returns:
+            Dictionary mapping instance name to its status result
+        """
+        results = await asyncio.gather(
+            *(self.check_connection_status(name) for name in instance_names)
+        )
+        return dict(zip(instance_names, results))
+
+    async def send_messages_many(self, messages: List[Dict]) -> List[Dict]:
+        """
+        Send many messages concurrently
+
+        Args:
+            messages: List of {'instance_name', 'number', 'message'} dictionaries
+
+        Returns:
+            List of send results in the same order
+        """
+        return list(await asyncio.gather(
+            *(self.send_message(m['instance_name'], m['number'], m['message']) for m in messages)
+        ))
+
+class EvolutionAsyncFacade:
+    """Synchronous facade over AsyncEvolutionAPIManager for use from Flask routes"""
+
+    def __init__(self, manager: AsyncEvolutionAPIManager = None, timeout: float = None):
+        self.manager = manager or AsyncEvolutionAPIManager()
+        self.timeout = timeout or float(os.getenv('EVOLUTION_ASYNC_CALL_TIMEOUT', '120'))
+
+        # A dedicated loop thread keeps the connection pool alive across requests
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever,
+            name="evolution-async-loop",
+            daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, coroutine, timeout: Optional[float] = None):
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+        return future.result(timeout or self.timeout)
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self.manager, name)
+        if not asyncio.iscoroutinefunction(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            return self._run(attribute(*args, **kwargs))
+
+        return call
+
+    def close(self):
+        """Close the pooled session and stop the loop thread"""
+        self._run(self.manager.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
@@ -0,0 +1,194 @@
+import os
+import re
+import time
+import threading
+from typing import Dict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from src.services.circuit_breaker import get_breaker, upstream_setting
+
+# Methods that are safe to retry automatically
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+
+# Purely alphabetic path segments are endpoint names; anything else (instance names, IDs) is a parameter
+STATIC_SEGMENT = re.compile(r'^[A-Za-z]+$')
+
+def route_key(method: str, url: str) -> str:
+    """
+    Group requests by endpoint for per-route latency tracking
+
+    Args:
+        method: HTTP method
+        url: Request URL
+
+    Returns:
+        Route key such as 'GET /instance/connectionState/*'
+    """
+    segments = [
+        segment if STATIC_SEGMENT.match(segment) else '*'
+        for segment in urlsplit(url).path.split('/') if segment
+    ]
+    return f"{method.upper()} /{'/'.join(segments)}"
+
+class HTTPTransport:
+    """Pooled keep-alive HTTP session for one upstream service"""
+
+    def __init__(self, name: str, pool_size: int = None, connect_timeout: float = None,
+                 read_timeout: float = None, max_retries: int = None, backoff_factor: float = None):
+        self.name = name
+        self.pool_size = pool_size or int(upstream_setting(name, 'HTTP_POOL_SIZE', '20'))
+        self.connect_timeout = connect_timeout or float(upstream_setting(name, 'HTTP_CONNECT_TIMEOUT', '3.05'))
+        self.read_timeout = read_timeout or float(upstream_setting(name, 'HTTP_READ_TIMEOUT', '30'))
+        max_retries = int(upstream_setting(name, 'HTTP_MAX_RETRIES', '2')) if max_retries is None else max_retries
+        backoff_factor = float(upstream_setting(name, 'HTTP_RETRY_BACKOFF', '0.3')) if backoff_factor is None else backoff_factor
+
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=IDEMPOTENT_METHODS,
+            raise_on_status=False
+        )
+
+        self.adapter = HTTPAdapter(
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size,
+            max_retries=retry
+        )
+        self.session = requests.Session()
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+
+        # Fails fast while the upstream is unhealthy and adapts the read timeout to its p99
+        self.breaker = get_breaker(name)
+
+        self._lock = threading.Lock()
+        self._stats = {
+            'requests': 0,
+            'errors': 0,
+            'total_latency_ms': 0.0
+        }
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request over the pooled session
+
+        Args:
+            method: HTTP method
+            url: Request URL
+            **kwargs: Passed to requests (timeout defaults to (connect, the route's adaptive read))
+
+        Returns:
+            Response object
+
+        Raises:
+            CircuitOpenError: If the upstream's circuit is open
+        """
+        route = route_key(method, url)
+        self.breaker.allow()
+        kwargs.setdefault('timeout', (self.connect_timeout, self.breaker.timeout(self.read_timeout, route)))
+
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except Exception:
+            self.breaker.record(time.perf_counter() - started, False, route)
+            with self._lock:
+                self._stats['errors'] += 1
+            raise
+        finally:
+            with self._lock:
+                self._stats['requests'] += 1
+                self._stats['total_latency_ms'] += (time.perf_counter() - started) * 1000
+
+        # Client errors are the caller's problem, not a sign of an unhealthy upstream
+        self.breaker.record(time.perf_counter() - started, response.status_code < 500, route)
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> requests.Response:
+        return self.request('PUT', url, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> requests.Response:
+        return self.request('DELETE', url, **kwargs)
+
+    def get_stats(self) -> Dict:
+        """
+        Get request and connection reuse statistics
+
+        Returns:
+            Dictionary with request counts, latency and connection reuse
+        """
+        connections_opened = 0
+        pooled_requests = 0
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                connections_opened += pool.num_connections
+                pooled_requests += pool.num_requests
+
+        with self._lock:
+            stats = dict(self._stats)
+
+        reused = max(0, pooled_requests - connections_opened)
+        stats.update({
+            'avg_latency_ms': round(stats['total_latency_ms'] / stats['requests'], 2) if stats['requests'] else 0.0,
+            'total_latency_ms': round(stats['total_latency_ms'], 2),
+            'connections_opened': connections_opened,
+            'connections_reused': reused,
+            'reuse_ratio': round(reused / pooled_requests, 4) if pooled_requests else 0.0,
+            'pool_size': self.pool_size,
+            'timeouts': {
+                'connect': self.connect_timeout,
+                'read': self.read_timeout,
+                'adaptive_read': round(self.breaker.timeout(self.read_timeout), 3)
+            },
+            'circuit': self.breaker.get_stats()
+        })
+
+        return stats
+
+_transports = {}
+_transports_lock = threading.Lock()
+
+def get_transport(name: str) -> HTTPTransport:
+    """
+    Get the shared transport for an upstream, creating it on first use
+
+    Args:
+        name: Upstream name (e.g. 'evolution', 'n8n')
+
+    Returns:
+        Shared HTTPTransport instance
+    """
+    with _transports_lock:
+        transport = _transports.get(name)
+        if transport is None:
+            transport = HTTPTransport(name)
+            _transports[name] = transport
+        return transport
+
+def get_transport_stats() -> Dict:
+    """
+    Get statistics for every upstream transport
+
+    Returns:
+        Dictionary mapping upstream name to its statistics
+    """
+    with _transports_lock:
+        transports = dict(_transports)
+
+    return {name: transport.get_stats() for name, transport in transports.items()}
@@ -0,0 +1,152 @@
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Tuple
+
+class RecentKeys:
+    """Bounded set of recently seen keys that forgets them after a TTL"""
+
+    def __init__(self, ttl_seconds: float = None, max_keys: int = None):
+        # Evolution redeliveries arrive well within this window
+        self.ttl_seconds = ttl_seconds or float(os.getenv('INBOUND_DEDUP_TTL_SECONDS', '600'))
+        self.max_keys = max_keys or int(os.getenv('INBOUND_DEDUP_MAX_KEYS', '100000'))
+
+        # key -> expiry; insertion order is expiry order because the TTL is fixed
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+
+    def seen(self, key: Hashable) -> bool:
+        """
+        Check a key and remember it
+
+        Args:
+            key: Key to check (e.g. instance and message key ID)
+
+        Returns:
+            True if the key was already seen within the TTL
+        """
+        now = time.monotonic()
+        with self._lock:
+            while self._keys:
+                oldest, expires = next(iter(self._keys.items()))
+                if expires > now:
+                    break
+                del self._keys[oldest]
+
+            if key in self._keys:
+                return True
+
+            self._keys[key] = now + self.ttl_seconds
+            while len(self._keys) > self.max_keys:
+                self._keys.popitem(last=False)
+
+            return False
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._keys)
+
+class _Burst:
+    def __init__(self, burst_id: str, started: float):
+        self.burst_id = burst_id
+        self.messages = []
+        self.started = started
+        self.last = started
+
+class BurstBuffer:
+    """Debounces messages per key and hands each burst over once the key goes quiet"""
+
+    def __init__(self, on_flush: Callable[[str, List[Dict]], None], quiet_window: float = None,
+                 max_wait: float = None, max_messages: int = None):
+        # Called with (burst ID, messages in arrival order) from the flush thread
+        self.on_flush = on_flush
+        # A burst is flushed after this long without a new message; 0 disables debouncing
+        self.quiet_window = float(os.getenv('INBOUND_QUIET_WINDOW_MS', '1500')) / 1000 if quiet_window is None else quiet_window
+        # ...or this long after its first message, so a chatty user still gets answers
+        self.max_wait = float(os.getenv('INBOUND_MAX_WAIT_MS', '6000')) / 1000 if max_wait is None else max_wait
+        # ...or as soon as it holds this many messages
+        self.max_messages = max_messages or int(os.getenv('INBOUND_MAX_BURST_MESSAGES', '10'))
+
+        self._bursts = {}
+        self._condition = threading.Condition()
+        self._worker = None
+
+    def add(self, key: Hashable, message: Dict) -> Tuple[str, int]:
+        """
+        Add a message to the burst for its key
+
+        Args:
+            key: Burst key (e.g. instance and chat)
+            message: Message to buffer
+
+        Returns:
+            Tuple of (burst ID, messages in the burst so far)
+        """
+        now = time.monotonic()
+        with self._condition:
+            burst = self._bursts.get(key)
+            if burst is None:
+                burst = _Burst(str(uuid.uuid4()), now)
+                self._bursts[key] = burst
+
+            burst.messages.append(message)
+            burst.last = now
+            size = len(burst.messages)
+
+            flush_now = self.quiet_window <= 0 or size >= self.max_messages
+            if flush_now:
+                del self._bursts[key]
+            else:
+                if self._worker is None:
+                    self._worker = threading.Thread(
+                        target=self._flush_loop,
+                        name="inbound-burst-flush",
+                        daemon=True
+                    )
+                    self._worker.start()
+                self._condition.notify()
+
+        if flush_now:
+            self.on_flush(burst.burst_id, burst.messages)
+
+        return burst.burst_id, size
+
+    def get_stats(self) -> Dict:
+        """
+        Get buffered burst counts
+
+        Returns:
+            Dictionary with open bursts and buffered messages
+        """
+        with self._condition:
+            return {
+                'open_bursts': len(self._bursts),
+                'buffered_messages': sum(len(burst.messages) for burst in self._bursts.values()),
+                'quiet_window_ms': round(self.quiet_window * 1000),
+                'max_wait_ms': round(self.max_wait * 1000)
+            }
+
+    def _deadline(self, burst: _Burst) -> float:
+        return min(burst.last + self.quiet_window, burst.started + self.max_wait)
+
+    def _flush_loop(self):
+        while True:
+            with self._condition:
+                while True:
+                    now = time.monotonic()
+                    due = [key for key, burst in self._bursts.items() if self._deadline(burst) <= now]
+                    if due:
+                        break
+
+                    deadlines = [self._deadline(burst) for burst in self._bursts.values()]
+                    self._condition.wait(min(deadlines) - now if deadlines else None)
+
+                bursts = [self._bursts.pop(key) for key in due]
+
+            for burst in bursts:
+                try:
+                    self.on_flush(burst.burst_id, burst.messages)
+                except Exception as e:
+                    print(f"Error flushing inbound burst {burst.burst_id}: {str(e)}")
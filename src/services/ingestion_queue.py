@@ -0,0 +1,300 @@
+import os
+import json
+import time
+import uuid
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from src.models.user import db
+from src.models.ingestion_job import IngestionJob
+
+class IngestionJobQueue:
+    """Background worker pool for knowledge ingestion with per-client fair scheduling"""
+
+    def __init__(self, vector_manager, num_workers: int = None):
+        self.vector_manager = vector_manager
+        self.num_workers = num_workers or int(os.getenv('INGESTION_WORKERS', '2'))
+        # Seconds between progress writes to the job table
+        self.progress_interval = float(os.getenv('INGESTION_PROGRESS_INTERVAL_SECONDS', '1'))
+        # Running jobs not updated for this long are assumed orphaned and requeued
+        self.stale_after = float(os.getenv('INGESTION_STALE_AFTER_SECONDS', '120'))
+        # Running jobs are touched this often, so only jobs whose process died go stale
+        self.heartbeat_interval = self.stale_after / 4
+
+        self.app = None
+        self._client_queues = {}
+        # Clients with pending jobs and nothing running, in round-robin order
+        self._ready_clients = deque()
+        self._running_clients = set()
+        # Jobs claimed by this process's workers
+        self._running_jobs = set()
+        self._condition = threading.Condition()
+        self._workers = []
+
+    def init_app(self, app):
+        """
+        Bind the queue to the Flask app, requeue unfinished jobs and start workers
+
+        Args:
+            app: Flask application (used for database access from workers)
+        """
+        self.app = app
+
+        with app.app_context():
+            self._requeue_stale()
+
+            pending = IngestionJob.query.filter_by(status='queued').order_by(IngestionJob.created_at).all()
+            for job in pending:
+                self._enqueue(job.client_id, job.id)
+
+        for worker_index in range(self.num_workers):
+            worker = threading.Thread(
+                target=self._worker_loop,
+                name=f"ingestion-worker-{worker_index}",
+                daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+        # Jobs orphaned by a crash are picked up again even if the restart came quickly
+        threading.Thread(target=self._sweep_loop, name="ingestion-sweeper", daemon=True).start()
+
+    def submit(self, client_id: str, content: str, metadata: Dict = None,
+               incremental: bool = False, source_id: str = None) -> Dict:
+        """
+        Queue text content for ingestion
+
+        Args:
+            client_id: Unique identifier for the client
+            content: Text content to process
+            metadata: Additional metadata for the content
+            incremental: Use incremental re-ingestion
+            source_id: Knowledge source identifier for incremental mode
+
+        Returns:
+            Dictionary describing the queued job
+        """
+        job = IngestionJob(
+            id=str(uuid.uuid4()),
+            client_id=client_id,
+            status='queued',
+            content=content,
+            options=json.dumps({
+                'metadata': metadata or {},
+                'incremental': incremental,
+                'source_id': source_id
+            })
+        )
+        db.session.add(job)
+        db.session.commit()
+
+        self._enqueue(client_id, job.id)
+
+        return job.to_dict()
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """
+        Get job status and progress
+
+        Args:
+            job_id: Ingestion job ID
+
+        Returns:
+            Job dictionary or None if it does not exist
+        """
+        job = db.session.get(IngestionJob, job_id)
+        return job.to_dict() if job else None
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a job that has not started yet
+
+        Args:
+            job_id: Ingestion job ID
+
+        Returns:
+            True if the job was cancelled
+        """
+        now = datetime.now()
+        cancelled = IngestionJob.query.filter_by(id=job_id, status='queued').update(
+            {'status': 'cancelled', 'updated_at': now, 'finished_at': now},
+            synchronize_session=False
+        )
+        db.session.commit()
+
+        # Workers skip it: _claim only takes queued jobs
+        return bool(cancelled)
+
+    def get_queue_stats(self) -> Dict:
+        """
+        Get scheduler statistics
+
+        Returns:
+            Dictionary with queued and running counts
+        """
+        with self._condition:
+            return {
+                'workers': len(self._workers),
+                'queued_jobs': sum(len(queue) for queue in self._client_queues.values()),
+                'queued_clients': len(self._client_queues),
+                'running_clients': len(self._running_clients)
+            }
+
+    def _enqueue(self, client_id: str, job_id: str):
+        with self._condition:
+            queue = self._client_queues.setdefault(client_id, deque())
+            queue.append(job_id)
+            if client_id not in self._running_clients and client_id not in self._ready_clients:
+                self._ready_clients.append(client_id)
+            self._condition.notify()
+
+    def _next_job(self):
+        """Block until a client is ready, then take its oldest job"""
+        with self._condition:
+            while not self._ready_clients:
+                self._condition.wait()
+
+            client_id = self._ready_clients.popleft()
+            queue = self._client_queues[client_id]
+            job_id = queue.popleft()
+            if not queue:
+                del self._client_queues[client_id]
+
+            # One running job per client, so a large tenant can't hold every worker
+            self._running_clients.add(client_id)
+            return client_id, job_id
+
+    def _job_done(self, client_id: str):
+        with self._condition:
+            self._running_clients.discard(client_id)
+            if client_id in self._client_queues:
+                self._ready_clients.append(client_id)
+                self._condition.notify()
+
+    def _worker_loop(self):
+        while True:
+            client_id, job_id = self._next_job()
+            try:
+                with self.app.app_context():
+                    self._run_job(job_id)
+            except Exception as e:
+                print(f"Error running ingestion job {job_id}: {str(e)}")
+            finally:
+                self._job_done(client_id)
+
+    def _sweep_loop(self):
+        while True:
+            time.sleep(self.heartbeat_interval)
+            try:
+                with self.app.app_context():
+                    self._heartbeat()
+                    for job in self._requeue_stale():
+                        self._enqueue(job.client_id, job.id)
+            except Exception as e:
+                print(f"Error sweeping ingestion jobs: {str(e)}")
+
+    def _heartbeat(self):
+        """Mark the jobs this process is running as alive"""
+        with self._condition:
+            job_ids = list(self._running_jobs)
+        if not job_ids:
+            return
+
+        IngestionJob.query.filter(
+            IngestionJob.id.in_(job_ids),
+            IngestionJob.status == 'running'
+        ).update({'updated_at': datetime.now()}, synchronize_session=False)
+        db.session.commit()
+
+    def _requeue_stale(self) -> List[IngestionJob]:
+        """
+        Move running jobs that stopped heartbeating back to queued
+
+        Returns:
+            The requeued jobs
+        """
+        stale_before = datetime.now() - timedelta(seconds=self.stale_after)
+        with self._condition:
+            own_jobs = list(self._running_jobs)
+
+        stale = IngestionJob.query.filter(
+            IngestionJob.status == 'running',
+            IngestionJob.updated_at < stale_before,
+            IngestionJob.id.notin_(own_jobs)
+        ).all()
+        if stale:
+            # Re-check staleness in the update so a job that just heartbeated is left alone
+            IngestionJob.query.filter(
+                IngestionJob.id.in_([job.id for job in stale]),
+                IngestionJob.status == 'running',
+                IngestionJob.updated_at < stale_before
+            ).update({'status': 'queued'}, synchronize_session=False)
+        db.session.commit()
+
+        return stale
+
+    def _claim(self, job_id: str) -> Optional[IngestionJob]:
+        """Atomically move a job from queued to running (safe across processes)"""
+        now = datetime.now()
+        claimed = IngestionJob.query.filter_by(id=job_id, status='queued').update(
+            {'status': 'running', 'started_at': now, 'updated_at': now},
+            synchronize_session=False
+        )
+        db.session.commit()
+
+        if not claimed:
+            return None
+        return db.session.get(IngestionJob, job_id)
+
+    def _run_job(self, job_id: str):
+        job = self._claim(job_id)
+        if job is None:
+            return
+
+        with self._condition:
+            self._running_jobs.add(job_id)
+        try:
+            self._process(job)
+        finally:
+            with self._condition:
+                self._running_jobs.discard(job_id)
+
+    def _process(self, job: IngestionJob):
+        options = json.loads(job.options or '{}')
+        last_write = [0.0]
+
+        def on_progress(progress: Dict):
+            now = time.monotonic()
+            if now - last_write[0] < self.progress_interval:
+                return
+            last_write[0] = now
+            job.chunks_embedded = progress['chunks_embedded']
+            job.chunks_upserted = progress['chunks_upserted']
+            job.updated_at = datetime.now()
+            db.session.commit()
+
+        try:
+            result = self.vector_manager.process_text_content(
+                client_id=job.client_id,
+                content=job.content,
+                metadata=options.get('metadata'),
+                incremental=options.get('incremental', False),
+                source_id=options.get('source_id'),
+                progress_callback=on_progress
+            )
+        except Exception as e:
+            result = {
+                "success": False,
+                "error": f"Exception processing text content: {str(e)}"
+            }
+
+        job.status = 'completed' if result.get('success') else 'failed'
+        job.error = result.get('error')
+        job.chunks_embedded = result.get('chunks_processed', job.chunks_embedded)
+        job.chunks_upserted = result.get('upsert', {}).get('vectors_upserted', job.chunks_upserted)
+        job.result = json.dumps(result)
+        job.finished_at = datetime.now()
+        job.updated_at = job.finished_at
+        db.session.commit()
@@ -0,0 +1,117 @@
+import os
+from typing import Dict, List
+
+from src.services.http_client import get_transport
+
+class OpenAIChatClient:
+    """Chat completion client for the OpenAI API over a pooled keep-alive session"""
+
+    def __init__(self, api_key: str = None, base_url: str = None, model: str = None,
+                 temperature: float = None, max_tokens: int = None):
+        self.api_key = api_key or os.getenv('OPENAI_API_KEY')
+        self.base_url = (base_url or os.getenv('OPENAI_API_URL', 'https://api.openai.com/v1')).rstrip('/')
+        # Same defaults as the Generate AI Response node of the n8n workflow
+        self.model = model or os.getenv('LLM_MODEL', 'gpt-4o')
+        self.temperature = float(os.getenv('LLM_TEMPERATURE', '0.7')) if temperature is None else temperature
+        self.max_tokens = max_tokens or int(os.getenv('LLM_MAX_TOKENS', '500'))
+
+        self.headers = {
+            'Authorization': f'Bearer {self.api_key}',
+            'Content-Type': 'application/json'
+        }
+        self.http = get_transport('openai')
+
+    def complete(self, messages: List[Dict]) -> Dict:
+        """
+        Generate a reply for a conversation
+
+        Args:
+            messages: Chat messages ({'role': ..., 'content': ...})
+
+        Returns:
+            Dictionary with the reply content and token usage
+        """
+        try:
+            response = self.http.post(
+                f"{self.base_url}/chat/completions",
+                headers=self.headers,
+                json={
+                    'model': self.model,
+                    'messages': messages,
+                    'temperature': self.temperature,
+                    'max_tokens': self.max_tokens
+                }
+            )
+
+            if response.status_code == 200:
+                data = response.json()
+                return {
+                    "success": True,
+                    "content": data['choices'][0]['message']['content'],
+                    "usage": data.get('usage', {}),
+                    "model": data.get('model', self.model)
+                }
+            else:
+                return {
+                    "success": False,
+                    "error": f"Failed to generate reply: {response.text}"
+                }
+
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Exception generating reply: {str(e)}"
+            }
+
+class StubLLMClient:
+    """Local stand-in for the LLM that answers from the retrieved context without any API call"""
+
+    def __init__(self, reply: str = None):
+        # Fixed reply; by default the first line of the context is echoed back
+        self.reply = reply or os.getenv('LLM_STUB_REPLY')
+        self.model = 'stub'
+
+    def complete(self, messages: List[Dict]) -> Dict:
+        """
+        Generate a deterministic reply
+
+        Args:
+            messages: Chat messages ({'role': ..., 'content': ...})
+
+        Returns:
+            Dictionary with the reply content and token usage
+        """
+        prompt = messages[-1]['content'] if messages else ''
+        content = self.reply
+        if content is None:
+            context = prompt.split('Contexto:', 1)[-1].split('Pergunta do cliente:', 1)[0].strip()
+            content = context.splitlines()[0] if context else 'Olá! Como posso ajudar?'
+
+        return {
+            "success": True,
+            "content": content,
+            "usage": {
+                'prompt_tokens': sum(len(message['content'].split()) for message in messages),
+                'completion_tokens': len(content.split())
+            },
+            "model": self.model
+        }
+
+def create_llm_client(provider: str = None):
+    """
+    Create the LLM client selected by LLM_PROVIDER
+
+    Args:
+        provider: 'openai' (default) or 'stub'
+
+    Returns:
+        Object with complete(messages) -> Dict
+    """
+    provider = (provider or os.getenv('LLM_PROVIDER', 'openai')).lower()
+
+    if provider == 'stub':
+        return StubLLMClient()
+    if provider == 'openai':
+        return OpenAIChatClient()
+
+    raise ValueError(f"Unknown LLM provider: {provider}")
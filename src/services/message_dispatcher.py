@@ -0,0 +1,517 @@
+import os
+import re
+import time
+import uuid
+import threading
+from collections import deque, OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Sentence ends and line breaks; the captured whitespace tells which one it was
+SENTENCE_BOUNDARY = re.compile(r'((?<=[.!?…])[ \t]+|[ \t]*\n\s*)')
+PARAGRAPH_BOUNDARY = re.compile(r'\n\s*\n')
+
+def segment_text(text: str, max_chars: int) -> List[str]:
+    """
+    Split a long message into segments at paragraph and sentence boundaries
+
+    Args:
+        text: Message content
+        max_chars: Maximum characters per segment
+
+    Returns:
+        List of segments, each at most max_chars long
+    """
+    text = text.strip()
+    if len(text) <= max_chars:
+        return [text]
+
+    segments = []
+    current = ''
+
+    for paragraph in PARAGRAPH_BOUNDARY.split(text):
+        separator = '\n\n'
+        pieces = SENTENCE_BOUNDARY.split(paragraph.strip())
+        for index in range(0, len(pieces), 2):
+            if index:
+                # Line breaks inside a paragraph (lists, addresses) are kept
+                separator = '\n' if '\n' in pieces[index - 1] else ' '
+            sentence = pieces[index].strip()
+            if not sentence:
+                continue
+
+            # A sentence that can't fit anywhere is cut at the last space that fits
+            while len(sentence) > max_chars:
+                cut = sentence.rfind(' ', 0, max_chars + 1)
+                if cut <= 0:
+                    cut = max_chars
+                if current:
+                    segments.append(current)
+                    current = ''
+                segments.append(sentence[:cut].rstrip())
+                sentence = sentence[cut:].lstrip()
+
+            if not current:
+                current = sentence
+            elif len(current) + len(separator) + len(sentence) <= max_chars:
+                current = f"{current}{separator}{sentence}"
+            else:
+                segments.append(current)
+                current = sentence
+
+    if current:
+        segments.append(current)
+
+    return segments
+
+class OutboundQueueFull(ValueError):
+    """Raised when an instance's outbound queue cannot take more messages"""
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, up to `burst` stored"""
+
+    def __init__(self, rate: float, burst: int):
+        self._validate(rate, burst)
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _validate(rate: float, burst: int):
+        if not rate > 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        if burst < 1:
+            raise ValueError(f"burst must be at least 1, got {burst}")
+
+    def configure(self, rate: float, burst: int):
+        self._validate(rate, burst)
+        with self._lock:
+            self.rate = rate
+            self.burst = burst
+            self._tokens = min(self._tokens, self.burst)
+
+    def try_acquire(self) -> float:
+        """
+        Take a token if one is available
+
+        Returns:
+            0 if a token was taken, otherwise seconds until one is available
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        """Block until a token is available and take it"""
+        while True:
+            delay = self.try_acquire()
+            if delay == 0:
+                return
+            time.sleep(delay)
+
+@dataclass
+class OutboundMessage:
+    """Data class for a queued outbound message"""
+    message_id: str
+    instance_name: str
+    number: str
+    text: str
+    broadcast_id: Optional[str] = None
+    status: str = 'queued'
+    result: Optional[Dict] = None
+    created_at: str = None
+    queued_at: float = field(default_factory=time.monotonic, repr=False)
+    # Times a worker died holding this message before it was sent
+    worker_crashes: int = field(default=0, repr=False)
+    done: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def __post_init__(self):
+        if self.created_at is None:
+            self.created_at = datetime.now().isoformat()
+
+class _InstanceQueue:
+    """Pending messages and pacing state for one WhatsApp instance"""
+
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self.messages = deque()
+        # Messages taken off the queue by the worker and not yet recorded
+        self.in_flight = []
+        self.worker = None
+        self.sent = 0
+        self.failed = 0
+        self.api_calls = 0
+        self.coalesced = 0
+        self.segmented = 0
+
+class OutboundDispatcher:
+    """Per-instance rate-limited outbound message queue in front of Evolution's sendText"""
+
+    def __init__(self, sender, rate: float = None, burst: int = None):
+        # Anything with send_message(instance_name, number, message) -> Dict
+        self.sender = sender
+        self.default_rate = rate or float(os.getenv('OUTBOUND_RATE_PER_SECOND', '1'))
+        self.default_burst = burst or int(os.getenv('OUTBOUND_BURST', '5'))
+        self.max_queue = int(os.getenv('OUTBOUND_MAX_QUEUE_PER_INSTANCE', '50000'))
+        self.idle_timeout = float(os.getenv('OUTBOUND_WORKER_IDLE_SECONDS', '60'))
+        self.broadcast_history = int(os.getenv('BROADCAST_HISTORY', '100'))
+        # Replies longer than this go out as several sentence-aligned segments
+        self.segment_max_chars = int(os.getenv('OUTBOUND_SEGMENT_MAX_CHARS', '1000'))
+        # Messages up to this long to the same number are merged if queued within the window
+        self.coalesce_max_chars = int(os.getenv('OUTBOUND_COALESCE_MAX_CHARS', '300'))
+        self.coalesce_window = float(os.getenv('OUTBOUND_COALESCE_WINDOW_MS', '250')) / 1000
+
+        self._queues = {}
+        self._broadcasts = OrderedDict()
+        self._condition = threading.Condition()
+
+    def set_rate(self, instance_name: str, rate: float, burst: int = None):
+        """
+        Override the send rate for one instance
+
+        Args:
+            instance_name: Name of the Evolution API instance
+            rate: Messages per second (must be positive)
+            burst: Messages that may be sent back to back (at least 1)
+
+        Raises:
+            ValueError: If rate or burst is out of range
+        """
+        with self._condition:
+            queue = self._get_queue(instance_name)
+            queue.bucket.configure(rate, queue.bucket.burst if burst is None else burst)
+
+    def _get_queue(self, instance_name: str) -> _InstanceQueue:
+        queue = self._queues.get(instance_name)
+        if queue is None:
+            queue = _InstanceQueue(TokenBucket(self.default_rate, self.default_burst))
+            self._queues[instance_name] = queue
+        return queue
+
+    def enqueue(self, instance_name: str, number: str, text: str, broadcast_id: str = None) -> OutboundMessage:
+        """
+        Queue a message for paced delivery
+
+        Args:
+            instance_name: Name of the Evolution API instance
+            number: Phone number to send message to
+            text: Message content
+            broadcast_id: Broadcast the message belongs to, if any
+
+        Returns:
+            The queued message
+        """
+        return self._enqueue_many(instance_name, [(number, text)], broadcast_id)[0]
+
+    def _enqueue_many(self, instance_name: str, items: List, broadcast_id: str = None) -> List[OutboundMessage]:
+        messages = [
+            OutboundMessage(
+                message_id=str(uuid.uuid4()),
+                instance_name=instance_name,
+                number=number,
+                text=text,
+                broadcast_id=broadcast_id
+            )
+            for number, text in items
+        ]
+
+        with self._condition:
+            queue = self._get_queue(instance_name)
+            if len(queue.messages) + len(messages) > self.max_queue:
+                raise OutboundQueueFull(f"Outbound queue for {instance_name} is full")
+
+            queue.messages.extend(messages)
+
+            if queue.worker is None:
+                self._start_worker(instance_name, queue)
+
+            self._condition.notify_all()
+
+        return messages
+
+    def _start_worker(self, instance_name: str, queue: _InstanceQueue):
+        """Start the delivery thread for an instance (caller holds the condition)"""
+        queue.worker = threading.Thread(
+            target=self._worker_loop,
+            args=(instance_name, queue),
+            name=f"outbound-{instance_name}",
+            daemon=True
+        )
+        queue.worker.start()
+
+    def send(self, instance_name: str, number: str, text: str, timeout: float = None) -> Dict:
+        """
+        Queue a message and wait for it to be delivered
+
+        Args:
+            instance_name: Name of the Evolution API instance
+            number: Phone number to send message to
+            text: Message content
+            timeout: Seconds to wait for delivery
+
+        Returns:
+            Dictionary with send result
+        """
+        message = self.enqueue(instance_name, number, text)
+
+        if not message.done.wait(timeout or float(os.getenv('OUTBOUND_SEND_TIMEOUT', '30'))):
+            return {
+                "success": False,
+                "error": "Timed out waiting for message delivery",
+                "message_id": message.message_id,
+                "status": message.status
+            }
+
+        return message.result
+
+    def broadcast(self, instance_name: str, items: List) -> Dict:
+        """
+        Queue many (number, text) pairs for paced delivery
+
+        Args:
+            instance_name: Name of the Evolution API instance
+            items: List of (number, text) pairs
+
+        Returns:
+            Dictionary describing the broadcast
+        """
+        broadcast_id = str(uuid.uuid4())
+
+        with self._condition:
+            self._broadcasts[broadcast_id] = {
+                'broadcast_id': broadcast_id,
+                'instance_id': instance_name,
+                'total': len(items),
+                'sent': 0,
+                'failed': 0,
+                'errors': [],
+                'created_at': datetime.now().isoformat(),
+                'finished_at': None
+            }
+            while len(self._broadcasts) > self.broadcast_history:
+                self._broadcasts.popitem(last=False)
+
+        self._enqueue_many(instance_name, items, broadcast_id)
+
+        return self.get_broadcast(broadcast_id)
+
+    def get_broadcast(self, broadcast_id: str) -> Optional[Dict]:
+        """
+        Get delivery progress for a broadcast
+
+        Args:
+            broadcast_id: Broadcast ID
+
+        Returns:
+            Progress dictionary or None if unknown
+        """
+        with self._condition:
+            broadcast = self._broadcasts.get(broadcast_id)
+            if broadcast is None:
+                return None
+
+            progress = dict(broadcast)
+            progress['errors'] = list(broadcast['errors'])
+
+        done = progress['sent'] + progress['failed']
+        progress['queued'] = progress['total'] - done
+        progress['progress'] = round(done / progress['total'], 4) if progress['total'] else 1.0
+        progress['status'] = 'completed' if progress['queued'] == 0 else 'sending'
+
+        return progress
+
+    def get_stats(self) -> Dict:
+        """
+        Get per-instance queue statistics
+
+        Returns:
+            Dictionary mapping instance name to queue depth, rate and counters
+        """
+        with self._condition:
+            return {
+                instance_name: {
+                    'queued': len(queue.messages),
+                    'sent': queue.sent,
+                    'failed': queue.failed,
+                    'api_calls': queue.api_calls,
+                    'coalesced': queue.coalesced,
+                    'segmented': queue.segmented,
+                    'rate_per_second': queue.bucket.rate,
+                    'burst': queue.bucket.burst,
+                    'worker_active': queue.worker is not None
+                }
+                for instance_name, queue in self._queues.items()
+            }
+
+    def _coalescible(self, message: OutboundMessage) -> bool:
+        return message.broadcast_id is None and len(message.text) <= self.coalesce_max_chars
+
+    def _next_batch(self, instance_name: str, queue: _InstanceQueue) -> Optional[List[OutboundMessage]]:
+        """
+        Wait for the next message and merge short follow-ups to the same number
+
+        Returns:
+            Messages to send in one call, or None once the worker has been idle long enough
+        """
+        with self._condition:
+            deadline = time.monotonic() + self.idle_timeout
+            while not queue.messages:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    queue.worker = None
+                    return None
+                self._condition.wait(remaining)
+
+            message = queue.messages.popleft()
+            queue.in_flight = [message]
+            if not self._coalescible(message) or self.coalesce_window <= 0:
+                return [message]
+
+            # Give follow-ups to the same number a moment to arrive
+            hold_until = message.queued_at + self.coalesce_window
+            while time.monotonic() < hold_until:
+                self._condition.wait(hold_until - time.monotonic())
+
+            batch = [message]
+            length = len(message.text)
+            remaining = deque()
+            blocked = False
+
+            for other in queue.messages:
+                if other.number == message.number and not blocked:
+                    if (self._coalescible(other) and other.queued_at <= hold_until
+                            and length + 2 + len(other.text) <= self.segment_max_chars):
+                        batch.append(other)
+                        length += 2 + len(other.text)
+                        continue
+                    # Keep per-recipient order: nothing merges past a message that can't
+                    blocked = True
+                remaining.append(other)
+
+            queue.messages = remaining
+            queue.in_flight = batch
+            queue.coalesced += len(batch) - 1
+            return batch
+
+    def _worker_loop(self, instance_name: str, queue: _InstanceQueue):
+        try:
+            while True:
+                batch = self._next_batch(instance_name, queue)
+                if batch is None:
+                    return
+                self._deliver(queue, batch)
+        except Exception as e:
+            print(f"Error in outbound worker for {instance_name}: {str(e)}")
+            self._recover(instance_name, queue, e)
+
+    def _recover(self, instance_name: str, queue: _InstanceQueue, error: Exception):
+        """Requeue or fail the crashed worker's messages and start a replacement"""
+        failed = []
+        with self._condition:
+            retry = []
+            for message in queue.in_flight:
+                if message.done.is_set():
+                    continue
+                message.worker_crashes += 1
+                # Never resend a message that may already have gone out, or one that keeps crashing workers
+                if message.status == 'sending' or message.worker_crashes > 1:
+                    failed.append(message)
+                else:
+                    retry.append(message)
+
+            queue.in_flight = []
+            queue.messages.extendleft(reversed(retry))
+            queue.worker = None
+            if queue.messages:
+                self._start_worker(instance_name, queue)
+
+        for message in failed:
+            self._record(queue, message, {
+                "success": False,
+                "error": f"Exception in outbound worker: {str(error)}"
+            })
+
+    def _deliver(self, queue: _InstanceQueue, batch: List[OutboundMessage]):
+        """Send one batch, split into segments, and record the outcome on every message"""
+        for message in batch:
+            message.status = 'sending'
+
+        text = '\n\n'.join(message.text for message in batch)
+        segments = segment_text(text, self.segment_max_chars)
+        if len(segments) > 1:
+            queue.segmented += 1
+
+        # Segments go out back to back from this worker over the pooled connection
+        results = []
+        for segment in segments:
+            queue.bucket.acquire()
+            results.append(self._send(batch[0], segment))
+            queue.api_calls += 1
+            if not results[-1].get('success'):
+                # Later segments would arrive without their context
+                break
+
+        if len(results) == 1 and len(segments) == 1:
+            result = results[0]
+        else:
+            failed = next((r for r in results if not r.get('success')), None)
+            result = {
+                "success": failed is None,
+                "segments": len(segments),
+                "segments_sent": sum(1 for r in results if r.get('success')),
+                "results": results
+            }
+            if failed is not None:
+                result["error"] = failed.get('error')
+
+        if len(batch) > 1:
+            result = {**result, "coalesced": len(batch)}
+
+        for message in batch:
+            self._record(queue, message, result)
+
+    def _send(self, message: OutboundMessage, text: str) -> Dict:
+        try:
+            return self.sender.send_message(
+                instance_name=message.instance_name,
+                number=message.number,
+                message=text
+            )
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Exception sending message: {str(e)}"
+            }
+
+    def _record(self, queue: _InstanceQueue, message: OutboundMessage, result: Dict):
+        succeeded = bool(result.get('success'))
+        message.result = {**result, 'message_id': message.message_id}
+        message.status = 'sent' if succeeded else 'failed'
+
+        with self._condition:
+            if succeeded:
+                queue.sent += 1
+            else:
+                queue.failed += 1
+
+            broadcast = self._broadcasts.get(message.broadcast_id) if message.broadcast_id else None
+            if broadcast is not None:
+                if succeeded:
+                    broadcast['sent'] += 1
+                else:
+                    broadcast['failed'] += 1
+                    if len(broadcast['errors']) < 100:
+                        broadcast['errors'].append({'number': message.number, 'error': result.get('error')})
+                if broadcast['sent'] + broadcast['failed'] == broadcast['total']:
+                    broadcast['finished_at'] = datetime.now().isoformat()
+
+        message.done.set()
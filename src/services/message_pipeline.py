@@ -0,0 +1,318 @@
+import os
+import time
+import threading
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from flask import has_app_context
+
+from src.services.connection_state import normalize_event_name
+from src.services.inbound_buffer import RecentKeys, BurstBuffer
+
+# Same prompt as the Generate AI Response node of the n8n workflow
+SYSTEM_PROMPT = (
+    "Você é um assistente virtual inteligente para atendimento ao cliente via WhatsApp. "
+    "Use o contexto fornecido para responder às perguntas de forma útil, profissional e amigável. "
+    "Se não souber a resposta, seja honesto e ofereça ajuda alternativa. Sempre responda em português."
+)
+
+STAGES = ('resolve', 'knowledge', 'generate', 'send')
+
+def extract_inbound_message(payload: Dict, event_name: str = None) -> Optional[Dict]:
+    """
+    Filter and extract an inbound text message (the Message Filter and Extract Message nodes)
+
+    Args:
+        payload: Evolution webhook JSON body
+        event_name: Event name from the URL (webhook_by_events mode)
+
+    Returns:
+        Message dictionary, or None if the event is not a text message from a contact
+    """
+    if normalize_event_name(payload.get('event') or event_name) != 'messages.upsert':
+        return None
+
+    data = payload.get('data') or {}
+    key = data.get('key') or {}
+    message = data.get('message') or {}
+    text = message.get('conversation') or (message.get('extendedTextMessage') or {}).get('text') or ''
+
+    # Skip if no message text or if it's from us
+    if not text or key.get('fromMe'):
+        return None
+
+    return {
+        'instance_id': payload.get('instance'),
+        'remote_jid': key.get('remoteJid'),
+        'message_id': key.get('id'),
+        'text': text
+    }
+
+def merge_messages(messages: List[Dict]) -> Dict:
+    """
+    Merge a burst of messages from one chat into a single prompt
+
+    Args:
+        messages: Extracted messages in arrival order
+
+    Returns:
+        Message dictionary with the texts joined line by line
+    """
+    return {
+        **messages[-1],
+        'text': '\n'.join(message['text'] for message in messages),
+        'message_ids': [message['message_id'] for message in messages]
+    }
+
+class _StageFailed(Exception):
+    """Raised inside a run when a stage returns an unsuccessful result"""
+
+class MessagePipeline:
+    """In-process inbound message handling: filter, extract, knowledge query, LLM reply and send"""
+
+    def __init__(self, vector_manager, llm_client, dispatcher, resolve_tenant: Callable[[str], Optional[Dict]],
+                 memory=None, max_workers: int = None):
+        self.vector_manager = vector_manager
+        # Anything with complete(messages) -> Dict; see llm_client
+        self.llm_client = llm_client
+        # Anything with send(instance_name, number, text) -> Dict
+        self.dispatcher = dispatcher
+        # instance_id -> tenant dictionary (client_id, namespace, ...) or None
+        self.resolve_tenant = resolve_tenant
+        # ConversationMemory supplying recent turns of the chat; None sends only the current message
+        self.memory = memory
+        self.max_workers = max_workers or int(os.getenv('MESSAGE_PIPELINE_MAX_WORKERS', '8'))
+        self.top_k = int(os.getenv('MESSAGE_PIPELINE_TOP_K', '3'))
+        # Recent runs kept for inspection
+        self.history = int(os.getenv('MESSAGE_PIPELINE_HISTORY', '200'))
+        # Stage durations kept per stage for percentiles
+        self.samples = int(os.getenv('MESSAGE_PIPELINE_TIMING_SAMPLES', '1000'))
+
+        # Evolution redelivers messages.upsert; each message key ID is answered once
+        self.recent_keys = RecentKeys()
+        # Several short messages in a row from one chat become one prompt
+        self.bursts = BurstBuffer(self._flush_burst)
+
+        self.app = None
+        self._executor = None
+        self._lock = threading.Lock()
+        self._runs = OrderedDict()
+        self._durations = {stage: deque(maxlen=self.samples) for stage in STAGES + ('total',)}
+        self._stats = {
+            'received': 0,
+            'ignored': 0,
+            'duplicates': 0,
+            'merged': 0,
+            'replied': 0,
+            'failed': 0
+        }
+
+    def init_app(self, app):
+        """
+        Bind the pipeline to the Flask app
+
+        Args:
+            app: Flask application (used for tenant lookups from workers)
+        """
+        self.app = app
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="message-pipeline"
+                )
+            return self._executor
+
+    def submit(self, payload: Dict, event_name: str = None) -> Optional[Dict]:
+        """
+        Queue a webhook event for asynchronous handling
+
+        Args:
+            payload: Evolution webhook JSON body
+            event_name: Event name from the URL (webhook_by_events mode)
+
+        Returns:
+            The run the message was added to (status 'duplicate' for redeliveries),
+            or None if the event is not an inbound text message
+        """
+        message = extract_inbound_message(payload, event_name)
+        if message is None:
+            self._count('ignored')
+            return None
+
+        if message['message_id'] and self.recent_keys.seen((message['instance_id'], message['message_id'])):
+            self._count('duplicates')
+            return {'run_id': None, 'status': 'duplicate', 'message_id': message['message_id']}
+
+        self._count('received')
+        run_id, size = self.bursts.add((message['instance_id'], message['remote_jid']), message)
+
+        run = self._get_or_start_run(run_id, message, status='buffering')
+        with self._lock:
+            if run['status'] == 'buffering':
+                run['messages'] = size
+
+        return self._snapshot(run)
+
+    def get_run(self, run_id: str) -> Optional[Dict]:
+        """
+        Get a recent run
+
+        Args:
+            run_id: Run ID returned by submit()
+
+        Returns:
+            Run dictionary or None if unknown or evicted
+        """
+        with self._lock:
+            run = self._runs.get(run_id)
+        return self._snapshot(run) if run is not None else None
+
+    def get_stats(self) -> Dict:
+        """
+        Get counters and per-stage latency percentiles
+
+        Returns:
+            Dictionary with counters and p50/p95/p99 per stage in milliseconds
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            durations = {stage: sorted(samples) for stage, samples in self._durations.items()}
+
+        stats['bursts'] = self.bursts.get_stats()
+        stats['stages_ms'] = {
+            stage: {
+                'count': len(samples),
+                **{
+                    name: round(samples[min(len(samples) - 1, int(len(samples) * fraction))], 2)
+                    for name, fraction in (('p50', 0.50), ('p95', 0.95), ('p99', 0.99))
+                }
+            } if samples else {'count': 0}
+            for stage, samples in durations.items()
+        }
+
+        return stats
+
+    def _get_or_start_run(self, run_id: str, message: Dict, status: str = 'queued') -> Dict:
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is not None:
+                return run
+
+            run = {
+                'run_id': run_id,
+                'instance_id': message['instance_id'],
+                'remote_jid': message['remote_jid'],
+                'message_ids': message.get('message_ids') or [message.get('message_id')],
+                'messages': 1,
+                'history_turns': 0,
+                'status': status,
+                'error': None,
+                'stages': {},
+                'total_ms': None,
+                'received_at': datetime.now().isoformat()
+            }
+
+            self._runs[run_id] = run
+            while len(self._runs) > self.history:
+                self._runs.popitem(last=False)
+
+        return run
+
+    def _flush_burst(self, run_id: str, messages: List[Dict]):
+        """Answer a burst of messages from one chat with a single run"""
+        message = merge_messages(messages)
+        run = self._get_or_start_run(run_id, message)
+
+        with self._lock:
+            run.update({
+                'message_ids': message['message_ids'],
+                'messages': len(messages),
+                'status': 'queued'
+            })
+            self._stats['merged'] += len(messages) - 1
+
+        self._get_executor().submit(self._execute, run, message)
+
+    def _execute(self, run: Dict, message: Dict):
+        started = time.perf_counter()
+        run['status'] = 'running'
+
+        context = nullcontext() if has_app_context() or self.app is None else self.app.app_context()
+        try:
+            with context:
+                tenant = self._stage(run, 'resolve', lambda: self._resolve(message))
+                knowledge = self._stage(run, 'knowledge', lambda: self.vector_manager.query_knowledge_base(
+                    client_id=tenant['client_id'],
+                    query=message['text'],
+                    top_k=self.top_k
+                ))
+                history = self.memory.get_history(message['instance_id'], message['remote_jid']) if self.memory else []
+                run['history_turns'] = len(history)
+                reply = self._stage(run, 'generate', lambda: self.llm_client.complete(
+                    self._build_messages(message, knowledge.get('context', ''), history)
+                ))
+                self._stage(run, 'send', lambda: self.dispatcher.send(
+                    message['instance_id'],
+                    message['remote_jid'],
+                    reply['content']
+                ))
+            run['status'] = 'replied'
+
+            if self.memory:
+                self.memory.append(message['instance_id'], message['remote_jid'], 'user', message['text'])
+                self.memory.append(message['instance_id'], message['remote_jid'], 'assistant', reply['content'])
+        except _StageFailed as e:
+            run['status'] = 'failed'
+            run['error'] = str(e)
+        except Exception as e:
+            run['status'] = 'failed'
+            run['error'] = f"Exception handling message: {str(e)}"
+
+        run['total_ms'] = round((time.perf_counter() - started) * 1000, 2)
+
+        with self._lock:
+            self._stats['replied' if run['status'] == 'replied' else 'failed'] += 1
+            self._durations['total'].append(run['total_ms'])
+
+    def _resolve(self, message: Dict) -> Dict:
+        tenant = self.resolve_tenant(message['instance_id'])
+        if tenant is None or tenant['status'] == 'failed':
+            return {'success': False, 'error': f"No tenant for instance {message['instance_id']}"}
+        return {'success': True, **tenant}
+
+    def _build_messages(self, message: Dict, context: str, history: List[Dict] = None) -> List[Dict]:
+        return [
+            {'role': 'system', 'content': SYSTEM_PROMPT},
+            *({'role': turn['role'], 'content': turn['content']} for turn in history or []),
+            {'role': 'user', 'content': f"Contexto: {context}\n\nPergunta do cliente: {message['text']}"}
+        ]
+
+    def _stage(self, run: Dict, stage: str, fn: Callable[[], Dict]) -> Dict:
+        """Run one stage, record its duration and stop the run if it failed"""
+        started = time.perf_counter()
+        try:
+            result = fn()
+        finally:
+            duration_ms = round((time.perf_counter() - started) * 1000, 2)
+            with self._lock:
+                run['stages'][stage] = duration_ms
+                self._durations[stage].append(duration_ms)
+
+        if not result.get('success', False):
+            raise _StageFailed(f"{stage}: {result.get('error')}")
+
+        return result
+
+    def _snapshot(self, run: Dict) -> Dict:
+        with self._lock:
+            return {**run, 'stages': dict(run['stages'])}
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
@@ -1,10 +1,13 @@
-import requests
 import json
+import re
 import uuid
+import zlib
+import threading
 from typing import Dict, Optional, List
 from dataclasses import dataclass
 import os
 from datetime import datetime
+from src.services.http_client import get_transport
 
 @dataclass
 class N8nWorkflow:
@@ -21,232 +24,393 @@ class N8nWorkflow:
         if self.created_at is None:
             self.created_at = datetime.now().isoformat()
 
-class N8nFlowManager:
-    """Manager for n8n workflow operations"""
-    
-    def __init__(self, base_url: str = None, api_key: str = None):
-        self.base_url = base_url or os.getenv('N8N_API_URL', 'http://localhost:5678')
-        self.api_key = api_key or os.getenv('N8N_API_KEY', '')
-        self.headers = {
-            'Content-Type': 'application/json',
-            'X-N8N-API-KEY': self.api_key
-        }
-    
-    def get_workflow_template(self) -> Dict:
-        """
-        Get the base WhatsApp GPT workflow template
-        
-        Returns:
-            Dictionary with workflow template
-        """
-        template = {
-            "name": "WhatsApp GPT Agent Template",
-            "nodes": [
-                {
-                    "parameters": {
-                        "path": "whatsapp-webhook",
-                        "options": {}
-                    },
-                    "id": "webhook-trigger",
-                    "name": "Webhook Trigger",
-                    "type": "n8n-nodes-base.webhook",
-                    "typeVersion": 1,
-                    "position": [240, 300],
-                    "webhookId": str(uuid.uuid4())
-                },
-                {
-                    "parameters": {
-                        "conditions": {
-                            "string": [
-                                {
-                                    "value1": "={{$json.event}}",
-                                    "operation": "equal",
-                                    "value2": "messages.upsert"
-                                }
-                            ]
+# Base WhatsApp GPT workflow; the trigger's webhookId is filled in per workflow
+WORKFLOW_TEMPLATE = {
+    "name": "WhatsApp GPT Agent Template",
+    "nodes": [
+        {
+            "parameters": {
+                "path": "whatsapp-webhook",
+                "options": {}
+            },
+            "id": "webhook-trigger",
+            "name": "Webhook Trigger",
+            "type": "n8n-nodes-base.webhook",
+            "typeVersion": 1,
+            "position": [240, 300],
+            "webhookId": None
+        },
+        {
+            "parameters": {
+                "conditions": {
+                    "string": [
+                        {
+                            "value1": "={{$json.event}}",
+                            "operation": "equal",
+                            "value2": "messages.upsert"
                         }
-                    },
-                    "id": "message-filter",
-                    "name": "Message Filter",
-                    "type": "n8n-nodes-base.if",
-                    "typeVersion": 1,
-                    "position": [460, 300]
-                },
-                {
-                    "parameters": {
-                        "jsCode": "// Extract message data\nconst messageData = $input.first().json;\nconst message = messageData.data?.message;\nconst remoteJid = messageData.data?.key?.remoteJid;\nconst messageText = message?.conversation || message?.extendedTextMessage?.text || '';\n\n// Skip if no message text or if it's from us\nif (!messageText || messageData.data?.key?.fromMe) {\n  return [];\n}\n\nreturn [{\n  messageText,\n  remoteJid,\n  instanceId: messageData.instance,\n  timestamp: new Date().toISOString()\n}];"
-                    },
-                    "id": "extract-message",
-                    "name": "Extract Message",
-                    "type": "n8n-nodes-base.code",
-                    "typeVersion": 2,
-                    "position": [680, 300]
-                },
-                {
-                    "parameters": {
-                        "url": "={{$env.VECTOR_STORE_URL}}/query",
-                        "sendHeaders": true,
-                        "headerParameters": {
-                            "parameters": [
-                                {
-                                    "name": "Authorization",
-                                    "value": "Bearer {{$env.VECTOR_STORE_API_KEY}}"
-                                }
-                            ]
-                        },
-                        "sendBody": true,
-                        "bodyParameters": {
-                            "parameters": [
-                                {
-                                    "name": "query",
-                                    "value": "={{$json.messageText}}"
-                                },
-                                {
-                                    "name": "namespace",
-                                    "value": "={{$json.instanceId}}"
-                                },
-                                {
-                                    "name": "top_k",
-                                    "value": "3"
-                                }
-                            ]
+                    ]
+                }
+            },
+            "id": "message-filter",
+            "name": "Message Filter",
+            "type": "n8n-nodes-base.if",
+            "typeVersion": 1,
+            "position": [460, 300]
+        },
+        {
+            "parameters": {
+                "jsCode": "// Extract message data\nconst messageData = $input.first().json;\nconst message = messageData.data?.message;\nconst remoteJid = messageData.data?.key?.remoteJid;\nconst messageText = message?.conversation || message?.extendedTextMessage?.text || '';\n\n// Skip if no message text or if it's from us\nif (!messageText || messageData.data?.key?.fromMe) {\n  return [];\n}\n\nreturn [{\n  messageText,\n  remoteJid,\n  instanceId: messageData.instance,\n  timestamp: new Date().toISOString()\n}];"
+            },
+            "id": "extract-message",
+            "name": "Extract Message",
+            "type": "n8n-nodes-base.code",
+            "typeVersion": 2,
+            "position": [680, 300]
+        },
+        {
+            "parameters": {
+                "url": "={{$env.VECTOR_STORE_URL}}/query",
+                "sendHeaders": True,
+                "headerParameters": {
+                    "parameters": [
+                        {
+                            "name": "Authorization",
+                            "value": "Bearer {{$env.VECTOR_STORE_API_KEY}}"
                         }
-                    },
-                    "id": "query-knowledge-base",
-                    "name": "Query Knowledge Base",
-                    "type": "n8n-nodes-base.httpRequest",
-                    "typeVersion": 4,
-                    "position": [900, 300]
+                    ]
                 },
-                {
-                    "parameters": {
-                        "model": "gpt-4o",
-                        "messages": {
-                            "messageValues": [
-                                {
-                                    "role": "system",
-                                    "content": "Você é um assistente virtual inteligente para atendimento ao cliente via WhatsApp. Use o contexto fornecido para responder às perguntas de forma útil, profissional e amigável. Se não souber a resposta, seja honesto e ofereça ajuda alternativa. Sempre responda em português."
-                                },
-                                {
-                                    "role": "user",
-                                    "content": "Contexto: {{$json.context}}\n\nPergunta do cliente: {{$('Extract Message').item.json.messageText}}"
-                                }
-                            ]
+                "sendBody": True,
+                "bodyParameters": {
+                    "parameters": [
+                        {
+                            "name": "query",
+                            "value": "={{$json.messageText}}"
                         },
-                        "options": {
-                            "temperature": 0.7,
-                            "maxTokens": 500
-                        }
-                    },
-                    "id": "generate-ai-response",
-                    "name": "Generate AI Response",
-                    "type": "@n8n/n8n-nodes-langchain.openAi",
-                    "typeVersion": 1,
-                    "position": [1120, 300]
-                },
-                {
-                    "parameters": {
-                        "url": "={{$env.EVOLUTION_API_URL}}/message/sendText/{{$('Extract Message').item.json.instanceId}}",
-                        "sendHeaders": true,
-                        "headerParameters": {
-                            "parameters": [
-                                {
-                                    "name": "apikey",
-                                    "value": "={{$env.EVOLUTION_API_KEY}}"
-                                }
-                            ]
+                        {
+                            "name": "namespace",
+                            "value": "={{$json.instanceId}}"
                         },
-                        "sendBody": true,
-                        "bodyParameters": {
-                            "parameters": [
-                                {
-                                    "name": "number",
-                                    "value": "={{$('Extract Message').item.json.remoteJid}}"
-                                },
-                                {
-                                    "name": "text",
-                                    "value": "={{$json.choices[0].message.content}}"
-                                }
-                            ]
+                        {
+                            "name": "top_k",
+                            "value": "3"
                         }
-                    },
-                    "id": "send-whatsapp-reply",
-                    "name": "Send WhatsApp Reply",
-                    "type": "n8n-nodes-base.httpRequest",
-                    "typeVersion": 4,
-                    "position": [1340, 300]
-                }
-            ],
-            "connections": {
-                "Webhook Trigger": {
-                    "main": [
-                        [
-                            {
-                                "node": "Message Filter",
-                                "type": "main",
-                                "index": 0
-                            }
-                        ]
-                    ]
-                },
-                "Message Filter": {
-                    "main": [
-                        [
-                            {
-                                "node": "Extract Message",
-                                "type": "main",
-                                "index": 0
-                            }
-                        ]
                     ]
-                },
-                "Extract Message": {
-                    "main": [
-                        [
-                            {
-                                "node": "Query Knowledge Base",
-                                "type": "main",
-                                "index": 0
-                            }
-                        ]
+                }
+            },
+            "id": "query-knowledge-base",
+            "name": "Query Knowledge Base",
+            "type": "n8n-nodes-base.httpRequest",
+            "typeVersion": 4,
+            "position": [900, 300]
+        },
+        {
+            "parameters": {
+                "model": "gpt-4o",
+                "messages": {
+                    "messageValues": [
+                        {
+                            "role": "system",
+                            "content": "Você é um assistente virtual inteligente para atendimento ao cliente via WhatsApp. Use o contexto fornecido para responder às perguntas de forma útil, profissional e amigável. Se não souber a resposta, seja honesto e ofereça ajuda alternativa. Sempre responda em português."
+                        },
+                        {
+                            "role": "user",
+                            "content": "Contexto: {{$json.context}}\n\nPergunta do cliente: {{$('Extract Message').item.json.messageText}}"
+                        }
                     ]
                 },
-                "Query Knowledge Base": {
-                    "main": [
-                        [
-                            {
-                                "node": "Generate AI Response",
-                                "type": "main",
-                                "index": 0
-                            }
-                        ]
+                "options": {
+                    "temperature": 0.7,
+                    "maxTokens": 500
+                }
+            },
+            "id": "generate-ai-response",
+            "name": "Generate AI Response",
+            "type": "@n8n/n8n-nodes-langchain.openAi",
+            "typeVersion": 1,
+            "position": [1120, 300]
+        },
+        {
+            "parameters": {
+                "url": "={{$env.EVOLUTION_API_URL}}/message/sendText/{{$('Extract Message').item.json.instanceId}}",
+                "sendHeaders": True,
+                "headerParameters": {
+                    "parameters": [
+                        {
+                            "name": "apikey",
+                            "value": "={{$env.EVOLUTION_API_KEY}}"
+                        }
                     ]
                 },
-                "Generate AI Response": {
-                    "main": [
-                        [
-                            {
-                                "node": "Send WhatsApp Reply",
-                                "type": "main",
-                                "index": 0
-                            }
-                        ]
+                "sendBody": True,
+                "bodyParameters": {
+                    "parameters": [
+                        {
+                            "name": "number",
+                            "value": "={{$('Extract Message').item.json.remoteJid}}"
+                        },
+                        {
+                            "name": "text",
+                            "value": "={{$json.choices[0].message.content}}"
+                        }
                     ]
                 }
             },
-            "active": False,
-            "settings": {
-                "timezone": "Africa/Maputo"
+            "id": "send-whatsapp-reply",
+            "name": "Send WhatsApp Reply",
+            "type": "n8n-nodes-base.httpRequest",
+            "typeVersion": 4,
+            "position": [1340, 300]
+        },
+        {
+            "parameters": {
+                "method": "POST",
+                "url": "={{$env.WHATSAPP_GPT_API_URL}}/api/whatsapp-gpt/webhook/evolution?token={{$env.EVOLUTION_WEBHOOK_TOKEN}}",
+                "sendBody": True,
+                "specifyBody": "json",
+                "jsonBody": "={{JSON.stringify($json)}}"
             },
-            "tags": [
+            "id": "forward-event",
+            "name": "Forward Event",
+            "type": "n8n-nodes-base.httpRequest",
+            "typeVersion": 4,
+            "position": [680, 500]
+        }
+    ],
+    "connections": {
+        "Webhook Trigger": {
+            "main": [
+                [
+                    {
+                        "node": "Message Filter",
+                        "type": "main",
+                        "index": 0
+                    }
+                ]
+            ]
+        },
+        "Message Filter": {
+            "main": [
+                [
+                    {
+                        "node": "Extract Message",
+                        "type": "main",
+                        "index": 0
+                    }
+                ],
+                [
+                    {
+                        "node": "Forward Event",
+                        "type": "main",
+                        "index": 0
+                    }
+                ]
+            ]
+        },
+        "Extract Message": {
+            "main": [
+                [
+                    {
+                        "node": "Query Knowledge Base",
+                        "type": "main",
+                        "index": 0
+                    }
+                ]
+            ]
+        },
+        "Query Knowledge Base": {
+            "main": [
+                [
+                    {
+                        "node": "Generate AI Response",
+                        "type": "main",
+                        "index": 0
+                    }
+                ]
+            ]
+        },
+        "Generate AI Response": {
+            "main": [
+                [
+                    {
+                        "node": "Send WhatsApp Reply",
+                        "type": "main",
+                        "index": 0
+                    }
+                ]
+            ]
+        }
+    },
+    "active": False,
+    "settings": {
+        "timezone": "Africa/Maputo"
+    },
+    "tags": [
+        {
+            "name": "WhatsApp GPT",
+            "id": "whatsapp-gpt"
+        }
+    ]
+}
+
+class CompiledWorkflowTemplate:
+    """Workflow template validated once and pre-serialized with slots for the per-client fields"""
+    
+    NAME_SLOT = "__workflow_name__"
+    WEBHOOK_ID_SLOT = "__webhook_id__"
+    # A slot as it appears in the serialized JSON: a whole quoted string
+    SLOT_PATTERN = re.compile(f'"({NAME_SLOT}|{WEBHOOK_ID_SLOT})"')
+    
+    def __init__(self, template: Dict):
+        self.webhook_node = self._validate(template)
+        self.webhook_path = self.webhook_node.get("parameters", {}).get("path", "")
+        
+        compiled = json.loads(json.dumps(template))
+        compiled["name"] = self.NAME_SLOT
+        for node in compiled["nodes"]:
+            if node["name"] == self.webhook_node["name"]:
+                node["webhookId"] = self.WEBHOOK_ID_SLOT
+        
+        # Literal JSON at even indices, slot names at odd indices
+        self._parts = self.SLOT_PATTERN.split(json.dumps(compiled))
+    
+    @staticmethod
+    def _validate(template: Dict) -> Dict:
+        """
+        Check node names and connections; return the webhook trigger node
+        
+        Raises:
+            ValueError: If the template is malformed
+        """
+        nodes = template.get("nodes") or []
+        names = [node.get("name") for node in nodes]
+        if len(set(names)) != len(names):
+            raise ValueError("Workflow template has duplicate node names")
+        
+        for source, outputs in (template.get("connections") or {}).items():
+            if source not in names:
+                raise ValueError(f"Workflow template connects unknown node '{source}'")
+            for branch in outputs.get("main", []):
+                for target in branch:
+                    if target.get("node") not in names:
+                        raise ValueError(f"Workflow template connects to unknown node '{target.get('node')}'")
+        
+        webhooks = [node for node in nodes if node.get("type") == "n8n-nodes-base.webhook"]
+        if len(webhooks) != 1:
+            raise ValueError("Workflow template needs exactly one webhook trigger")
+        
+        return webhooks[0]
+    
+    def render(self, name: str, webhook_id: str) -> str:
+        """
+        Produce the JSON request body for one workflow
+        
+        Args:
+            name: Workflow name
+            webhook_id: Webhook ID for the trigger node
+            
+        Returns:
+            Serialized workflow JSON
+        """
+        values = {
+            self.NAME_SLOT: json.dumps(name),
+            self.WEBHOOK_ID_SLOT: json.dumps(webhook_id)
+        }
+        
+        # Fill every slot in one pass so user-supplied values are never scanned for slots
+        parts = list(self._parts)
+        parts[1::2] = [values[slot] for slot in parts[1::2]]
+        return ''.join(parts)
+
+COMPILED_WORKFLOW_TEMPLATE = CompiledWorkflowTemplate(WORKFLOW_TEMPLATE)
+
+def _build_shared_workflow_template(base: Dict) -> Dict:
+    """
+    Derive the multi-tenant workflow: look up the tenant by instance before querying knowledge
+    
+    Args:
+        base: Per-client workflow template
+        
+    Returns:
+        Shared workflow template
+    """
+    template = json.loads(json.dumps(base))
+    template["name"] = "WhatsApp GPT Shared Template"
+    
+    template["nodes"].append({
+        "parameters": {
+            "url": "={{$env.WHATSAPP_GPT_API_URL}}/api/whatsapp-gpt/tenant-config/{{$json.instanceId}}"
+        },
+        "id": "resolve-tenant",
+        "name": "Resolve Tenant",
+        "type": "n8n-nodes-base.httpRequest",
+        "typeVersion": 4,
+        "position": [790, 150]
+    })
+    
+    # The knowledge query now follows Resolve Tenant, so read the message from Extract Message
+    for node in template["nodes"]:
+        if node["name"] == "Query Knowledge Base":
+            for parameter in node["parameters"]["bodyParameters"]["parameters"]:
+                if parameter["name"] == "query":
+                    parameter["value"] = "={{$('Extract Message').item.json.messageText}}"
+                elif parameter["name"] == "namespace":
+                    parameter["value"] = "={{$json.tenant.namespace}}"
+    
+    template["connections"]["Extract Message"]["main"][0][0]["node"] = "Resolve Tenant"
+    template["connections"]["Resolve Tenant"] = {
+        "main": [
+            [
                 {
-                    "name": "WhatsApp GPT",
-                    "id": "whatsapp-gpt"
+                    "node": "Query Knowledge Base",
+                    "type": "main",
+                    "index": 0
                 }
             ]
+        ]
+    }
+    
+    return template
+
+COMPILED_SHARED_WORKFLOW_TEMPLATE = CompiledWorkflowTemplate(_build_shared_workflow_template(WORKFLOW_TEMPLATE))
+
+class N8nFlowManager:
+    """Manager for n8n workflow operations"""
+    
+    def __init__(self, base_url: str = None, api_key: str = None):
+        self.base_url = base_url or os.getenv('N8N_API_URL', 'http://localhost:5678')
+        self.api_key = api_key or os.getenv('N8N_API_KEY', '')
+        self.headers = {
+            'Content-Type': 'application/json',
+            'X-N8N-API-KEY': self.api_key
         }
         
-        return template
+        # Shared pooled keep-alive transport
+        self.http = get_transport('n8n')
+        
+        # 'per_client' creates one workflow per client; 'shared' routes every
+        # instance through a few multi-tenant workflows
+        self.workflow_mode = os.getenv('N8N_WORKFLOW_MODE', 'per_client').lower()
+        self.shared_shards = max(1, int(os.getenv('N8N_SHARED_WORKFLOW_SHARDS', '1')))
+        self._shared_workflows = None
+        self._shared_lock = threading.Lock()
+    
+    @property
+    def shared(self) -> bool:
+        """Whether clients are served by shared multi-tenant workflows"""
+        return self.workflow_mode == 'shared'
+    
+    def get_workflow_template(self) -> Dict:
+        """
+        Get the base WhatsApp GPT workflow template
+        
+        Returns:
+            Dictionary with workflow template (a fresh copy with a new webhook ID)
+        """
+        return json.loads(COMPILED_WORKFLOW_TEMPLATE.render(
+            name=WORKFLOW_TEMPLATE["name"],
+            webhook_id=str(uuid.uuid4())
+        ))
     
     def create_client_workflow(self, client_id: str, instance_id: str, business_name: str = None) -> Dict:
         """
@@ -261,26 +425,24 @@ class N8nFlowManager:
             Dictionary with workflow creation result
         """
         try:
-            # Get template and customize it
-            template = self.get_workflow_template()
-            
-            # Customize workflow name
+            # Only the name and webhook ID vary per client
             workflow_name = f"WhatsApp GPT - {business_name or client_id}"
-            template["name"] = workflow_name
+            webhook_id = str(uuid.uuid4())
             
             # Create workflow
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/api/v1/workflows",
                 headers=self.headers,
-                json=template
+                data=COMPILED_WORKFLOW_TEMPLATE.render(name=workflow_name, webhook_id=webhook_id)
             )
             
             if response.status_code == 201:
                 workflow_data = response.json()
                 workflow_id = workflow_data.get("id")
                 
-                # Get webhook URL
-                webhook_url = self.get_webhook_url(workflow_id)
+                # Derive the webhook URL from the created workflow instead of fetching it again
+                webhook_url = (self._webhook_url_from_nodes(workflow_data.get("nodes", []))
+                               or f"{self.base_url}/webhook/{webhook_id}")
                 
                 workflow = N8nWorkflow(
                     workflow_id=workflow_id,
@@ -309,6 +471,116 @@ class N8nFlowManager:
                 "error": f"Exception creating workflow: {str(e)}"
             }
     
+    def get_shared_workflow(self, instance_id: str) -> Dict:
+        """
+        Get the shared workflow shard that serves an instance
+        
+        Args:
+            instance_id: Evolution API instance ID
+            
+        Returns:
+            Dictionary with the shard's workflow details
+        """
+        result = self.ensure_shared_workflows()
+        if not result["success"]:
+            return result
+        
+        shard = zlib.crc32(instance_id.encode('utf-8')) % self.shared_shards
+        return {
+            "success": True,
+            "workflow": result["workflows"][shard]
+        }
+    
+    def ensure_shared_workflows(self) -> Dict:
+        """
+        Find or create and activate the shared workflow shards (once per process)
+        
+        Returns:
+            Dictionary with the list of shard workflows
+        """
+        with self._shared_lock:
+            if self._shared_workflows is not None:
+                return {
+                    "success": True,
+                    "workflows": self._shared_workflows
+                }
+            
+            try:
+                names = {f"WhatsApp GPT - Shared {shard}" for shard in range(self.shared_shards)}
+                existing = {}
+                cursor = None
+                
+                # Page through every workflow; shards can sit behind thousands of per-client ones
+                while True:
+                    params = {"limit": 250}
+                    if cursor:
+                        params["cursor"] = cursor
+                    
+                    response = self.http.get(
+                        f"{self.base_url}/api/v1/workflows",
+                        headers=self.headers,
+                        params=params
+                    )
+                    
+                    if response.status_code != 200:
+                        return {
+                            "success": False,
+                            "error": f"Failed to list workflows: {response.text}"
+                        }
+                    
+                    page = response.json()
+                    for workflow in page.get("data", []):
+                        if workflow.get("name") in names:
+                            existing.setdefault(workflow["name"], workflow)
+                    
+                    cursor = page.get("nextCursor")
+                    if not cursor or len(existing) == len(names):
+                        break
+                
+                workflows = []
+                
+                for shard in range(self.shared_shards):
+                    name = f"WhatsApp GPT - Shared {shard}"
+                    workflow_data = existing.get(name)
+                    
+                    if workflow_data is None:
+                        response = self.http.post(
+                            f"{self.base_url}/api/v1/workflows",
+                            headers=self.headers,
+                            data=COMPILED_SHARED_WORKFLOW_TEMPLATE.render(name=name, webhook_id=str(uuid.uuid4()))
+                        )
+                        if response.status_code != 201:
+                            return {
+                                "success": False,
+                                "error": f"Failed to create shared workflow: {response.text}"
+                            }
+                        workflow_data = response.json()
+                    
+                    if not workflow_data.get("active"):
+                        activation = self.activate_workflow(workflow_data["id"])
+                        if not activation["success"]:
+                            return activation
+                    
+                    workflows.append({
+                        "workflow_id": workflow_data["id"],
+                        "name": name,
+                        "shard": shard,
+                        "status": "active",
+                        "webhook_url": self._webhook_url_from_nodes(workflow_data.get("nodes", []))
+                    })
+                
+                self._shared_workflows = workflows
+                return {
+                    "success": True,
+                    "workflows": workflows
+                }
+                
+            except Exception as e:
+                return {
+                    "success": False,
+                    "error": f"Exception preparing shared workflows: {str(e)}"
+                }
+    
     def get_webhook_url(self, workflow_id: str) -> Optional[str]:
         """
         Get webhook URL for a workflow
@@ -320,31 +592,95 @@ class N8nFlowManager:
             Webhook URL or None
         """
         try:
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/api/v1/workflows/{workflow_id}",
                 headers=self.headers
             )
             
             if response.status_code == 200:
                 workflow_data = response.json()
-                
-                # Find webhook node
-                for node in workflow_data.get("nodes", []):
-                    if node.get("type") == "n8n-nodes-base.webhook":
-                        webhook_id = node.get("webhookId")
-                        path = node.get("parameters", {}).get("path", "")
-                        
-                        if webhook_id:
-                            return f"{self.base_url}/webhook/{webhook_id}"
-                        elif path:
-                            return f"{self.base_url}/webhook/{path}"
-                
-                return None
+                return self._webhook_url_from_nodes(workflow_data.get("nodes", []))
                 
         except Exception as e:
             print(f"Error getting webhook URL: {str(e)}")
             return None
     
+    def rename_workflow(self, workflow_id: str, name: str) -> Dict:
+        """
+        Rename a workflow
+        
+        Args:
+            workflow_id: n8n workflow ID
+            name: New workflow name
+            
+        Returns:
+            Dictionary with rename result
+        """
+        try:
+            response = self.http.get(
+                f"{self.base_url}/api/v1/workflows/{workflow_id}",
+                headers=self.headers
+            )
+            
+            if response.status_code != 200:
+                return {
+                    "success": False,
+                    "error": f"Failed to get workflow: {response.text}"
+                }
+            
+            workflow_data = response.json()
+            
+            # The update endpoint replaces the workflow, so send it back whole
+            response = self.http.put(
+                f"{self.base_url}/api/v1/workflows/{workflow_id}",
+                headers=self.headers,
+                json={
+                    "name": name,
+                    "nodes": workflow_data.get("nodes", []),
+                    "connections": workflow_data.get("connections", {}),
+                    "settings": workflow_data.get("settings", {})
+                }
+            )
+            
+            if response.status_code == 200:
+                return {
+                    "success": True,
+                    "message": "Workflow renamed successfully"
+                }
+            else:
+                return {
+                    "success": False,
+                    "error": f"Failed to rename workflow: {response.text}"
+                }
+                
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Exception renaming workflow: {str(e)}"
+            }
+    
+    def _webhook_url_from_nodes(self, nodes: List[Dict]) -> Optional[str]:
+        """
+        Build the webhook URL from a workflow's trigger node
+        
+        Args:
+            nodes: Workflow nodes
+            
+        Returns:
+            Webhook URL or None
+        """
+        for node in nodes:
+            if node.get("type") == "n8n-nodes-base.webhook":
+                webhook_id = node.get("webhookId")
+                path = node.get("parameters", {}).get("path", "")
+                
+                if webhook_id:
+                    return f"{self.base_url}/webhook/{webhook_id}"
+                elif path:
+                    return f"{self.base_url}/webhook/{path}"
+        
+        return None
+    
     def activate_workflow(self, workflow_id: str) -> Dict:
         """
         Activate a workflow
@@ -356,7 +692,7 @@ class N8nFlowManager:
             Dictionary with activation result
         """
         try:
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/api/v1/workflows/{workflow_id}/activate",
                 headers=self.headers
             )
@@ -389,7 +725,7 @@ class N8nFlowManager:
             Dictionary with deactivation result
         """
         try:
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/api/v1/workflows/{workflow_id}/deactivate",
                 headers=self.headers
             )
@@ -422,7 +758,7 @@ class N8nFlowManager:
             Dictionary with deletion result
         """
         try:
-            response = requests.delete(
+            response = self.http.delete(
                 f"{self.base_url}/api/v1/workflows/{workflow_id}",
                 headers=self.headers
             )
@@ -455,7 +791,7 @@ class N8nFlowManager:
             Dictionary with workflow status
         """
         try:
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/api/v1/workflows/{workflow_id}",
                 headers=self.headers
             )
@@ -0,0 +1,291 @@
+import os
+import uuid
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from src.models.user import db
+from src.models.pooled_agent import PooledAgent
+from src.services.setup_orchestrator import SetupOrchestrator, SetupStep
+
+# Pooled workflows are created for business name 'pool' and carry this name until claimed
+POOL_BUSINESS_NAME = 'pool'
+POOL_WORKFLOW_NAME = f"WhatsApp GPT - {POOL_BUSINESS_NAME}"
+
+class ProvisioningPool:
+    """Background-maintained pool of ready Evolution instances wired to inactive n8n workflows"""
+
+    def __init__(self, evolution_manager, n8n_manager, target_size: int = None):
+        self.evolution_manager = evolution_manager
+        self.n8n_manager = n8n_manager
+        # Unclaimed agents to keep ready; 0 disables the pool
+        self.target_size = int(os.getenv('PROVISIONING_POOL_SIZE', '0')) if target_size is None else target_size
+        # Seconds between pool level checks (claims also wake the provisioner)
+        self.check_interval = float(os.getenv('PROVISIONING_POOL_CHECK_SECONDS', '30'))
+        # Unclaimed agents older than this are torn down and replaced on the next refill
+        self.max_age = float(os.getenv('PROVISIONING_POOL_MAX_AGE_SECONDS', '86400'))
+
+        # Separate from the request-path orchestrator so refills never delay customer setups
+        self.orchestrator = SetupOrchestrator(
+            max_workers=int(os.getenv('PROVISIONING_POOL_CONCURRENCY', '2'))
+        )
+
+        self.app = None
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._provisioner = None
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'provisioned': 0,
+            'provision_failures': 0,
+            'released': 0,
+            'expired': 0,
+            'discarded': 0
+        }
+
+    def init_app(self, app):
+        """
+        Bind the pool to the Flask app and start the background provisioner
+
+        Args:
+            app: Flask application (used for database access from the provisioner)
+        """
+        self.app = app
+
+        if self.target_size <= 0:
+            return
+
+        self._provisioner = threading.Thread(
+            target=self._provision_loop,
+            name="provisioning-pool",
+            daemon=True
+        )
+        self._provisioner.start()
+
+    def claim(self, client_id: str) -> Optional[Dict]:
+        """
+        Take a ready agent out of the pool
+
+        Args:
+            client_id: Client the agent is being bound to
+
+        Returns:
+            Pooled agent dictionary, or None if the pool is empty
+        """
+        if self.target_size <= 0:
+            return None
+
+        # Another process may take the same row; retry with the next candidate
+        for _ in range(3):
+            candidate = PooledAgent.query.filter_by(status='available').order_by(PooledAgent.created_at).first()
+            if candidate is None:
+                break
+
+            claimed = PooledAgent.query.filter_by(id=candidate.id, status='available').update(
+                {'status': 'claimed', 'client_id': client_id, 'claimed_at': datetime.now()},
+                synchronize_session=False
+            )
+            db.session.commit()
+
+            if not claimed:
+                continue
+
+            agent = db.session.get(PooledAgent, candidate.id)
+            # Evolution may have deleted the instance since it was pooled
+            if not self.evolution_manager.check_connection_status(agent.instance_id).get('success'):
+                self._teardown(agent)
+                self._count('discarded')
+                continue
+
+            self._count('hits')
+            self._wake.set()
+            return agent.to_dict()
+
+        self._count('misses')
+        self._wake.set()
+        return None
+
+    def release(self, agent_id: str) -> bool:
+        """
+        Return a claimed agent to the pool (setup failed after claiming it)
+
+        Args:
+            agent_id: Pooled agent ID
+
+        Returns:
+            True if the agent was returned
+        """
+        released = PooledAgent.query.filter_by(id=agent_id, status='claimed').update(
+            {'status': 'available', 'client_id': None, 'claimed_at': None},
+            synchronize_session=False
+        )
+        db.session.commit()
+
+        if released:
+            self._count('released')
+        return bool(released)
+
+    def restore_workflow(self, agent: Dict) -> Dict:
+        """
+        Undo binding a claimed agent's workflow to a customer (setup failed after claiming it)
+
+        Args:
+            agent: Pooled agent dictionary returned by claim()
+
+        Returns:
+            Dictionary with the rename result
+        """
+        if not agent.get('workflow_id'):
+            return {"success": True}
+
+        # Pooled workflows wait inactive until they are bound
+        self.n8n_manager.deactivate_workflow(agent['workflow_id'])
+        return self.n8n_manager.rename_workflow(agent['workflow_id'], POOL_WORKFLOW_NAME)
+
+    def get_stats(self) -> Dict:
+        """
+        Get pool level and hit/miss statistics
+
+        Returns:
+            Dictionary with pool size, availability and counters
+        """
+        with self._lock:
+            stats = dict(self._stats)
+
+        lookups = stats['hits'] + stats['misses']
+        stats.update({
+            'target_size': self.target_size,
+            'available': PooledAgent.query.filter_by(status='available').count(),
+            'claimed': PooledAgent.query.filter_by(status='claimed').count(),
+            'hit_rate': round(stats['hits'] / lookups, 4) if lookups else 0.0
+        })
+        return stats
+
+    def refill(self) -> int:
+        """
+        Provision agents until the pool is back at its target size
+
+        Returns:
+            Number of agents added
+        """
+        self._expire()
+
+        available = PooledAgent.query.filter_by(status='available').count()
+        added = 0
+
+        for _ in range(max(0, self.target_size - available)):
+            agent = self._provision_one()
+            if agent is None:
+                # Upstream trouble; try again on the next check instead of hammering it
+                break
+            db.session.add(agent)
+            db.session.commit()
+            added += 1
+
+        return added
+
+    def _expire(self):
+        """Tear down unclaimed agents older than max_age"""
+        expired_before = datetime.now() - timedelta(seconds=self.max_age)
+        candidates = PooledAgent.query.filter(
+            PooledAgent.status == 'available',
+            PooledAgent.created_at < expired_before
+        ).all()
+
+        for candidate in candidates:
+            # Claim it first so no customer setup can take it while it is torn down
+            expired = PooledAgent.query.filter_by(id=candidate.id, status='available').update(
+                {'status': 'expired'},
+                synchronize_session=False
+            )
+            db.session.commit()
+
+            if expired:
+                self._teardown(db.session.get(PooledAgent, candidate.id))
+                self._count('expired')
+
+    def _teardown(self, agent: PooledAgent):
+        """Delete a pooled agent's instance and workflow and forget it"""
+        self.evolution_manager.delete_instance(agent.instance_id)
+        if agent.workflow_id:
+            self.n8n_manager.delete_workflow(agent.workflow_id)
+
+        db.session.delete(agent)
+        db.session.commit()
+
+    def _provision_one(self) -> Optional[PooledAgent]:
+        """Create an instance and a workflow concurrently and wire the webhook between them"""
+        agent_id = str(uuid.uuid4())
+        instance_id = self.evolution_manager.generate_instance_name(f"pool_{agent_id[:8]}")
+
+        def create_workflow(inputs):
+            if self.n8n_manager.shared:
+                return self.n8n_manager.get_shared_workflow(instance_id)
+
+            return self.n8n_manager.create_client_workflow(
+                client_id=agent_id,
+                instance_id=instance_id,
+                business_name=POOL_BUSINESS_NAME
+            )
+
+        def configure_webhook(inputs):
+            return self.evolution_manager.configure_webhook(
+                instance_name=instance_id,
+                webhook_url=inputs['workflow']['workflow']['webhook_url']
+            )
+
+        setup = self.orchestrator.run([
+            SetupStep(
+                name='instance',
+                run=lambda inputs: self.evolution_manager.create_instance(
+                    client_id=agent_id,
+                    instance_name=instance_id
+                ),
+                rollback=lambda result: self.evolution_manager.delete_instance(instance_id)
+            ),
+            SetupStep(
+                name='workflow',
+                run=create_workflow,
+                # Shared workflows outlive any one pooled instance
+                rollback=None if self.n8n_manager.shared else (
+                    lambda result: self.n8n_manager.delete_workflow(result['workflow']['workflow_id'])
+                )
+            ),
+            SetupStep(
+                name='webhook',
+                run=configure_webhook,
+                depends_on=['instance', 'workflow']
+            )
+        ])
+
+        if not setup['success']:
+            self._count('provision_failures')
+            print(f"Warning: Failed to provision pooled agent ({setup['failed_step']}): {setup['error']}")
+            return None
+
+        self._count('provisioned')
+        workflow = setup['results']['workflow']['workflow']
+
+        return PooledAgent(
+            id=agent_id,
+            instance_id=instance_id,
+            workflow_id=None if self.n8n_manager.shared else workflow['workflow_id'],
+            webhook_url=workflow['webhook_url'],
+            status='available'
+        )
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _provision_loop(self):
+        while True:
+            try:
+                with self.app.app_context():
+                    self.refill()
+            except Exception as e:
+                print(f"Error refilling provisioning pool: {str(e)}")
+
+            self._wake.wait(self.check_interval)
+            self._wake.clear()
@@ -0,0 +1,211 @@
+import os
+import time
+import itertools
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Iterator
+
+from src.services.connection_state import normalize_event_name
+from src.services.event_stream import VersionedStore, format_sse
+
+class QRCodeCache:
+    """Per-instance QR code cache with single-flight refresh and change streaming"""
+
+    def __init__(self, ttl_seconds: float = None):
+        # WhatsApp rotates pairing QR codes roughly every 20 seconds
+        self.ttl_seconds = ttl_seconds or float(os.getenv('QR_CODE_TTL_SECONDS', '20'))
+
+        self.codes = VersionedStore()
+        self._expires = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'upstream_fetches': 0,
+            'coalesced': 0,
+            'webhook_updates': 0
+        }
+
+    def put(self, instance_name: str, qrcode: Dict, source: str = 'upstream') -> Dict:
+        """
+        Store a QR code payload and wake up stream listeners if it changed
+
+        Args:
+            instance_name: Name of the Evolution API instance
+            qrcode: Evolution QR payload ({'code', 'base64', 'pairingCode', ...})
+            source: 'upstream', 'create' or 'webhook'
+
+        Returns:
+            Stored QR entry
+        """
+        with self._lock:
+            self._expires[instance_name] = time.monotonic() + self.ttl_seconds
+            if source == 'webhook':
+                self._stats['webhook_updates'] += 1
+
+        current, _ = self.codes.get(instance_name)
+        if current is not None and current['qrcode'] == qrcode:
+            return current
+
+        entry = {
+            'instance_id': instance_name,
+            'qrcode': qrcode,
+            'code': (qrcode or {}).get('code'),
+            'source': source,
+            'updated_at': datetime.now().isoformat()
+        }
+        self.codes.set(instance_name, entry)
+
+        return entry
+
+    def invalidate(self, instance_name: str):
+        """
+        Drop the cached QR code for an instance (e.g. once it is connected)
+
+        Args:
+            instance_name: Name of the Evolution API instance
+        """
+        with self._lock:
+            self._expires.pop(instance_name, None)
+
+    def _is_fresh(self, instance_name: str) -> bool:
+        with self._lock:
+            return self._expires.get(instance_name, 0) > time.monotonic()
+
+    def get(self, instance_name: str, fetch: Callable[[str], Dict]) -> Dict:
+        """
+        Get the current QR code, refreshing it from Evolution at most once per rotation
+
+        Args:
+            instance_name: Name of the Evolution API instance
+            fetch: Upstream QR call (EvolutionAPIManager.get_qr_code)
+
+        Returns:
+            Dictionary with QR code data
+        """
+        entry, _ = self.codes.get(instance_name)
+        if entry is not None and self._is_fresh(instance_name):
+            with self._lock:
+                self._stats['hits'] += 1
+            return {
+                'success': True,
+                'qrcode': entry['qrcode'],
+                'cached': True,
+                'updated_at': entry['updated_at']
+            }
+
+        # Single flight: concurrent viewers wait for the one upstream call in progress
+        with self._lock:
+            flight = self._inflight.get(instance_name)
+            leader = flight is None
+            if leader:
+                flight = {'done': threading.Event(), 'result': None}
+                self._inflight[instance_name] = flight
+                self._stats['upstream_fetches'] += 1
+            else:
+                self._stats['coalesced'] += 1
+
+        if not leader:
+            flight['done'].wait()
+            return flight['result']
+
+        try:
+            result = fetch(instance_name)
+            if result.get('success'):
+                entry = self.put(instance_name, result.get('qrcode'), source='upstream')
+                result = {**result, 'cached': False, 'updated_at': entry['updated_at']}
+        except Exception as e:
+            result = {
+                'success': False,
+                'error': f"Exception getting QR code: {str(e)}"
+            }
+        finally:
+            with self._lock:
+                self._inflight.pop(instance_name, None)
+
+        flight['result'] = result
+        flight['done'].set()
+
+        return result
+
+    def ingest_event(self, payload: Dict, event_name: str = None) -> bool:
+        """
+        Apply an Evolution qrcode.updated webhook event
+
+        Args:
+            payload: Webhook JSON body
+            event_name: Event name from the URL (webhook_by_events mode)
+
+        Returns:
+            True if the event updated the cache
+        """
+        event = normalize_event_name(payload.get('event') or event_name)
+        if event != 'qrcode.updated':
+            return False
+
+        data = payload.get('data') or {}
+        qrcode = data.get('qrcode') or data
+        instance_name = payload.get('instance') or qrcode.get('instance')
+        if not instance_name or not qrcode.get('code'):
+            return False
+
+        self.put(instance_name, qrcode, source='webhook')
+        return True
+
+    def stream(self, instance_name: str, fetch: Callable[[str], Dict], max_seconds: float,
+               is_done: Callable[[], bool] = None, heartbeat_seconds: float = 15) -> Iterator[str]:
+        """
+        Stream every new QR code of an instance as SSE messages
+
+        Waits for webhook pushes and refreshes through the single-flight path when
+        the current code expires, so any number of viewers cost one upstream call
+        per rotation.
+
+        Args:
+            instance_name: Name of the Evolution API instance
+            fetch: Upstream QR call
+            max_seconds: Close the stream after this long (clients reconnect)
+            is_done: Optional check that ends the stream early (e.g. instance connected)
+            heartbeat_seconds: Interval for keep-alive comments
+
+        Returns:
+            Iterator of SSE-formatted strings
+        """
+        def seconds_to_refresh() -> float:
+            with self._lock:
+                remaining = self._expires.get(instance_name, 0) - time.monotonic()
+            # After a failed refresh, wait a full rotation before asking Evolution again
+            return remaining if remaining > 0 else self.ttl_seconds
+
+        def refresh() -> float:
+            self.get(instance_name, fetch)
+            return seconds_to_refresh()
+
+        result = self.get(instance_name, fetch)
+        entry, _ = self.codes.get(instance_name)
+
+        messages = self.codes.stream(
+            instance_name, 'qrcode', max_seconds, heartbeat_seconds,
+            refresh=refresh,
+            refresh_in=seconds_to_refresh(),
+            is_done=(lambda: {'instance_id': instance_name} if is_done() else None) if is_done else None,
+            done_event='connected'
+        )
+
+        if entry is None and not result.get('success'):
+            return itertools.chain([format_sse(result, 'error')], messages)
+        return messages
+
+    def get_stats(self) -> Dict:
+        """
+        Get cache statistics
+
+        Returns:
+            Dictionary with hit, fetch and coalescing counters
+        """
+        with self._lock:
+            return {
+                **self._stats,
+                'instances': len(self._expires),
+                'ttl_seconds': self.ttl_seconds
+            }
@@ -0,0 +1,172 @@
+import os
+import re
+import time
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+class QueryResultCache:
+    """TTL + LRU cache for knowledge base query results, invalidated per namespace"""
+
+    def __init__(self, max_entries: int = None, ttl_seconds: float = None):
+        self.max_entries = max_entries or int(os.getenv('QUERY_CACHE_MAX_ENTRIES', '2048'))
+        self.ttl_seconds = ttl_seconds or float(os.getenv('QUERY_CACHE_TTL_SECONDS', '300'))
+
+        # key -> (expires_at, cost_ms, result), least recently used first
+        self._entries = OrderedDict()
+        self._namespace_keys = {}
+        # Bumped on invalidation so results computed before it are not stored
+        self._generations = {}
+        self._lock = threading.Lock()
+
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'expirations': 0,
+            'evictions': 0,
+            'invalidations': 0,
+            'latency_saved_ms': 0.0
+        }
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """
+        Normalize a query so trivially different phrasings share a cache entry
+
+        Args:
+            query: Raw user query
+
+        Returns:
+            Case-folded query with collapsed whitespace and no surrounding punctuation
+        """
+        normalized = unicodedata.normalize('NFKC', query).casefold()
+        normalized = re.sub(r'\s+', ' ', normalized)
+        return normalized.strip(' \t\n?!.,;:¿¡')
+
+    def _make_key(self, namespace: str, query: str, top_k: int) -> Tuple:
+        return (namespace, self.normalize_query(query), top_k)
+
+    def generation(self, namespace: str) -> int:
+        """
+        Get the current invalidation generation of a namespace
+
+        Args:
+            namespace: Namespace identifier
+
+        Returns:
+            Generation token to pass back to put()
+        """
+        with self._lock:
+            return self._generations.get(namespace, 0)
+
+    def get(self, namespace: str, query: str, top_k: int) -> Optional[Dict]:
+        """
+        Look up a cached query result
+
+        Args:
+            namespace: Namespace identifier
+            query: Search query
+            top_k: Number of results requested
+
+        Returns:
+            Cached result dictionary or None
+        """
+        key = self._make_key(namespace, query, top_k)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+
+            expires_at, cost_ms, result = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            self._stats['latency_saved_ms'] += cost_ms
+
+        return {**result, 'cached': True}
+
+    def put(self, namespace: str, query: str, top_k: int, result: Dict, cost_ms: float, generation: int = None):
+        """
+        Store a query result
+
+        Args:
+            namespace: Namespace identifier
+            query: Search query
+            top_k: Number of results requested
+            result: Result dictionary to cache
+            cost_ms: Time it took to compute the result
+            generation: Generation token taken before computing the result
+        """
+        key = self._make_key(namespace, query, top_k)
+
+        with self._lock:
+            if generation is not None and generation != self._generations.get(namespace, 0):
+                # Namespace changed while the result was being computed
+                return
+
+            self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, cost_ms, result)
+            self._namespace_keys.setdefault(namespace, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self._stats['evictions'] += 1
+
+    def invalidate_namespace(self, namespace: str) -> int:
+        """
+        Drop every cached result for a namespace
+
+        Args:
+            namespace: Namespace identifier
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            keys = self._namespace_keys.pop(namespace, set())
+            for key in keys:
+                self._entries.pop(key, None)
+            self._stats['invalidations'] += 1
+
+        return len(keys)
+
+    def _remove(self, key: Tuple):
+        if self._entries.pop(key, None) is not None:
+            namespace_keys = self._namespace_keys.get(key[0])
+            if namespace_keys is not None:
+                namespace_keys.discard(key)
+                if not namespace_keys:
+                    del self._namespace_keys[key[0]]
+
+    def get_stats(self, namespace: str = None) -> Dict:
+        """
+        Get cache statistics
+
+        Args:
+            namespace: Optional namespace to report the cached entry count for
+
+        Returns:
+            Dictionary with hit rate and latency saved
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            lookups = stats['hits'] + stats['misses']
+            stats.update({
+                'hit_rate': round(stats['hits'] / lookups, 4) if lookups else 0.0,
+                'latency_saved_ms': round(stats['latency_saved_ms'], 2),
+                'entries': len(self._entries)
+            })
+            if namespace is not None:
+                stats['namespace_entries'] = len(self._namespace_keys.get(namespace, ()))
+
+        return stats
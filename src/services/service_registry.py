@@ -0,0 +1,148 @@
+import time
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+class ServiceRegistry:
+    """Registry of lazily constructed service singletons with optional warm-up"""
+
+    def __init__(self):
+        self._factories = {}
+        self._instances = {}
+        self._locks = {}
+        self._init_ms = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+        self._warm_up_thread = None
+
+    def register(self, name: str, factory: Callable[[], Any]):
+        """
+        Register a service factory (nothing is constructed yet)
+
+        Args:
+            name: Service name
+            factory: Zero-argument callable building the service
+        """
+        with self._lock:
+            self._factories[name] = factory
+            self._locks[name] = threading.Lock()
+
+    def get(self, name: str) -> Any:
+        """
+        Get a service, constructing it on first use
+
+        Args:
+            name: Service name
+
+        Returns:
+            Service instance
+        """
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        with self._locks[name]:
+            instance = self._instances.get(name)
+            if instance is not None:
+                return instance
+
+            started = time.perf_counter()
+            try:
+                instance = self._factories[name]()
+            except Exception as e:
+                self._errors[name] = str(e)
+                raise
+
+            self._init_ms[name] = round((time.perf_counter() - started) * 1000, 2)
+            self._errors.pop(name, None)
+            self._instances[name] = instance
+            return instance
+
+    def lazy(self, name: str) -> 'LazyService':
+        """
+        Get a proxy that resolves the service on first attribute access
+
+        Args:
+            name: Service name
+
+        Returns:
+            Lazy proxy for the service
+        """
+        return LazyService(self, name)
+
+    def warm_up(self, names: List[str] = None, background: bool = True) -> Optional[threading.Thread]:
+        """
+        Construct services ahead of the first request
+
+        Args:
+            names: Services to warm up (default: all registered)
+            background: Run in a daemon thread instead of blocking
+
+        Returns:
+            The warm-up thread when running in the background
+        """
+        names = list(names or self._factories)
+
+        def run():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception as e:
+                    print(f"Error warming up service '{name}': {str(e)}")
+
+        if not background:
+            run()
+            return None
+
+        self._warm_up_thread = threading.Thread(target=run, name="service-warm-up", daemon=True)
+        self._warm_up_thread.start()
+        return self._warm_up_thread
+
+    def is_ready(self) -> bool:
+        """
+        Check whether every registered service has been constructed
+
+        Returns:
+            True when all services are initialized
+        """
+        return all(name in self._instances for name in self._factories)
+
+    def get_status(self) -> Dict:
+        """
+        Get readiness details
+
+        Returns:
+            Dictionary with overall state ('starting', 'ready' or 'degraded')
+            and per-service initialization info
+        """
+        services = {}
+        for name in self._factories:
+            services[name] = {
+                'initialized': name in self._instances,
+                'init_ms': self._init_ms.get(name),
+                'error': self._errors.get(name)
+            }
+
+        if self.is_ready():
+            state = 'ready'
+        elif self._errors:
+            state = 'degraded'
+        else:
+            state = 'starting'
+
+        return {
+            'state': state,
+            'services': services
+        }
+
+class LazyService:
+    """Attribute-forwarding proxy for a service held in a ServiceRegistry"""
+
+    def __init__(self, registry: ServiceRegistry, name: str):
+        self._registry = registry
+        self._name = name
+
+    def __getattr__(self, attribute: str):
+        return getattr(self._registry.get(self._name), attribute)
+
+    def __repr__(self):
+        return f'<LazyService {self._name}>'
@@ -0,0 +1,137 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+@dataclass
+class SetupStep:
+    """One step of a setup dependency graph"""
+    name: str
+    # Called with {dependency name: dependency result}; returns a result dictionary
+    run: Callable[[Dict], Dict]
+    depends_on: List[str] = field(default_factory=list)
+    # Called with the step's own result to undo it if setup fails
+    rollback: Optional[Callable[[Dict], Dict]] = None
+    # A failed optional step only skips its dependents; a failed required step aborts setup
+    required: bool = True
+
+class SetupOrchestrator:
+    """Runs setup steps as a dependency graph, concurrently where possible, with rollback"""
+
+    def __init__(self, max_workers: int = None):
+        # Steps in flight per run; each run gets its own threads so concurrent setups never queue behind each other
+        self.max_workers = max_workers or int(os.getenv('SETUP_MAX_CONCURRENCY', '4'))
+
+    def run(self, steps: List[SetupStep]) -> Dict:
+        """
+        Execute a step graph
+
+        Args:
+            steps: Steps to run; each starts as soon as all of its dependencies succeed
+
+        Returns:
+            Dictionary with success flag, per-step results and per-step timings
+        """
+        by_name = {step.name: step for step in steps}
+        for step in steps:
+            unknown = [name for name in step.depends_on if name not in by_name]
+            if unknown:
+                raise ValueError(f"Step {step.name} depends on unknown steps: {unknown}")
+
+        started = time.perf_counter()
+        results = {}
+        timings = {step.name: {'status': 'pending'} for step in steps}
+        completed = []
+        running = {}
+        failed_step = None
+
+        def elapsed_ms() -> float:
+            return round((time.perf_counter() - started) * 1000, 2)
+
+        def execute(step: SetupStep, inputs: Dict) -> Dict:
+            timings[step.name]['started_ms'] = elapsed_ms()
+            try:
+                result = step.run(inputs)
+            except Exception as e:
+                result = {
+                    "success": False,
+                    "error": f"Exception in {step.name}: {str(e)}"
+                }
+            timings[step.name]['finished_ms'] = elapsed_ms()
+            timings[step.name]['duration_ms'] = round(
+                timings[step.name]['finished_ms'] - timings[step.name]['started_ms'], 2
+            )
+            return result or {"success": True}
+
+        executor = ThreadPoolExecutor(
+            max_workers=max(1, min(self.max_workers, len(steps))),
+            thread_name_prefix="setup-step"
+        )
+
+        while True:
+            # Start every step whose dependencies have all succeeded
+            if failed_step is None:
+                for step in steps:
+                    state = timings[step.name]['status']
+                    if state != 'pending':
+                        continue
+
+                    dependency_states = [timings[name]['status'] for name in step.depends_on]
+                    if any(status in ('failed', 'skipped') for status in dependency_states):
+                        timings[step.name]['status'] = 'skipped'
+                        continue
+                    if all(status == 'succeeded' for status in dependency_states):
+                        inputs = {name: results[name] for name in step.depends_on}
+                        timings[step.name]['status'] = 'running'
+                        running[executor.submit(execute, step, inputs)] = step
+
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                step = running.pop(future)
+                result = future.result()
+                results[step.name] = result
+
+                if result.get('success', True):
+                    timings[step.name]['status'] = 'succeeded'
+                    completed.append(step)
+                else:
+                    timings[step.name]['status'] = 'failed'
+                    timings[step.name]['error'] = result.get('error')
+                    if step.required and failed_step is None:
+                        failed_step = step.name
+
+        executor.shutdown(wait=False)
+
+        # Anything still pending can no longer run
+        for step in steps:
+            if timings[step.name]['status'] == 'pending':
+                timings[step.name]['status'] = 'skipped'
+
+        if failed_step is not None:
+            self._rollback(completed, results, timings)
+
+        return {
+            'success': failed_step is None,
+            'failed_step': failed_step,
+            'error': results[failed_step].get('error') if failed_step else None,
+            'results': results,
+            'timings': timings,
+            'total_ms': elapsed_ms()
+        }
+
+    def _rollback(self, completed: List[SetupStep], results: Dict, timings: Dict):
+        """Undo completed steps in reverse order of completion"""
+        for step in reversed(completed):
+            if step.rollback is None:
+                continue
+
+            try:
+                outcome = step.rollback(results[step.name]) or {}
+                timings[step.name]['status'] = 'rolled_back' if outcome.get('success', True) else 'rollback_failed'
+            except Exception as e:
+                timings[step.name]['status'] = 'rollback_failed'
+                timings[step.name]['error'] = f"Exception rolling back {step.name}: {str(e)}"
@@ -0,0 +1,337 @@
+import os
+import atexit
+import threading
+from collections import deque
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from flask import has_app_context
+from sqlalchemy.exc import IntegrityError
+
+from src.models.user import db
+from src.models.tenant import Tenant
+
+class TenantRegistry:
+    """Persistent client -> instance -> workflow -> namespace mapping with batched writes"""
+
+    def __init__(self, batch_size: int = None, flush_interval: float = None):
+        # Pending writes are flushed in one transaction when this many accumulate...
+        self.batch_size = batch_size or int(os.getenv('TENANT_REGISTRY_BATCH_SIZE', '100'))
+        # ...or after this many seconds, whichever comes first
+        self.flush_interval = flush_interval or float(os.getenv('TENANT_REGISTRY_FLUSH_INTERVAL_SECONDS', '0.5'))
+
+        self.app = None
+        # client_id -> fields to write
+        self._pending = {}
+        # instance_id -> fields to write, for updates that only know the instance
+        self._pending_by_instance = {}
+        # Changes taken by the flush in progress, still visible to lookups
+        self._writing = ({}, {})
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._flusher = None
+        # Rows that can never be written (e.g. a duplicate instance_id), kept for inspection
+        self._dead_letters = deque(maxlen=int(os.getenv('TENANT_REGISTRY_DEAD_LETTERS', '100')))
+        self._stats = {
+            'writes_queued': 0,
+            'flushes': 0,
+            'rows_written': 0,
+            'flush_errors': 0,
+            'dead_lettered': 0
+        }
+
+    def init_app(self, app):
+        """
+        Bind the registry to the Flask app and start the background flusher
+
+        Args:
+            app: Flask application (used for database access from the flusher)
+        """
+        self.app = app
+
+        self._flusher = threading.Thread(
+            target=self._flush_loop,
+            name="tenant-registry-flush",
+            daemon=True
+        )
+        self._flusher.start()
+
+        atexit.register(self.flush)
+
+    def record(self, client_id: str, **fields) -> Dict:
+        """
+        Queue an insert or update of a tenant
+
+        Args:
+            client_id: Unique identifier for the client
+            **fields: Tenant columns to set (instance_id, workflow_id, namespace, status, ...)
+
+        Returns:
+            The tenant as it will look once written
+        """
+        with self._condition:
+            pending = self._pending.setdefault(client_id, {})
+            pending.update(fields)
+            pending['updated_at'] = datetime.now()
+            self._stats['writes_queued'] += 1
+            self._condition.notify()
+
+        if self.app is None:
+            self.flush()
+
+        return self.get_by_client(client_id)
+
+    def update_instance(self, instance_id: str, **fields):
+        """
+        Queue an update of the tenant that owns an instance
+
+        Args:
+            instance_id: Evolution API instance name
+            **fields: Tenant columns to set
+        """
+        with self._condition:
+            pending = self._pending_by_instance.setdefault(instance_id, {})
+            pending.update(fields)
+            pending['updated_at'] = datetime.now()
+            self._stats['writes_queued'] += 1
+            self._condition.notify()
+
+        if self.app is None:
+            self.flush()
+
+    def get_by_client(self, client_id: str) -> Optional[Dict]:
+        """
+        Look up a tenant by client ID (primary key)
+
+        Args:
+            client_id: Unique identifier for the client
+
+        Returns:
+            Tenant dictionary or None if unknown
+        """
+        tenant = db.session.get(Tenant, client_id)
+        return self._overlay(tenant, client_id)
+
+    def get_by_instance(self, instance_id: str) -> Optional[Dict]:
+        """
+        Look up a tenant by Evolution instance name (unique index)
+
+        Args:
+            instance_id: Evolution API instance name
+
+        Returns:
+            Tenant dictionary or None if unknown
+        """
+        client_id = self._pending_client_for('instance_id', instance_id)
+        if client_id:
+            return self.get_by_client(client_id)
+
+        tenant = Tenant.query.filter_by(instance_id=instance_id).first()
+        return self._overlay(tenant, tenant.client_id) if tenant else None
+
+    def get_by_workflow(self, workflow_id: str) -> Optional[Dict]:
+        """
+        Look up a tenant by n8n workflow ID (unique index)
+
+        Args:
+            workflow_id: n8n workflow ID
+
+        Returns:
+            Tenant dictionary or None if unknown
+        """
+        client_id = self._pending_client_for('workflow_id', workflow_id)
+        if client_id:
+            return self.get_by_client(client_id)
+
+        tenant = Tenant.query.filter_by(workflow_id=workflow_id).first()
+        return self._overlay(tenant, tenant.client_id) if tenant else None
+
+    def list_tenants(self, status: str = None, limit: int = 1000, offset: int = 0) -> List[Dict]:
+        """
+        List tenants, optionally filtered by status (indexed)
+
+        Args:
+            status: Only return tenants with this status
+            limit: Maximum number of tenants
+            offset: Number of tenants to skip
+
+        Returns:
+            List of tenant dictionaries
+        """
+        self.flush()
+
+        query = Tenant.query
+        if status:
+            query = query.filter_by(status=status)
+
+        return [tenant.to_dict() for tenant in query.order_by(Tenant.created_at).offset(offset).limit(limit).all()]
+
+    def flush(self) -> int:
+        """
+        Write all pending changes in one transaction
+
+        Returns:
+            Number of rows written
+        """
+        with self._flush_lock:
+            with self._condition:
+                pending, self._pending = self._pending, {}
+                by_instance, self._pending_by_instance = self._pending_by_instance, {}
+                self._writing = (pending, by_instance)
+
+            if not pending and not by_instance:
+                return 0
+
+            context = nullcontext() if has_app_context() or self.app is None else self.app.app_context()
+            with context:
+                try:
+                    written = self._write(pending, by_instance)
+                except Exception as e:
+                    db.session.rollback()
+                    with self._condition:
+                        self._stats['flush_errors'] += 1
+                    print(f"Warning: Failed to flush tenant registry batch, retrying rows one at a time: {e}")
+                    # One bad row must not hold back the rest of the batch
+                    written = self._write_rows(pending, by_instance)
+                finally:
+                    with self._condition:
+                        self._writing = ({}, {})
+
+        with self._condition:
+            self._stats['flushes'] += 1
+            self._stats['rows_written'] += written
+
+        return written
+
+    def get_stats(self) -> Dict:
+        """
+        Get registry statistics
+
+        Returns:
+            Dictionary with pending, flush and write counters
+        """
+        with self._condition:
+            stats = dict(self._stats)
+            stats['pending'] = len(self._pending) + len(self._pending_by_instance)
+            stats['dead_letters'] = list(self._dead_letters)
+
+        stats['tenants'] = Tenant.query.count()
+        stats['batch_size'] = self.batch_size
+
+        return stats
+
+    def _write(self, pending: Dict, by_instance: Dict) -> int:
+        written = 0
+
+        if pending:
+            existing = {
+                tenant.client_id: tenant
+                for tenant in Tenant.query.filter(Tenant.client_id.in_(list(pending))).all()
+            }
+            for client_id, fields in pending.items():
+                tenant = existing.get(client_id)
+                if tenant is None:
+                    tenant = Tenant(client_id=client_id)
+                    db.session.add(tenant)
+                for key, value in fields.items():
+                    setattr(tenant, key, value)
+                written += 1
+
+            # Make new rows visible to the instance lookup below
+            db.session.flush()
+
+        if by_instance:
+            for tenant in Tenant.query.filter(Tenant.instance_id.in_(list(by_instance))).all():
+                for key, value in by_instance[tenant.instance_id].items():
+                    setattr(tenant, key, value)
+                written += 1
+
+        db.session.commit()
+
+        return written
+
+    def _write_rows(self, pending: Dict, by_instance: Dict) -> int:
+        """Write rows individually; dead-letter rows that violate constraints, requeue the rest"""
+        written = 0
+        rows = [({client_id: fields}, {}) for client_id, fields in pending.items()]
+        rows += [({}, {instance_id: fields}) for instance_id, fields in by_instance.items()]
+
+        for row_pending, row_by_instance in rows:
+            try:
+                written += self._write(row_pending, row_by_instance)
+            except IntegrityError as e:
+                db.session.rollback()
+                self._dead_letter(row_pending, row_by_instance, e)
+            except Exception as e:
+                # Probably transient (e.g. database locked); try again on the next flush
+                db.session.rollback()
+                self._requeue(row_pending, row_by_instance)
+                print(f"Warning: Failed to write tenant registry row: {e}")
+
+        return written
+
+    def _dead_letter(self, pending: Dict, by_instance: Dict, error: Exception):
+        key = next(iter(pending), None) or next(iter(by_instance), None)
+        fields = pending.get(key) or by_instance.get(key) or {}
+        entry = {
+            'client_id' if pending else 'instance_id': key,
+            'fields': {
+                name: value.isoformat() if isinstance(value, datetime) else value
+                for name, value in fields.items()
+            },
+            'error': str(getattr(error, 'orig', error)),
+            'at': datetime.now().isoformat()
+        }
+
+        with self._condition:
+            self._dead_letters.append(entry)
+            self._stats['dead_lettered'] += 1
+
+        print(f"Warning: Dropped tenant registry write for {key}: {entry['error']}")
+
+    def _requeue(self, pending: Dict, by_instance: Dict):
+        """Put unwritten changes back without overwriting newer ones"""
+        with self._condition:
+            for client_id, fields in pending.items():
+                self._pending[client_id] = {**fields, **self._pending.get(client_id, {})}
+            for instance_id, fields in by_instance.items():
+                self._pending_by_instance[instance_id] = {**fields, **self._pending_by_instance.get(instance_id, {})}
+
+    def _pending_client_for(self, column: str, value: str) -> Optional[str]:
+        with self._condition:
+            for pending in (self._pending, self._writing[0]):
+                for client_id, fields in pending.items():
+                    if fields.get(column) == value:
+                        return client_id
+        return None
+
+    def _overlay(self, tenant: Optional[Tenant], client_id: str) -> Optional[Dict]:
+        """Apply not-yet-flushed changes on top of the stored row"""
+        with self._condition:
+            writing, writing_by_instance = self._writing
+            fields = {**writing.get(client_id, {}), **self._pending.get(client_id, {})}
+
+            if tenant is None and not fields:
+                return None
+
+            result = tenant.to_dict() if tenant else Tenant(client_id=client_id).to_dict()
+
+            instance_id = fields.get('instance_id') or result['instance_id']
+            fields.update(writing_by_instance.get(instance_id, {}))
+            fields.update(self._pending_by_instance.get(instance_id, {}))
+
+        for key, value in fields.items():
+            result[key] = value.isoformat() if isinstance(value, datetime) else value
+
+        return result
+
+    def _flush_loop(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: len(self._pending) + len(self._pending_by_instance) >= self.batch_size,
+                    timeout=self.flush_interval
+                )
+
+            self.flush()
@@ -0,0 +1,485 @@
+import os
+import re
+import json
+import time
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError as e:
+    np = None
+    print(f"Warning: Some dependencies not available: {e}")
+
+try:
+    from pinecone import Pinecone
+except ImportError as e:
+    Pinecone = None
+    print(f"Warning: Some dependencies not available: {e}")
+
+from src.services.circuit_breaker import CircuitBreaker, get_breaker, upstream_setting
+
+DEFAULT_LOCAL_STORE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), 'database', 'vectors'
+)
+
+class VectorBackend(ABC):
+    """Interface for vector index backends used by VectorStoreManager"""
+
+    name = 'base'
+
+    @abstractmethod
+    def upsert(self, vectors: List[Dict], namespace: str):
+        """
+        Insert or overwrite vectors in a namespace
+
+        Args:
+            vectors: List of {'id', 'values', 'metadata'} dictionaries
+            namespace: Target namespace
+        """
+
+    @abstractmethod
+    def query(self, vector: List[float], top_k: int, namespace: str) -> List[Dict]:
+        """
+        Find the nearest vectors in a namespace
+
+        Args:
+            vector: Query embedding
+            top_k: Number of matches to return
+            namespace: Namespace to search
+
+        Returns:
+            List of {'id', 'score', 'metadata'} dictionaries, best match first
+        """
+
+    @abstractmethod
+    def delete_ids(self, ids: List[str], namespace: str):
+        """
+        Delete vectors by ID
+
+        Args:
+            ids: Vector IDs to delete
+            namespace: Namespace holding the vectors
+        """
+
+    @abstractmethod
+    def delete_namespace(self, namespace: str):
+        """
+        Delete every vector in a namespace
+
+        Args:
+            namespace: Namespace to clear
+        """
+
+    @abstractmethod
+    def describe_namespace(self, namespace: str) -> Dict:
+        """
+        Get vector count and dimension for a namespace
+
+        Args:
+            namespace: Namespace to describe
+
+        Returns:
+            Dictionary with 'vector_count' and 'dimension'
+        """
+
+class PineconeBackend(VectorBackend):
+    """Vector backend backed by a Pinecone index"""
+
+    name = 'pinecone'
+
+    def __init__(self, api_key: str, index_name: str, dimension: int = 1536):
+        if Pinecone is None:
+            raise RuntimeError("pinecone package not available")
+
+        # Initialize Pinecone client
+        pc = Pinecone(api_key=api_key)
+
+        # Check if index exists, create if not
+        existing_indexes = pc.list_indexes()
+        index_names = [idx['name'] for idx in existing_indexes]
+
+        if index_name not in index_names:
+            pc.create_index(
+                name=index_name,
+                dimension=dimension,  # OpenAI embedding dimension
+                metric='cosine'
+            )
+
+        self.index = pc.Index(index_name)
+
+    def upsert(self, vectors: List[Dict], namespace: str):
+        self.index.upsert(vectors=vectors, namespace=namespace)
+
+    def query(self, vector: List[float], top_k: int, namespace: str) -> List[Dict]:
+        results = self.index.query(
+            vector=vector,
+            top_k=top_k,
+            namespace=namespace,
+            include_metadata=True
+        )
+
+        return [
+            {'id': match.id, 'score': match.score, 'metadata': match.metadata or {}}
+            for match in results.matches
+        ]
+
+    def delete_ids(self, ids: List[str], namespace: str):
+        if ids:
+            self.index.delete(ids=ids, namespace=namespace)
+
+    def delete_namespace(self, namespace: str):
+        self.index.delete(delete_all=True, namespace=namespace)
+
+    def describe_namespace(self, namespace: str) -> Dict:
+        stats = self.index.describe_index_stats()
+        namespace_stats = stats.namespaces.get(namespace, {})
+
+        return {
+            'vector_count': namespace_stats.get('vector_count', 0),
+            'dimension': stats.dimension
+        }
+
+class _LocalNamespace:
+    """On-disk state of one namespace: a float32 matrix plus an append-only metadata log
+
+    metadata.jsonl starts with a header naming the matrix file and its dimension,
+    followed by one line per appended row ({"id", "metadata"}) or metadata update
+    ({"id", "metadata", "update": true}). Upserts append to both files; deletes
+    write a new matrix file and log and switch to them with a single rename of
+    the log. On load, matrix rows past the logged IDs (an interrupted append) are
+    dropped.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.log_path = os.path.join(directory, 'metadata.jsonl')
+        self.lock = threading.RLock()
+
+        self.dimension = None
+        self.matrix_file = 'vectors.f32'
+        self.ids = []
+        self.metadata = []
+        self.positions = {}
+        self.matrix = None
+
+        self._load()
+
+    @property
+    def matrix_path(self) -> str:
+        return os.path.join(self.directory, self.matrix_file)
+
+    def _load(self):
+        if not os.path.exists(self.log_path):
+            return
+
+        with open(self.log_path, 'rb') as f:
+            header = json.loads(f.readline())
+            self.dimension = header['dimension']
+            self.matrix_file = header['matrix']
+
+            valid_bytes = f.tell()
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                valid_bytes += len(line)
+                if entry.get('update'):
+                    self.metadata[self.positions[entry['id']]] = entry['metadata']
+                else:
+                    self.positions[entry['id']] = len(self.ids)
+                    self.ids.append(entry['id'])
+                    self.metadata.append(entry['metadata'])
+
+        if valid_bytes < os.path.getsize(self.log_path):
+            # Torn final line from an interrupted append
+            with open(self.log_path, 'r+b') as f:
+                f.truncate(valid_bytes)
+
+        self._check_rows()
+        self._remove_stale_matrices()
+        self._map_matrix()
+
+    def _check_rows(self):
+        """Make the matrix and the ID list agree on the number of rows"""
+        row_bytes = 4 * (self.dimension or 0)
+        stored_rows = os.path.getsize(self.matrix_path) // row_bytes if row_bytes and os.path.exists(self.matrix_path) else 0
+
+        if stored_rows > len(self.ids):
+            # Rows appended before the crash that interrupted their log lines
+            with open(self.matrix_path, 'r+b') as f:
+                f.truncate(len(self.ids) * row_bytes)
+        elif stored_rows < len(self.ids):
+            print(f"Warning: Local vector index {self.directory} has {stored_rows} rows for {len(self.ids)} IDs; dropping the extra IDs")
+            self.ids = self.ids[:stored_rows]
+            self.metadata = self.metadata[:stored_rows]
+            self.positions = {vector_id: row for row, vector_id in enumerate(self.ids)}
+            self._rewrite_log(self.matrix_file)
+
+    def _remove_stale_matrices(self):
+        for name in os.listdir(self.directory):
+            if name.startswith('vectors.') and name.endswith('.f32') and name != self.matrix_file:
+                os.remove(os.path.join(self.directory, name))
+
+    def _map_matrix(self):
+        """Memory-map the vector file (rows are unit-normalised)"""
+        if self.ids:
+            self.matrix = np.memmap(
+                self.matrix_path, dtype=np.float32, mode='r',
+                shape=(len(self.ids), self.dimension)
+            )
+        else:
+            self.matrix = None
+
+    def _rewrite_log(self, matrix_file: str):
+        """Write a complete log for the current rows and switch to it (and to matrix_file) atomically"""
+        tmp_path = f"{self.log_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'dimension': self.dimension, 'matrix': matrix_file}) + '\n')
+            for vector_id, metadata in zip(self.ids, self.metadata):
+                f.write(json.dumps({'id': vector_id, 'metadata': metadata}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.log_path)
+        self.matrix_file = matrix_file
+
+    @staticmethod
+    def _normalize(rows: 'np.ndarray') -> 'np.ndarray':
+        norms = np.linalg.norm(rows, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return rows / norms
+
+    def upsert(self, vectors: List[Dict]):
+        with self.lock:
+            rows = self._normalize(np.asarray([v['values'] for v in vectors], dtype=np.float32))
+            if self.dimension is None:
+                self.dimension = rows.shape[1]
+            elif rows.shape[1] != self.dimension:
+                raise ValueError(f"Vector dimension {rows.shape[1]} does not match namespace dimension {self.dimension}")
+
+            os.makedirs(self.directory, exist_ok=True)
+            if not os.path.exists(self.log_path):
+                self._rewrite_log(self.matrix_file)
+
+            # Overwrite existing rows in place, append new ones
+            stored_count = len(self.ids)
+            updates = {}
+            appended_rows = []
+            log_lines = []
+            for row, vector in zip(rows, vectors):
+                metadata = vector.get('metadata', {})
+                position = self.positions.get(vector['id'])
+                if position is None:
+                    position = len(self.ids)
+                    self.positions[vector['id']] = position
+                    self.ids.append(vector['id'])
+                    self.metadata.append(metadata)
+                    appended_rows.append(row)
+                    log_lines.append({'id': vector['id'], 'metadata': metadata})
+                else:
+                    self.metadata[position] = metadata
+                    if position >= stored_count:
+                        appended_rows[position - stored_count] = row
+                        log_lines[position - stored_count]['metadata'] = metadata
+                    else:
+                        updates[position] = row
+                        log_lines.append({'id': vector['id'], 'metadata': metadata, 'update': True})
+
+            if updates:
+                self.matrix = None
+                writable = np.memmap(
+                    self.matrix_path, dtype=np.float32, mode='r+',
+                    shape=(stored_count, self.dimension)
+                )
+                for position, row in updates.items():
+                    writable[position] = row
+                writable.flush()
+                del writable
+
+            # Matrix rows first: rows without log lines are dropped on load, the reverse could not be repaired
+            if appended_rows:
+                self.matrix = None
+                with open(self.matrix_path, 'ab') as f:
+                    f.write(np.asarray(appended_rows, dtype=np.float32).tobytes())
+
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(''.join(json.dumps(line) + '\n' for line in log_lines))
+
+            self._map_matrix()
+
+    def query(self, vector: List[float], top_k: int) -> List[Dict]:
+        with self.lock:
+            matrix, ids, metadata = self.matrix, self.ids, self.metadata
+
+        if matrix is None or top_k <= 0:
+            return []
+
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        # Rows are unit-normalised, so the dot product is the cosine similarity
+        scores = matrix @ query
+        k = min(top_k, len(scores))
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+
+        return [
+            {'id': ids[row], 'score': float(scores[row]), 'metadata': metadata[row]}
+            for row in top
+        ]
+
+    def delete_ids(self, ids: List[str]):
+        with self.lock:
+            doomed = {self.positions[vector_id] for vector_id in ids if vector_id in self.positions}
+            if not doomed:
+                return
+
+            keep = [row for row in range(len(self.ids)) if row not in doomed]
+            kept_rows = np.array(self.matrix[keep]) if keep else None
+
+            self.matrix = None
+            self.ids = [self.ids[row] for row in keep]
+            self.metadata = [self.metadata[row] for row in keep]
+            self.positions = {vector_id: row for row, vector_id in enumerate(self.ids)}
+
+            # Compact into a new matrix file; renaming the log switches both at once
+            old_matrix_path = self.matrix_path
+            generation = int(time.time() * 1000)
+            matrix_file = f"vectors.{generation}.f32"
+            with open(os.path.join(self.directory, matrix_file), 'wb') as f:
+                if kept_rows is not None:
+                    f.write(kept_rows.astype(np.float32).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+            self._rewrite_log(matrix_file)
+            os.remove(old_matrix_path)
+            self._map_matrix()
+
+    def clear(self):
+        with self.lock:
+            self.matrix = None
+            self.dimension = None
+            self.ids = []
+            self.metadata = []
+            self.positions = {}
+            if os.path.isdir(self.directory):
+                for name in os.listdir(self.directory):
+                    if name.startswith(('vectors.', 'metadata.')):
+                        os.remove(os.path.join(self.directory, name))
+            self.matrix_file = 'vectors.f32'
+
+class LocalVectorBackend(VectorBackend):
+    """In-process vector backend using memory-mapped NumPy matrices per namespace"""
+
+    name = 'local'
+
+    def __init__(self, base_path: str = None):
+        if np is None:
+            raise RuntimeError("numpy package not available")
+
+        self.base_path = base_path or os.getenv('LOCAL_VECTOR_STORE_PATH', DEFAULT_LOCAL_STORE_PATH)
+        os.makedirs(self.base_path, exist_ok=True)
+
+        self._namespaces = {}
+        self._lock = threading.Lock()
+
+    def _get_namespace(self, namespace: str) -> _LocalNamespace:
+        with self._lock:
+            state = self._namespaces.get(namespace)
+            if state is None:
+                directory_name = re.sub(r'[^A-Za-z0-9_.-]', '_', namespace)
+                state = _LocalNamespace(os.path.join(self.base_path, directory_name))
+                self._namespaces[namespace] = state
+            return state
+
+    def upsert(self, vectors: List[Dict], namespace: str):
+        if vectors:
+            self._get_namespace(namespace).upsert(vectors)
+
+    def query(self, vector: List[float], top_k: int, namespace: str) -> List[Dict]:
+        return self._get_namespace(namespace).query(vector, top_k)
+
+    def delete_ids(self, ids: List[str], namespace: str):
+        if ids:
+            self._get_namespace(namespace).delete_ids(ids)
+
+    def delete_namespace(self, namespace: str):
+        self._get_namespace(namespace).clear()
+
+    def describe_namespace(self, namespace: str) -> Dict:
+        state = self._get_namespace(namespace)
+        with state.lock:
+            return {
+                'vector_count': len(state.ids),
+                'dimension': state.dimension
+            }
+
+class GuardedBackend(VectorBackend):
+    """Runs another backend's calls through a circuit breaker"""
+
+    def __init__(self, backend: VectorBackend, breaker: CircuitBreaker = None):
+        self.backend = backend
+        self.name = backend.name
+        self.breaker = breaker or get_breaker(backend.name)
+        # The SDK owns the socket timeouts, so calls slower than this count as failures
+        self.slow_call_ceiling = float(upstream_setting(backend.name, 'SLOW_CALL_SECONDS', '10'))
+
+    def _call(self, fn, *args, **kwargs):
+        # Upserts and deletes run far longer than queries, so each operation has its own p99
+        slow_after = self.breaker.timeout(self.slow_call_ceiling, fn.__name__)
+        return self.breaker.call(fn, *args, slow_after=slow_after, route=fn.__name__, **kwargs)
+
+    def upsert(self, vectors: List[Dict], namespace: str):
+        return self._call(self.backend.upsert, vectors=vectors, namespace=namespace)
+
+    def query(self, vector: List[float], top_k: int, namespace: str) -> List[Dict]:
+        return self._call(self.backend.query, vector=vector, top_k=top_k, namespace=namespace)
+
+    def delete_ids(self, ids: List[str], namespace: str):
+        return self._call(self.backend.delete_ids, ids, namespace)
+
+    def delete_namespace(self, namespace: str):
+        return self._call(self.backend.delete_namespace, namespace)
+
+    def describe_namespace(self, namespace: str) -> Dict:
+        return self._call(self.backend.describe_namespace, namespace)
+
+def create_vector_backend(backend_name: str = None, api_key: str = None, index_name: str = None) -> Optional[VectorBackend]:
+    """
+    Build the configured vector backend
+
+    Args:
+        backend_name: 'pinecone' or 'local' (defaults to VECTOR_BACKEND, then to
+            pinecone when an API key is available and local otherwise)
+        api_key: Pinecone API key
+        index_name: Pinecone index name
+
+    Returns:
+        Vector backend instance, or None if it could not be initialized
+    """
+    backend_name = (backend_name or os.getenv('VECTOR_BACKEND') or ('pinecone' if api_key else 'local')).lower()
+
+    try:
+        if backend_name == 'pinecone':
+            if not api_key:
+                print("Warning: Pinecone API key not provided")
+                return None
+            return GuardedBackend(PineconeBackend(api_key=api_key, index_name=index_name))
+
+        if backend_name == 'local':
+            return LocalVectorBackend()
+
+        print(f"Warning: Unknown vector backend '{backend_name}'")
+        return None
+
+    except Exception as e:
+        print(f"Error initializing {backend_name} vector backend: {str(e)}")
+        return None
@@ -1,9 +1,13 @@
 import os
 import uuid
+import time
 import hashlib
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime
+from collections import deque
+from itertools import chain, islice
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import json
 
 # Import for embeddings and vector operations
@@ -11,10 +15,14 @@ try:
     from langchain_openai import OpenAIEmbeddings
     from langchain.text_splitter import RecursiveCharacterTextSplitter
     from langchain.docstore.document import Document
-    from pinecone import Pinecone
 except ImportError as e:
     print(f"Warning: Some dependencies not available: {e}")
 
+from src.services.chunk_manifest import ChunkManifest
+from src.services.embedding_cache import EmbeddingCache
+from src.services.query_cache import QueryResultCache
+from src.services.vector_backends import VectorBackend, create_vector_backend
+
 @dataclass
 class DocumentChunk:
     """Data class for document chunks"""
@@ -30,52 +38,58 @@ class DocumentChunk:
             self.created_at = datetime.now().isoformat()
 
 class VectorStoreManager:
-    """Manager for vector store operations using Pinecone"""
+    """Manager for vector store operations using a pluggable vector backend"""
     
-    def __init__(self, api_key: str = None, environment: str = None, index_name: str = None):
+    def __init__(self, api_key: str = None, environment: str = None, index_name: str = None,
+                 embed_batch_size: int = None, embed_max_concurrency: int = None,
+                 embedding_cache: EmbeddingCache = None, backend: VectorBackend = None,
+                 embeddings=None, query_cache: QueryResultCache = None,
+                 chunk_manifest: ChunkManifest = None):
         self.api_key = api_key or os.getenv('PINECONE_API_KEY')
         self.environment = environment or os.getenv('PINECONE_ENVIRONMENT', 'us-east-1-aws')
         self.index_name = index_name or os.getenv('PINECONE_INDEX_NAME', 'whatsapp-gpt')
         
+        # Embedding batching: chunks per embeddings call and batches in flight
+        self.embed_batch_size = max(1, embed_batch_size or int(os.getenv('EMBEDDING_BATCH_SIZE', '64')))
+        self.embed_max_concurrency = max(1, embed_max_concurrency or int(os.getenv('EMBEDDING_MAX_CONCURRENCY', '4')))
+        
+        # Upsert batching: vectors per upsert call, batches in flight and retry policy
+        self.upsert_batch_size = max(1, int(os.getenv('UPSERT_BATCH_SIZE', '100')))
+        self.upsert_max_concurrency = max(1, int(os.getenv('UPSERT_MAX_CONCURRENCY', '2')))
+        self.upsert_max_retries = max(0, int(os.getenv('UPSERT_MAX_RETRIES', '3')))
+        self.upsert_retry_backoff = float(os.getenv('UPSERT_RETRY_BACKOFF_SECONDS', '0.5'))
+        
         # Initialize OpenAI embeddings
-        self.embeddings = OpenAIEmbeddings(
+        self.embeddings = embeddings or OpenAIEmbeddings(
             openai_api_key=os.getenv('OPENAI_API_KEY')
         )
+        self.embedding_model = getattr(self.embeddings, 'model', 'text-embedding-ada-002')
+        
+        # Content-addressed embedding cache shared across clients
+        self.embedding_cache = embedding_cache or EmbeddingCache()
+        
+        # Concurrent index lookups per batch query
+        self.query_batch_max_concurrency = max(1, int(os.getenv('QUERY_BATCH_MAX_CONCURRENCY', '8')))
+        
+        # Chunk manifest for incremental re-ingestion
+        self.chunk_manifest = chunk_manifest or ChunkManifest()
+        
+        # Cache for repeated knowledge base questions
+        self.query_cache = query_cache or QueryResultCache()
         
         # Initialize text splitter
+        self.chunk_size = 1000
         self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
+            chunk_size=self.chunk_size,
             chunk_overlap=200,
             length_function=len,
         )
         
-        # Initialize Pinecone
-        self.index = None
-        self._initialize_pinecone()
-    
-    def _initialize_pinecone(self):
-        """Initialize Pinecone connection"""
-        try:
-            if self.api_key:
-                # Initialize Pinecone client
-                pc = Pinecone(api_key=self.api_key)
-                
-                # Check if index exists, create if not
-                existing_indexes = pc.list_indexes()
-                index_names = [idx['name'] for idx in existing_indexes]
-                
-                if self.index_name not in index_names:
-                    pc.create_index(
-                        name=self.index_name,
-                        dimension=1536,  # OpenAI embedding dimension
-                        metric='cosine'
-                    )
-                
-                self.index = pc.Index(self.index_name)
-            else:
-                print("Warning: Pinecone API key not provided")
-        except Exception as e:
-            print(f"Error initializing Pinecone: {str(e)}")
+        # Initialize vector backend (Pinecone or local NumPy index)
+        self.backend = backend or create_vector_backend(
+            api_key=self.api_key,
+            index_name=self.index_name
+        )
     
     def create_namespace(self, client_id: str) -> str:
         """
@@ -92,7 +106,77 @@ class VectorStoreManager:
         
         return namespace
     
-    def process_text_content(self, client_id: str, content: str, metadata: Dict = None) -> Dict:
+    def _embed_texts(self, texts: List[str], content_hashes: List[str] = None) -> Tuple[List[List[float]], Dict]:
+        """
+        Embed texts in batches, running several batches concurrently
+        
+        Texts already present in the embedding cache are not sent to the
+        embeddings API, and duplicate texts are only embedded once.
+        
+        Args:
+            texts: Texts to embed
+            content_hashes: Precomputed content hashes of the texts (optional)
+            
+        Returns:
+            Tuple of (embeddings in the same order as texts, embedding report)
+        """
+        if content_hashes is None:
+            content_hashes = [EmbeddingCache.content_hash(text) for text in texts]
+        
+        cached = self.embedding_cache.get_many(self.embedding_model, content_hashes)
+        
+        # Unique texts that still need an embeddings call
+        pending = {}
+        for text, content_hash in zip(texts, content_hashes):
+            if content_hash not in cached and content_hash not in pending:
+                pending[content_hash] = text
+        pending_hashes = list(pending)
+        
+        batch_size = self.embed_batch_size
+        batches = [pending_hashes[start:start + batch_size] for start in range(0, len(pending_hashes), batch_size)]
+        
+        def embed_batch(batch_index: int, batch: List[str]):
+            started = time.perf_counter()
+            vectors = self.embeddings.embed_documents([pending[content_hash] for content_hash in batch])
+            return batch_index, vectors, (time.perf_counter() - started) * 1000
+        
+        batch_timings = [None] * len(batches)
+        
+        def record_batch(batch_index: int, vectors: List[List[float]], duration_ms: float):
+            fresh = dict(zip(batches[batch_index], vectors))
+            self.embedding_cache.put_many(self.embedding_model, fresh)
+            cached.update(fresh)
+            batch_timings[batch_index] = {
+                'batch': batch_index,
+                'size': len(batches[batch_index]),
+                'duration_ms': round(duration_ms, 2)
+            }
+        
+        if len(batches) == 1:
+            # A single batch needs no extra pool (ingestion already runs it on a worker)
+            record_batch(*embed_batch(0, batches[0]))
+        elif batches:
+            max_workers = min(self.embed_max_concurrency, len(batches))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [
+                    executor.submit(embed_batch, batch_index, batch)
+                    for batch_index, batch in enumerate(batches)
+                ]
+                for future in as_completed(futures):
+                    record_batch(*future.result())
+        
+        # Reassemble in chunk order
+        embeddings = [cached[content_hash] for content_hash in content_hashes]
+        
+        return embeddings, {
+            'embedded': len(pending_hashes),
+            'cache_hits': len(texts) - len(pending_hashes),
+            'batches': batch_timings
+        }
+    
+    def process_text_content(self, client_id: str, content: str, metadata: Dict = None,
+                             incremental: bool = False, source_id: str = None,
+                             progress_callback: Callable[[Dict], None] = None) -> Dict:
         """
         Process text content and add to vector store
         
@@ -100,6 +184,11 @@ class VectorStoreManager:
             client_id: Unique identifier for the client
             content: Text content to process
             metadata: Additional metadata for the content
+            incremental: Only embed new chunks and delete removed ones, based on
+                the manifest of the previous upload of the same source
+            source_id: Identifies the knowledge source for incremental mode
+                (defaults to the source file name, then to 'default')
+            progress_callback: Called with chunk counters as batches complete
             
         Returns:
             Dictionary with processing result
@@ -115,16 +204,192 @@ class VectorStoreManager:
             # Create namespace
             namespace = self.create_namespace(client_id)
             
-            # Process each chunk
-            processed_chunks = []
-            vectors_to_upsert = []
+            if incremental:
+                source_id = source_id or metadata.get('source_file') or 'default'
+                return self._ingest_incremental(client_id, namespace, source_id, text_chunks, progress_callback)
             
-            for i, chunk in enumerate(text_chunks):
-                # Generate unique ID for chunk
-                chunk_id = f"{client_id}_{hashlib.md5(chunk.page_content.encode()).hexdigest()}_{i}"
+            return self._ingest_chunks(client_id, namespace, enumerate(text_chunks), progress_callback=progress_callback)
+            
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Exception processing text content: {str(e)}"
+            }
+    
+    def _ingest_incremental(self, client_id: str, namespace: str, source_id: str, text_chunks: List,
+                            progress_callback: Callable[[Dict], None] = None) -> Dict:
+        """
+        Re-ingest a source, touching only the chunks that changed
+        
+        Chunk IDs are content-addressed per source
+        ({client_id}_{source hash}_{md5}_{occurrence}), so an edit only changes
+        the IDs of the edited chunks. Those are embedded and upserted; IDs
+        recorded in the manifest but no longer present are deleted unless
+        another source still records them.
+        
+        Args:
+            client_id: Unique identifier for the client
+            namespace: Target namespace
+            source_id: Knowledge source identifier
+            text_chunks: Split documents of the new version of the source
+            progress_callback: Called with chunk counters as batches complete
+            
+        Returns:
+            Dictionary with processing result and added/unchanged/removed summary
+        """
+        # Content-addressed IDs scoped to the source, so sources sharing a chunk
+        # never share a vector; repeated chunks are disambiguated by occurrence
+        source_key = EmbeddingCache.content_hash(source_id)[:12]
+        occurrences = {}
+        current = {}
+        chunk_ids = {}
+        for i, chunk in enumerate(text_chunks):
+            content_hash = EmbeddingCache.content_hash(chunk.page_content)
+            occurrence = occurrences.get(content_hash, 0)
+            occurrences[content_hash] = occurrence + 1
+            
+            chunk_id = f"{client_id}_{source_key}_{content_hash}_{occurrence}"
+            chunk_ids[i] = chunk_id
+            current[chunk_id] = content_hash
+        
+        previous = self.chunk_manifest.get_chunks(namespace, source_id)
+        
+        added = [i for i in range(len(text_chunks)) if chunk_ids[i] not in previous]
+        removed = [chunk_id for chunk_id in previous if chunk_id not in current]
+        
+        for chunk in text_chunks:
+            chunk.metadata['source_id'] = source_id
+        
+        result = self._ingest_chunks(
+            client_id, namespace,
+            ((i, text_chunks[i]) for i in added),
+            chunk_id_fn=lambda i, content_hash: chunk_ids[i],
+            progress_callback=progress_callback
+        )
+        
+        if result["success"]:
+            if removed and self.backend:
+                self.backend.delete_ids(removed, namespace)
+                self.query_cache.invalidate_namespace(namespace)
+            self.chunk_manifest.replace_chunks(namespace, source_id, current)
+        
+        result["diff"] = {
+            "source_id": source_id,
+            "added": len(added),
+            "unchanged": len(text_chunks) - len(added),
+            "removed": len(removed)
+        }
+        
+        return result
+    
+    def _ingest_chunks(self, client_id: str, namespace: str, chunks: Iterable[Tuple[int, object]],
+                       chunk_id_fn: Callable[[int, str], str] = None,
+                       progress_callback: Callable[[Dict], None] = None) -> Dict:
+        """
+        Embed and upsert chunks as a streaming pipeline
+        
+        Chunks are consumed lazily in embedding batches. Each embedded batch
+        is turned into vectors and flushed to the backend in fixed-size upsert
+        batches, so only a bounded number of vectors is held in memory at once.
+        
+        Args:
+            client_id: Unique identifier for the client
+            namespace: Target namespace
+            chunks: Iterable of (chunk index, split document) pairs, in order
+            chunk_id_fn: Builds a chunk ID from (chunk index, content hash);
+                defaults to {client_id}_{content_hash}_{chunk index}
+            progress_callback: Called with chunk counters as batches complete
+            
+        Returns:
+            Dictionary with processing result and per-batch timings
+        """
+        started = time.perf_counter()
+        embedding_report = {
+            "batch_size": self.embed_batch_size,
+            "max_concurrency": self.embed_max_concurrency,
+            "embedded": 0,
+            "cache_hits": 0,
+            "batches": []
+        }
+        upsert_report = {
+            "batch_size": self.upsert_batch_size,
+            "max_concurrency": self.upsert_max_concurrency,
+            "vectors_upserted": 0,
+            "retries": 0,
+            "batches": []
+        }
+        chunks_processed = 0
+        
+        embed_futures = deque()
+        upsert_futures = deque()
+        upsert_buffer = []
+        
+        def report_progress():
+            if progress_callback is not None:
+                progress_callback({
+                    'chunks_embedded': chunks_processed,
+                    'chunks_upserted': upsert_report["vectors_upserted"]
+                })
+        
+        def embed_batch(batch: List[Tuple[int, object]]):
+            batch_started = time.perf_counter()
+            texts = [chunk.page_content for _, chunk in batch]
+            content_hashes = [EmbeddingCache.content_hash(text) for text in texts]
+            embeddings, report = self._embed_texts(texts, content_hashes)
+            return content_hashes, embeddings, report, (time.perf_counter() - batch_started) * 1000
+        
+        def upsert_batch(vectors: List[Dict]):
+            batch_started = time.perf_counter()
+            attempts = self._upsert_with_retry(vectors, namespace)
+            return len(vectors), attempts, (time.perf_counter() - batch_started) * 1000
+        
+        def finish_upsert():
+            batch_index, future = upsert_futures.popleft()
+            size, attempts, duration_ms = future.result()
+            upsert_report["vectors_upserted"] += size
+            upsert_report["retries"] += attempts - 1
+            upsert_report["batches"].append({
+                'batch': batch_index,
+                'size': size,
+                'attempts': attempts,
+                'duration_ms': round(duration_ms, 2)
+            })
+            report_progress()
+        
+        def flush_upserts(upsert_executor, final: bool = False):
+            while upsert_buffer and (final or len(upsert_buffer) >= self.upsert_batch_size):
+                vectors = upsert_buffer[:self.upsert_batch_size]
+                del upsert_buffer[:self.upsert_batch_size]
+                
+                if self.backend is None:
+                    continue
+                
+                if len(upsert_futures) >= self.upsert_max_concurrency:
+                    finish_upsert()
                 
-                # Generate embedding
-                embedding = self.embeddings.embed_query(chunk.page_content)
+                batch_index = len(upsert_report["batches"]) + len(upsert_futures)
+                upsert_futures.append((batch_index, upsert_executor.submit(upsert_batch, vectors)))
+        
+        def finish_embedding(upsert_executor):
+            nonlocal chunks_processed
+            batch_index, batch, future = embed_futures.popleft()
+            content_hashes, embeddings, report, duration_ms = future.result()
+            
+            embedding_report["embedded"] += report["embedded"]
+            embedding_report["cache_hits"] += report["cache_hits"]
+            embedding_report["batches"].append({
+                'batch': batch_index,
+                'size': len(batch),
+                'cache_hits': report["cache_hits"],
+                'duration_ms': round(duration_ms, 2)
+            })
+            
+            for (i, chunk), content_hash, embedding in zip(batch, content_hashes, embeddings):
+                # Generate unique ID for chunk
+                if chunk_id_fn is not None:
+                    chunk_id = chunk_id_fn(i, content_hash)
+                else:
+                    chunk_id = f"{client_id}_{content_hash}_{i}"
                 
                 # Prepare metadata
                 chunk_metadata = {
@@ -135,19 +400,8 @@ class VectorStoreManager:
                     'created_at': datetime.now().isoformat()
                 }
                 
-                # Create document chunk
-                doc_chunk = DocumentChunk(
-                    chunk_id=chunk_id,
-                    client_id=client_id,
-                    content=chunk.page_content,
-                    metadata=chunk_metadata,
-                    embedding=embedding
-                )
-                
-                processed_chunks.append(doc_chunk)
-                
                 # Prepare vector for upsert
-                vectors_to_upsert.append({
+                upsert_buffer.append({
                     'id': chunk_id,
                     'values': embedding,
                     'metadata': {
@@ -156,30 +410,98 @@ class VectorStoreManager:
                     }
                 })
             
-            # Upsert vectors to Pinecone
-            if self.index and vectors_to_upsert:
-                self.index.upsert(
-                    vectors=vectors_to_upsert,
-                    namespace=namespace
-                )
+            chunks_processed += len(batch)
+            report_progress()
+            flush_upserts(upsert_executor)
+        
+        embed_executor = ThreadPoolExecutor(max_workers=self.embed_max_concurrency)
+        upsert_executor = ThreadPoolExecutor(max_workers=self.upsert_max_concurrency)
+        
+        try:
+            numbered_chunks = iter(chunks)
+            batch_index = 0
+            while True:
+                batch = list(islice(numbered_chunks, self.embed_batch_size))
+                if not batch:
+                    break
+                
+                # Keep at most embed_max_concurrency batches in flight
+                if len(embed_futures) >= self.embed_max_concurrency:
+                    finish_embedding(upsert_executor)
+                
+                embed_futures.append((batch_index, batch, embed_executor.submit(embed_batch, batch)))
+                batch_index += 1
             
-            return {
-                "success": True,
-                "chunks_processed": len(processed_chunks),
-                "namespace": namespace,
-                "message": "Text content processed successfully"
-            }
+            while embed_futures:
+                finish_embedding(upsert_executor)
+            
+            flush_upserts(upsert_executor, final=True)
+            while upsert_futures:
+                finish_upsert()
+            
+            error = None
             
         except Exception as e:
-            return {
-                "success": False,
-                "error": f"Exception processing text content: {str(e)}"
-            }
+            error = str(e)
+            for pending in list(embed_futures) + list(upsert_futures):
+                pending[-1].cancel()
+            
+        finally:
+            embed_executor.shutdown(wait=True)
+            upsert_executor.shutdown(wait=True)
+            if upsert_report["vectors_upserted"]:
+                self.query_cache.invalidate_namespace(namespace)
+        
+        embedding_report["total_duration_ms"] = round(
+            sum(batch['duration_ms'] for batch in embedding_report["batches"]), 2
+        )
+        
+        result = {
+            "success": error is None,
+            "chunks_processed": chunks_processed,
+            "namespace": namespace,
+            "embedding": embedding_report,
+            "upsert": upsert_report,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
+        
+        if error is None:
+            result["message"] = "Text content processed successfully"
+        else:
+            result["error"] = f"Exception processing text content: {error}"
+        
+        return result
+    
+    def _upsert_with_retry(self, vectors: List[Dict], namespace: str) -> int:
+        """
+        Upsert one batch, retrying only this batch on failure
+        
+        Args:
+            vectors: Vectors to upsert
+            namespace: Target namespace
+            
+        Returns:
+            Number of attempts it took
+        """
+        attempt = 1
+        while True:
+            try:
+                self.backend.upsert(vectors=vectors, namespace=namespace)
+                return attempt
+            except Exception:
+                if attempt > self.upsert_max_retries:
+                    raise
+                time.sleep(self.upsert_retry_backoff * (2 ** (attempt - 1)))
+                attempt += 1
     
     def process_document_file(self, client_id: str, file_path: str, file_type: str = None) -> Dict:
         """
         Process document file and add to vector store
         
+        The file is read page by page (or paragraph by paragraph) and fed to
+        the ingestion pipeline as it is parsed, so embedding starts before the
+        whole document has been extracted.
+        
         Args:
             client_id: Unique identifier for the client
             file_path: Path to the document file
@@ -189,23 +511,26 @@ class VectorStoreManager:
             Dictionary with processing result
         """
         try:
-            # Extract text from file based on type
-            content = self._extract_text_from_file(file_path, file_type)
+            metadata = {
+                'source_file': os.path.basename(file_path),
+                'file_type': file_type or 'unknown',
+                'source_type': 'document'
+            }
+            
+            # Extract and split text lazily
+            segments = self._iter_text_from_file(file_path, file_type)
+            chunks = self._split_stream(segments, metadata)
             
-            if not content:
+            first_chunk = next(chunks, None)
+            if first_chunk is None:
                 return {
                     "success": False,
                     "error": "Could not extract text from file"
                 }
             
-            # Process extracted content
-            metadata = {
-                'source_file': os.path.basename(file_path),
-                'file_type': file_type or 'unknown',
-                'source_type': 'document'
-            }
+            namespace = self.create_namespace(client_id)
             
-            return self.process_text_content(client_id, content, metadata)
+            return self._ingest_chunks(client_id, namespace, enumerate(chain([first_chunk], chunks)))
             
         except Exception as e:
             return {
@@ -213,6 +538,97 @@ class VectorStoreManager:
                 "error": f"Exception processing document: {str(e)}"
             }
     
+    def _split_stream(self, segments: Iterable[str], metadata: Dict) -> Iterator:
+        """
+        Split a stream of text segments into chunks incrementally
+        
+        Segments are buffered until there is enough text for several chunks.
+        Every chunk but the last is emitted; the last one is carried over so
+        chunks can still span segment boundaries.
+        
+        Args:
+            segments: Iterable of text segments (pages, paragraphs, blocks)
+            metadata: Metadata attached to every chunk
+            
+        Returns:
+            Iterator of split documents
+        """
+        window_size = self.chunk_size * 8
+        buffer_parts = []
+        buffer_size = 0
+        
+        for segment in segments:
+            buffer_parts.append(segment)
+            buffer_size += len(segment)
+            
+            if buffer_size < window_size:
+                continue
+            
+            buffer = ''.join(buffer_parts)
+            pieces = self.text_splitter.split_text(buffer)
+            for piece in pieces[:-1]:
+                yield Document(page_content=piece, metadata=dict(metadata))
+            
+            # Carry the raw tail so separators stripped from the last piece are kept
+            carry = buffer[buffer.rfind(pieces[-1]):] if pieces else ''
+            buffer_parts = [carry]
+            buffer_size = len(carry)
+        
+        for piece in self.text_splitter.split_text(''.join(buffer_parts)):
+            yield Document(page_content=piece, metadata=dict(metadata))
+    
+    def _iter_text_from_file(self, file_path: str, file_type: str = None) -> Iterator[str]:
+        """
+        Yield text content from various file types, one page or block at a time
+        
+        Args:
+            file_path: Path to the file
+            file_type: Type of file
+            
+        Returns:
+            Iterator of text segments
+        """
+        if not os.path.exists(file_path):
+            return
+        
+        # Determine file type if not provided
+        if not file_type:
+            _, ext = os.path.splitext(file_path)
+            file_type = ext.lower().lstrip('.')
+        
+        # Extract text based on file type
+        if file_type == 'pdf':
+            try:
+                import PyPDF2
+            except ImportError:
+                print("PyPDF2 not available for PDF processing")
+                return
+            
+            with open(file_path, 'rb') as f:
+                reader = PyPDF2.PdfReader(f)
+                for page in reader.pages:
+                    yield (page.extract_text() or '') + "\n"
+        
+        elif file_type in ['doc', 'docx']:
+            try:
+                import docx
+            except ImportError:
+                print("python-docx not available for DOCX processing")
+                return
+            
+            doc = docx.Document(file_path)
+            for paragraph in doc.paragraphs:
+                yield paragraph.text + "\n"
+        
+        else:
+            # txt, md and anything else: read as text in fixed-size blocks
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    for block in iter(lambda: f.read(64 * 1024), ''):
+                        yield block
+            except UnicodeDecodeError:
+                return
+    
     def _extract_text_from_file(self, file_path: str, file_type: str = None) -> str:
         """
         Extract text content from various file types
@@ -225,52 +641,7 @@ class VectorStoreManager:
             Extracted text content
         """
         try:
-            if not os.path.exists(file_path):
-                return ""
-            
-            # Determine file type if not provided
-            if not file_type:
-                _, ext = os.path.splitext(file_path)
-                file_type = ext.lower().lstrip('.')
-            
-            # Extract text based on file type
-            if file_type in ['txt', 'md']:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    return f.read()
-            
-            elif file_type == 'pdf':
-                try:
-                    import PyPDF2
-                    with open(file_path, 'rb') as f:
-                        reader = PyPDF2.PdfReader(f)
-                        text = ""
-                        for page in reader.pages:
-                            text += page.extract_text() + "\n"
-                        return text
-                except ImportError:
-                    print("PyPDF2 not available for PDF processing")
-                    return ""
-            
-            elif file_type in ['doc', 'docx']:
-                try:
-                    import docx
-                    doc = docx.Document(file_path)
-                    text = ""
-                    for paragraph in doc.paragraphs:
-                        text += paragraph.text + "\n"
-                    return text
-                except ImportError:
-                    print("python-docx not available for DOCX processing")
-                    return ""
-            
-            else:
-                # Try to read as text file
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        return f.read()
-                except:
-                    return ""
-                    
+            return ''.join(self._iter_text_from_file(file_path, file_type))
         except Exception as e:
             print(f"Error extracting text from file: {str(e)}")
             return ""
@@ -288,44 +659,42 @@ class VectorStoreManager:
             Dictionary with query results
         """
         try:
-            if not self.index:
+            if not self.backend:
                 return {
                     "success": False,
                     "error": "Vector store not initialized"
                 }
             
-            # Generate query embedding
-            query_embedding = self.embeddings.embed_query(query)
-            
             # Create namespace
             namespace = self.create_namespace(client_id)
             
-            # Query Pinecone
-            results = self.index.query(
+            # Serve repeated questions from the query cache
+            cached_result = self.query_cache.get(namespace, query, top_k)
+            if cached_result is not None:
+                return cached_result
+            
+            generation = self.query_cache.generation(namespace)
+            started = time.perf_counter()
+            
+            # Generate query embedding
+            query_embedding = self.embeddings.embed_query(query)
+            
+            # Query the vector backend
+            matches = self.backend.query(
                 vector=query_embedding,
                 top_k=top_k,
-                namespace=namespace,
-                include_metadata=True
+                namespace=namespace
             )
             
-            # Process results
-            relevant_chunks = []
-            for match in results.matches:
-                relevant_chunks.append({
-                    'content': match.metadata.get('content', ''),
-                    'score': match.score,
-                    'metadata': match.metadata
-                })
+            result = self._build_query_result(matches)
             
-            # Combine relevant content
-            context = "\n\n".join([chunk['content'] for chunk in relevant_chunks])
+            self.query_cache.put(
+                namespace, query, top_k, result,
+                cost_ms=(time.perf_counter() - started) * 1000,
+                generation=generation
+            )
             
-            return {
-                "success": True,
-                "context": context,
-                "chunks": relevant_chunks,
-                "total_results": len(relevant_chunks)
-            }
+            return result
             
         except Exception as e:
             return {
@@ -333,6 +702,130 @@ class VectorStoreManager:
                 "error": f"Exception querying knowledge base: {str(e)}"
             }
     
+    def query_knowledge_batch(self, items: List[Dict]) -> List[Dict]:
+        """
+        Query several knowledge bases in one call
+        
+        All uncached queries are embedded with a single batched embeddings
+        call, then the index lookups run concurrently.
+        
+        Args:
+            items: List of {'client_id', 'query', 'top_k'} dictionaries
+            
+        Returns:
+            List of query results in the same order as items, each with its own
+            success flag and error
+        """
+        results = [None] * len(items)
+        pending = []
+        
+        for position, item in enumerate(items):
+            client_id = item.get('client_id') if isinstance(item, dict) else None
+            query = item.get('query') if isinstance(item, dict) else None
+            
+            if not client_id or not query:
+                results[position] = {
+                    "success": False,
+                    "error": "client_id and query are required"
+                }
+                continue
+            
+            if not self.backend:
+                results[position] = {
+                    "success": False,
+                    "error": "Vector store not initialized"
+                }
+                continue
+            
+            top_k = item.get('top_k', 5)
+            namespace = self.create_namespace(client_id)
+            
+            cached_result = self.query_cache.get(namespace, query, top_k)
+            if cached_result is not None:
+                results[position] = cached_result
+                continue
+            
+            pending.append((position, namespace, query, top_k, self.query_cache.generation(namespace)))
+        
+        if not pending:
+            return results
+        
+        # One embeddings call for every distinct uncached query
+        unique_queries = list(dict.fromkeys(query for _, _, query, _, _ in pending))
+        try:
+            embed_started = time.perf_counter()
+            query_embeddings = dict(zip(unique_queries, self.embeddings.embed_documents(unique_queries)))
+            embed_ms_per_query = (time.perf_counter() - embed_started) * 1000 / len(unique_queries)
+        except Exception as e:
+            for position, _, _, _, _ in pending:
+                results[position] = {
+                    "success": False,
+                    "error": f"Exception querying knowledge base: {str(e)}"
+                }
+            return results
+        
+        def lookup(namespace: str, query: str, top_k: int):
+            started = time.perf_counter()
+            matches = self.backend.query(
+                vector=query_embeddings[query],
+                top_k=top_k,
+                namespace=namespace
+            )
+            return self._build_query_result(matches), (time.perf_counter() - started) * 1000
+        
+        max_workers = min(self.query_batch_max_concurrency, len(pending))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(lookup, namespace, query, top_k): (position, namespace, query, top_k, generation)
+                for position, namespace, query, top_k, generation in pending
+            }
+            for future in as_completed(futures):
+                position, namespace, query, top_k, generation = futures[future]
+                try:
+                    result, lookup_ms = future.result()
+                    self.query_cache.put(
+                        namespace, query, top_k, result,
+                        cost_ms=embed_ms_per_query + lookup_ms,
+                        generation=generation
+                    )
+                    results[position] = result
+                except Exception as e:
+                    results[position] = {
+                        "success": False,
+                        "error": f"Exception querying knowledge base: {str(e)}"
+                    }
+        
+        return results
+    
+    def _build_query_result(self, matches: List[Dict]) -> Dict:
+        """
+        Turn backend matches into a query result
+        
+        Args:
+            matches: Matches returned by the vector backend
+            
+        Returns:
+            Dictionary with combined context and matched chunks
+        """
+        # Process results
+        relevant_chunks = []
+        for match in matches:
+            relevant_chunks.append({
+                'content': match['metadata'].get('content', ''),
+                'score': match['score'],
+                'metadata': match['metadata']
+            })
+        
+        # Combine relevant content
+        context = "\n\n".join([chunk['content'] for chunk in relevant_chunks])
+        
+        return {
+            "success": True,
+            "context": context,
+            "chunks": relevant_chunks,
+            "total_results": len(relevant_chunks)
+        }
+    
     def delete_client_data(self, client_id: str) -> Dict:
         """
         Delete all data for a client
@@ -344,7 +837,7 @@ class VectorStoreManager:
             Dictionary with deletion result
         """
         try:
-            if not self.index:
+            if not self.backend:
                 return {
                     "success": False,
                     "error": "Vector store not initialized"
@@ -353,7 +846,9 @@ class VectorStoreManager:
             namespace = self.create_namespace(client_id)
             
             # Delete all vectors in the namespace
-            self.index.delete(delete_all=True, namespace=namespace)
+            self.backend.delete_namespace(namespace)
+            self.chunk_manifest.delete_namespace(namespace)
+            self.query_cache.invalidate_namespace(namespace)
             
             return {
                 "success": True,
@@ -377,7 +872,7 @@ class VectorStoreManager:
             Dictionary with statistics
         """
         try:
-            if not self.index:
+            if not self.backend:
                 return {
                     "success": False,
                     "error": "Vector store not initialized"
@@ -385,15 +880,17 @@ class VectorStoreManager:
             
             namespace = self.create_namespace(client_id)
             
-            # Get index stats
-            stats = self.index.describe_index_stats()
-            namespace_stats = stats.namespaces.get(namespace, {})
+            # Get namespace stats
+            namespace_stats = self.backend.describe_namespace(namespace)
             
             return {
                 "success": True,
-                "total_vectors": namespace_stats.get('vector_count', 0),
+                "total_vectors": namespace_stats['vector_count'],
                 "namespace": namespace,
-                "dimension": stats.dimension
+                "dimension": namespace_stats['dimension'],
+                "backend": self.backend.name,
+                "embedding_cache": self.embedding_cache.get_stats(),
+                "query_cache": self.query_cache.get_stats(namespace)
             }
             
         except Exception as e:
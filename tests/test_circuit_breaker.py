@@ -0,0 +1,95 @@
+import time
+import unittest
+
+from src.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+def _breaker(**kwargs):
+    settings = {
+        'window_seconds': 60,
+        'min_requests': 10,
+        'error_threshold': 0.5,
+        'open_seconds': 0.05,
+        'half_open_probes': 1,
+        'timeout_multiplier': 3,
+        'min_timeout': 0.01
+    }
+    settings.update(kwargs)
+    return CircuitBreaker('test', **settings)
+
+class CircuitBreakerTest(unittest.TestCase):
+    def test_opens_once_error_rate_crosses_threshold(self):
+        breaker = _breaker()
+        for _ in range(4):
+            breaker.record(0.01, True)
+        for _ in range(5):
+            breaker.record(0.01, False)
+
+        # Not enough calls in the window yet
+        self.assertEqual(breaker.state, CLOSED)
+
+        breaker.record(0.01, False)
+
+        self.assertEqual(breaker.state, OPEN)
+        with self.assertRaises(CircuitOpenError):
+            breaker.allow()
+        self.assertEqual(breaker.get_stats()['rejected'], 1)
+
+    def test_half_open_probe_closes_or_reopens(self):
+        breaker = _breaker(min_requests=1)
+        breaker.record(0.01, False)
+        time.sleep(0.06)
+
+        breaker.allow()
+        self.assertEqual(breaker.state, HALF_OPEN)
+        with self.assertRaises(CircuitOpenError):
+            breaker.allow()
+
+        breaker.record(0.01, False)
+        self.assertEqual(breaker.state, OPEN)
+
+        time.sleep(0.06)
+        breaker.allow()
+        breaker.record(0.01, True)
+        self.assertEqual(breaker.state, CLOSED)
+
+    def test_timeout_follows_p99_of_the_route(self):
+        breaker = _breaker()
+        for index in range(100):
+            breaker.record(0.1 if index < 98 else 0.2, True, 'fast')
+        for _ in range(10):
+            breaker.record(5.0, True, 'slow')
+
+        self.assertEqual(breaker.percentiles('fast')['p99'], 0.2)
+        self.assertAlmostEqual(breaker.timeout(30.0, 'fast'), 0.6)
+        self.assertEqual(breaker.timeout(30.0, 'slow'), 15.0)
+        self.assertEqual(breaker.timeout(10.0, 'slow'), 10.0)
+        # Routes without enough samples get the ceiling
+        self.assertEqual(breaker.timeout(30.0, 'unknown'), 30.0)
+
+    def test_failed_calls_do_not_count_towards_latency(self):
+        breaker = _breaker(error_threshold=1.0)
+        for _ in range(10):
+            breaker.record(0.1, True, 'route')
+        for _ in range(5):
+            breaker.record(60.0, False, 'route')
+
+        self.assertEqual(breaker.percentiles('route')['p99'], 0.1)
+
+    def test_call_counts_slow_calls_as_failures(self):
+        breaker = _breaker(min_requests=1, error_threshold=1.0)
+
+        self.assertEqual(breaker.call(lambda: time.sleep(0.02) or 'ok', slow_after=0.001), 'ok')
+        self.assertEqual(breaker.state, OPEN)
+
+    def test_call_records_exceptions(self):
+        breaker = _breaker()
+
+        def fail():
+            raise ValueError('boom')
+
+        with self.assertRaises(ValueError):
+            breaker.call(fail, route='route')
+        self.assertEqual(breaker.get_stats()['failures'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import time
+import unittest
+
+from src.services.conversation_memory import ConversationMemory, estimate_tokens
+
+def _memory(**kwargs):
+    settings = {'max_turns': 4, 'ttl_seconds': 60, 'max_total_tokens': 1000, 'history_tokens': 100}
+    settings.update(kwargs)
+    return ConversationMemory(**settings)
+
+class ConversationMemoryTest(unittest.TestCase):
+    def test_estimate_tokens(self):
+        self.assertEqual(estimate_tokens(''), 1)
+        self.assertEqual(estimate_tokens('abcd'), 1)
+        self.assertEqual(estimate_tokens('abcde'), 2)
+
+    def test_ring_buffer_keeps_the_latest_turns(self):
+        memory = _memory()
+        for index in range(6):
+            memory.append('instance', 'chat', 'user', f'turn {index}')
+
+        history = memory.get_history('instance', 'chat')
+
+        self.assertEqual([turn['content'] for turn in history], ['turn 2', 'turn 3', 'turn 4', 'turn 5'])
+        self.assertEqual(memory.get_stats()['total_tokens'], sum(turn['tokens'] for turn in history))
+
+    def test_history_is_trimmed_to_the_token_budget(self):
+        memory = _memory()
+        memory.append('instance', 'chat', 'user', 'a' * 40)
+        memory.append('instance', 'chat', 'assistant', 'b' * 40)
+        memory.append('instance', 'chat', 'user', 'c' * 40)
+
+        history = memory.get_history('instance', 'chat', max_tokens=25)
+
+        self.assertEqual([turn['content'][0] for turn in history], ['b', 'c'])
+        self.assertEqual(memory.get_history('instance', 'chat', max_tokens=0), [])
+        self.assertEqual(memory.get_history('instance', 'other'), [])
+
+    def test_idle_chats_expire(self):
+        memory = _memory(ttl_seconds=0.05)
+        memory.append('instance', 'chat', 'user', 'hello')
+        time.sleep(0.1)
+
+        self.assertEqual(memory.get_history('instance', 'chat'), [])
+        stats = memory.get_stats()
+        self.assertEqual((stats['chats'], stats['total_tokens'], stats['expired_chats']), (0, 0, 1))
+
+    def test_least_recently_active_chat_is_evicted_over_the_token_cap(self):
+        memory = _memory(max_total_tokens=25)
+        memory.append('instance', 'old', 'user', 'a' * 40)
+        memory.append('instance', 'recent', 'user', 'b' * 40)
+        memory.append('instance', 'old', 'user', 'c' * 40)
+
+        self.assertEqual(memory.get_history('instance', 'recent'), [])
+        self.assertEqual(len(memory.get_history('instance', 'old')), 2)
+        self.assertEqual(memory.get_stats()['evicted_chats'], 1)
+
+    def test_clear_one_chat_or_the_whole_instance(self):
+        memory = _memory()
+        memory.append('instance', 'a', 'user', 'hi')
+        memory.append('instance', 'b', 'user', 'hi')
+        memory.append('other', 'a', 'user', 'hi')
+
+        self.assertEqual(memory.clear('instance', 'a'), 1)
+        self.assertEqual(memory.clear('instance'), 1)
+        self.assertEqual(memory.get_stats()['chats'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
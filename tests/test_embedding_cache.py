@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.services.embedding_cache import EmbeddingCache
+
+class EmbeddingCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.path, 'cache.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def _cache(self, **kwargs):
+        return EmbeddingCache(db_path=self.db_path, **kwargs)
+
+    def test_memory_and_disk_hits(self):
+        cache = self._cache()
+        cache.put_many('model', {'a': [1.0, 2.0], 'b': [3.0, 4.0]})
+
+        self.assertEqual(cache.get_many('model', ['a', 'c']), {'a': [1.0, 2.0]})
+        self.assertEqual(cache.get_many('other-model', ['a']), {})
+
+        reopened = self._cache()
+        self.assertEqual(reopened.get_many('model', ['a', 'b']), {'a': [1.0, 2.0], 'b': [3.0, 4.0]})
+        self.assertEqual(reopened._stats['disk_hits'], 2)
+
+    def test_memory_tier_evicts_least_recently_used(self):
+        # Room for two 2-float vectors
+        cache = self._cache(max_memory_bytes=16)
+        cache.put_many('model', {'a': [1.0, 1.0]})
+        cache.put_many('model', {'b': [2.0, 2.0]})
+        cache.get_many('model', ['a'])
+        cache.put_many('model', {'c': [3.0, 3.0]})
+
+        self.assertEqual(set(key.split(':')[1] for key in cache._memory), {'a', 'c'})
+        self.assertEqual(cache._stats['memory_evictions'], 1)
+
+    def test_disk_tier_stays_under_cap(self):
+        cache = self._cache(max_disk_bytes=64)
+        for n in range(10):
+            cache.put_many('model', {f"h{n}": [float(n)] * 4})
+
+        self.assertLessEqual(cache._disk_bytes, 64)
+        stored = cache._conn.execute('SELECT COALESCE(SUM(size), 0) FROM embeddings').fetchone()[0]
+        self.assertEqual(stored, cache._disk_bytes)
+
+    def test_unreadable_store_degrades_to_misses(self):
+        cache = self._cache()
+        cache.put_many('model', {'a': [1.0]})
+        cache._memory.clear()
+        cache._conn.close()
+
+        self.assertEqual(cache.get_many('model', ['a']), {})
+        # Writes fail the same way without raising
+        cache.put_many('model', {'b': [2.0]})
+
+    def test_damaged_store_degrades_to_misses(self):
+        cache = self._cache()
+        cache.put_many('model', {'a': [1.0]})
+        cache._memory.clear()
+        cache._conn.execute('DROP TABLE embeddings')
+
+        self.assertEqual(cache.get_many('model', ['a']), {})
+
+if __name__ == '__main__':
+    unittest.main()
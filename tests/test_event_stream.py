@@ -0,0 +1,114 @@
+import itertools
+import threading
+import time
+import unittest
+
+from src.services.event_stream import VersionedStore, format_sse
+from src.services.connection_state import ConnectionStateStore
+from src.services.qr_cache import QRCodeCache
+
+class VersionedStoreTest(unittest.TestCase):
+    def test_stream_sends_current_value_then_changes(self):
+        store = VersionedStore()
+        store.set('k', {'n': 1})
+        stream = store.stream('k', 'update', max_seconds=5, heartbeat_seconds=0.05)
+
+        self.assertEqual(next(stream), format_sse({'n': 1}, 'update'))
+        threading.Timer(0.01, store.set, ('k', {'n': 2})).start()
+        self.assertEqual(next(m for m in stream if not m.startswith(':')), format_sse({'n': 2}, 'update'))
+
+    def test_stream_sends_keep_alive_and_ends_at_deadline(self):
+        store = VersionedStore()
+
+        messages = list(store.stream('k', 'update', max_seconds=0.2, heartbeat_seconds=0.05))
+
+        self.assertTrue(messages)
+        self.assertTrue(all(message == ": keep-alive\n\n" for message in messages))
+
+    def test_refresh_hook_is_called_when_due(self):
+        store = VersionedStore()
+        calls = []
+
+        def refresh():
+            calls.append(time.monotonic())
+            store.set('k', {'n': len(calls)})
+            return 10
+
+        stream = store.stream('k', 'update', max_seconds=5, heartbeat_seconds=1, refresh=refresh, refresh_in=0.05)
+
+        self.assertEqual(next(stream), format_sse({'n': 1}, 'update'))
+        self.assertEqual(len(calls), 1)
+
+    def test_is_done_ends_stream_with_payload(self):
+        store = VersionedStore()
+        done = []
+        stream = store.stream('k', 'update', max_seconds=5, heartbeat_seconds=0.05,
+                              is_done=lambda: {'finished': True} if done else None, done_event='done')
+
+        self.assertEqual(next(stream), ": keep-alive\n\n")
+        done.append(True)
+        self.assertEqual(list(stream), [format_sse({'finished': True}, 'done')])
+
+class ConnectionStateStoreTest(unittest.TestCase):
+    def test_webhook_state_is_served_without_upstream_call(self):
+        store = ConnectionStateStore(upstream_ttl=30, webhook_ttl=900)
+        store.ingest_event({'event': 'CONNECTION_UPDATE', 'instance': 'i', 'data': {'state': 'open'}})
+
+        result = store.get_status('i', lambda name: self.fail('upstream called'))
+
+        self.assertEqual(result['status'], 'open')
+        self.assertEqual(result['source'], 'webhook')
+
+    def test_stream_repolls_when_state_goes_stale(self):
+        store = ConnectionStateStore(upstream_ttl=0.05, webhook_ttl=900)
+        states = iter(['connecting', 'connecting', 'open'])
+        fetches = []
+
+        def fetch(name):
+            fetches.append(name)
+            return {'success': True, 'status': next(states, 'open')}
+
+        stream = store.stream('i', fetch, max_seconds=5, heartbeat_seconds=0.02)
+        events = list(itertools.islice((message for message in stream if not message.startswith(':')), 2))
+
+        self.assertIn('"connecting"', events[0])
+        self.assertIn('"open"', events[1])
+        self.assertGreaterEqual(len(fetches), 3)
+
+class QRCodeCacheTest(unittest.TestCase):
+    def test_concurrent_viewers_share_one_fetch(self):
+        cache = QRCodeCache(ttl_seconds=20)
+        fetches = []
+        release = threading.Event()
+
+        def fetch(name):
+            fetches.append(name)
+            release.wait(1)
+            return {'success': True, 'qrcode': {'code': 'abc'}}
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get('i', fetch))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(fetches), 1)
+        self.assertTrue(all(result['success'] for result in results))
+        self.assertTrue(cache.get('i', fetch)['cached'])
+
+    def test_stream_reports_initial_error_and_connected(self):
+        cache = QRCodeCache(ttl_seconds=20)
+        connected = []
+
+        stream = cache.stream('i', lambda name: {'success': False, 'error': 'down'}, max_seconds=5,
+                              is_done=lambda: bool(connected), heartbeat_seconds=0.02)
+
+        self.assertIn('event: error', next(stream))
+        connected.append(True)
+        self.assertIn('event: connected', [message for message in stream][-1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import threading
+import time
+import unittest
+
+from src.services.inbound_buffer import BurstBuffer, RecentKeys
+
+class RecentKeysTest(unittest.TestCase):
+    def test_redelivered_key_is_seen(self):
+        keys = RecentKeys(ttl_seconds=60, max_keys=10)
+
+        self.assertFalse(keys.seen(('instance', 'ABC')))
+        self.assertTrue(keys.seen(('instance', 'ABC')))
+        self.assertFalse(keys.seen(('other', 'ABC')))
+
+    def test_keys_are_forgotten_after_ttl(self):
+        keys = RecentKeys(ttl_seconds=0.05, max_keys=10)
+        keys.seen('ABC')
+        time.sleep(0.1)
+
+        self.assertFalse(keys.seen('ABC'))
+        self.assertEqual(len(keys), 1)
+
+    def test_oldest_keys_are_dropped_at_capacity(self):
+        keys = RecentKeys(ttl_seconds=60, max_keys=2)
+        for key in ('a', 'b', 'c'):
+            keys.seen(key)
+
+        self.assertEqual(len(keys), 2)
+        self.assertFalse(keys.seen('a'))
+        self.assertTrue(keys.seen('c'))
+
+class BurstBufferTest(unittest.TestCase):
+    def setUp(self):
+        self.flushed = []
+        self.flushed_event = threading.Event()
+
+    def _on_flush(self, burst_id, messages):
+        self.flushed.append((burst_id, [message['text'] for message in messages]))
+        self.flushed_event.set()
+
+    def test_messages_are_merged_until_the_chat_goes_quiet(self):
+        buffer = BurstBuffer(self._on_flush, quiet_window=0.1, max_wait=5, max_messages=10)
+
+        first_id, _ = buffer.add('chat', {'text': 'oi'})
+        second_id, size = buffer.add('chat', {'text': 'tudo bem?'})
+
+        self.assertEqual((second_id, size), (first_id, 2))
+        self.assertEqual(self.flushed, [])
+        self.assertEqual(buffer.get_stats()['buffered_messages'], 2)
+
+        self.assertTrue(self.flushed_event.wait(2))
+        self.assertEqual(self.flushed, [(first_id, ['oi', 'tudo bem?'])])
+        self.assertEqual(buffer.get_stats()['open_bursts'], 0)
+
+    def test_max_wait_flushes_a_chatty_burst(self):
+        buffer = BurstBuffer(self._on_flush, quiet_window=0.1, max_wait=0.2, max_messages=100)
+        started = time.monotonic()
+
+        while not self.flushed_event.is_set() and time.monotonic() - started < 2:
+            buffer.add('chat', {'text': 'msg'})
+            time.sleep(0.02)
+
+        self.assertTrue(self.flushed_event.is_set())
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_full_burst_flushes_immediately(self):
+        buffer = BurstBuffer(self._on_flush, quiet_window=60, max_wait=60, max_messages=2)
+        buffer.add('chat', {'text': 'a'})
+        buffer.add('other', {'text': 'x'})
+        burst_id, _ = buffer.add('chat', {'text': 'b'})
+
+        self.assertEqual(self.flushed, [(burst_id, ['a', 'b'])])
+        self.assertEqual(buffer.get_stats()['open_bursts'], 1)
+
+    def test_zero_quiet_window_disables_debouncing(self):
+        buffer = BurstBuffer(self._on_flush, quiet_window=0, max_wait=60, max_messages=10)
+        buffer.add('chat', {'text': 'a'})
+        buffer.add('chat', {'text': 'b'})
+
+        self.assertEqual([texts for _, texts in self.flushed], [['a'], ['b']])
+
+if __name__ == '__main__':
+    unittest.main()
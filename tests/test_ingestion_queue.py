@@ -0,0 +1,132 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta
+
+try:
+    from flask import Flask
+    from src.models.user import db
+    from src.models.ingestion_job import IngestionJob
+    from src.services.ingestion_queue import IngestionJobQueue
+except ImportError:
+    Flask = None
+
+class _FakeVectorManager:
+    def __init__(self):
+        self.calls = []
+
+    def process_text_content(self, client_id, content, metadata=None, incremental=False,
+                             source_id=None, progress_callback=None):
+        self.calls.append(client_id)
+        progress_callback({'chunks_embedded': 1, 'chunks_upserted': 1})
+        return {'success': True, 'chunks_processed': 1, 'upsert': {'vectors_upserted': 1}}
+
+@unittest.skipIf(Flask is None, "flask-sqlalchemy not available")
+class IngestionSchedulingTest(unittest.TestCase):
+    def setUp(self):
+        self.queue = IngestionJobQueue(_FakeVectorManager(), num_workers=1)
+
+    def test_clients_take_turns(self):
+        for client_id, job_id in (('a', 'a1'), ('a', 'a2'), ('a', 'a3'), ('b', 'b1'), ('c', 'c1')):
+            self.queue._enqueue(client_id, job_id)
+
+        order = []
+        for _ in range(5):
+            client_id, job_id = self.queue._next_job()
+            order.append(job_id)
+            self.queue._job_done(client_id)
+
+        self.assertEqual(order, ['a1', 'b1', 'c1', 'a2', 'a3'])
+
+    def test_one_running_job_per_client(self):
+        self.queue._enqueue('a', 'a1')
+        self.queue._enqueue('a', 'a2')
+
+        self.queue._next_job()
+
+        self.assertEqual(self.queue.get_queue_stats()['queued_jobs'], 1)
+        self.assertEqual(list(self.queue._ready_clients), [])
+        self.queue._job_done('a')
+        self.assertEqual(self.queue._next_job(), ('a', 'a2'))
+
+@unittest.skipIf(Flask is None, "flask-sqlalchemy not available")
+class IngestionRecoveryTest(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(self.path, 'test.db')}"
+        db.init_app(self.app)
+        with self.app.app_context():
+            db.create_all()
+
+        self.vector_manager = _FakeVectorManager()
+        self.queue = IngestionJobQueue(self.vector_manager, num_workers=1)
+        self.queue.stale_after = 60
+        self.queue.app = self.app
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def _add_job(self, job_id, status, updated_ago):
+        with self.app.app_context():
+            db.session.add(IngestionJob(
+                id=job_id,
+                client_id='client',
+                status=status,
+                content='text',
+                updated_at=datetime.now() - timedelta(seconds=updated_ago)
+            ))
+            db.session.commit()
+
+    def _status(self, job_id):
+        with self.app.app_context():
+            return db.session.get(IngestionJob, job_id).status
+
+    def test_stale_running_job_is_requeued(self):
+        self._add_job('orphan', 'running', updated_ago=3600)
+        self._add_job('alive', 'running', updated_ago=5)
+
+        with self.app.app_context():
+            requeued = [job.id for job in self.queue._requeue_stale()]
+
+        self.assertEqual(requeued, ['orphan'])
+        self.assertEqual(self._status('orphan'), 'queued')
+        self.assertEqual(self._status('alive'), 'running')
+
+    def test_own_running_job_is_kept_alive(self):
+        self._add_job('mine', 'running', updated_ago=3600)
+        self.queue._running_jobs.add('mine')
+
+        with self.app.app_context():
+            self.assertEqual(self.queue._requeue_stale(), [])
+            self.queue._heartbeat()
+            self.queue._running_jobs.clear()
+            self.assertEqual(self.queue._requeue_stale(), [])
+
+        self.assertEqual(self._status('mine'), 'running')
+
+    def test_restart_runs_orphaned_job(self):
+        self._add_job('orphan', 'running', updated_ago=3600)
+
+        self.queue.init_app(self.app)
+
+        deadline = time.monotonic() + 5
+        while self._status('orphan') != 'completed' and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(self._status('orphan'), 'completed')
+        self.assertEqual(self.vector_manager.calls, ['client'])
+
+    def test_cancel_only_affects_queued_jobs(self):
+        self._add_job('queued', 'queued', updated_ago=0)
+        self._add_job('running', 'running', updated_ago=0)
+
+        with self.app.app_context():
+            self.assertTrue(self.queue.cancel('queued'))
+            self.assertFalse(self.queue.cancel('running'))
+
+        self.assertEqual(self._status('queued'), 'cancelled')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import threading
+import time
+import unittest
+
+from src.services.message_dispatcher import (
+    OutboundDispatcher, OutboundQueueFull, TokenBucket, segment_text
+)
+
+class _FakeSender:
+    def __init__(self):
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def send_message(self, instance_name, number, message):
+        with self.lock:
+            self.sent.append((number, message))
+        return {'success': True}
+
+class TokenBucketTest(unittest.TestCase):
+    def test_burst_then_rate(self):
+        bucket = TokenBucket(rate=10, burst=3)
+
+        self.assertEqual([bucket.try_acquire() for _ in range(3)], [0.0, 0.0, 0.0])
+        delay = bucket.try_acquire()
+        self.assertGreater(delay, 0)
+        self.assertLessEqual(delay, 0.1)
+
+        time.sleep(delay)
+        self.assertEqual(bucket.try_acquire(), 0.0)
+
+    def test_invalid_settings_are_rejected(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0, burst=1)
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=1, burst=1).configure(1, 0)
+
+class SegmentTextTest(unittest.TestCase):
+    def test_short_text_is_one_segment(self):
+        self.assertEqual(segment_text('  Olá!  ', 100), ['Olá!'])
+
+    def test_segments_respect_limit_and_keep_line_breaks(self):
+        text = "Horários:\n- Seg: 9h\n- Sáb: 10h\n\n" + "Frase longa aqui. " * 20
+
+        segments = segment_text(text, 60)
+
+        self.assertTrue(all(len(segment) <= 60 for segment in segments))
+        self.assertTrue(segments[0].startswith("Horários:\n- Seg: 9h\n- Sáb: 10h\n\n"))
+
+    def test_unbreakable_word_is_cut(self):
+        self.assertEqual(segment_text('x' * 25, 10), ['x' * 10, 'x' * 10, 'x' * 5])
+
+class OutboundDispatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.sender = _FakeSender()
+        self.dispatcher = OutboundDispatcher(self.sender, rate=1000, burst=1000)
+        self.dispatcher.coalesce_window = 0
+
+    def test_send_waits_for_delivery(self):
+        result = self.dispatcher.send('inst', '123', 'oi', timeout=2)
+
+        self.assertTrue(result['success'])
+        self.assertEqual(self.sender.sent, [('123', 'oi')])
+
+    def test_short_messages_to_one_number_are_coalesced(self):
+        self.dispatcher.coalesce_window = 0.1
+        messages = [self.dispatcher.enqueue('inst', '123', text) for text in ('a', 'b', 'c')]
+        for message in messages:
+            self.assertTrue(message.done.wait(2))
+
+        self.assertEqual(self.sender.sent, [('123', 'a\n\nb\n\nc')])
+        self.assertEqual(self.dispatcher.get_stats()['inst']['coalesced'], 2)
+
+    def test_broadcast_progress(self):
+        broadcast = self.dispatcher.broadcast('inst', [('1', 'a'), ('2', 'b')])
+
+        deadline = time.monotonic() + 2
+        while self.dispatcher.get_broadcast(broadcast['broadcast_id'])['status'] != 'completed':
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+        self.assertEqual(self.dispatcher.get_broadcast(broadcast['broadcast_id'])['sent'], 2)
+
+    def test_full_queue_is_rejected(self):
+        self.dispatcher.max_queue = 1
+        self.dispatcher._get_queue('inst').worker = object()  # keep messages queued
+
+        self.dispatcher.enqueue('inst', '1', 'a')
+        with self.assertRaises(OutboundQueueFull):
+            self.dispatcher.enqueue('inst', '2', 'b')
+
+    def test_message_taken_by_crashed_worker_is_requeued(self):
+        crashes = []
+        original = self.dispatcher._coalescible
+
+        def crash_once(message):
+            if not crashes:
+                crashes.append(message.text)
+                raise RuntimeError('boom')
+            return original(message)
+
+        self.dispatcher._coalescible = crash_once
+        first = self.dispatcher.enqueue('inst', '1', 'a')
+        second = self.dispatcher.enqueue('inst', '2', 'b')
+
+        self.assertTrue(first.done.wait(2))
+        self.assertTrue(second.done.wait(2))
+        self.assertEqual(crashes, ['a'])
+        self.assertEqual(first.status, 'sent')
+        self.assertEqual(self.sender.sent, [('1', 'a'), ('2', 'b')])
+
+    def test_message_being_sent_when_worker_crashes_is_failed_not_resent(self):
+        queue = self.dispatcher._get_queue('inst')
+        original = queue.bucket.acquire
+        crashes = []
+
+        def crash_once():
+            if not crashes:
+                crashes.append(True)
+                raise RuntimeError('boom')
+            original()
+
+        queue.bucket.acquire = crash_once
+        first = self.dispatcher.enqueue('inst', '1', 'a')
+        second = self.dispatcher.enqueue('inst', '2', 'b')
+
+        self.assertTrue(first.done.wait(2))
+        self.assertTrue(second.done.wait(2))
+        self.assertEqual(first.status, 'failed')
+        self.assertIn('boom', first.result['error'])
+        self.assertEqual(second.status, 'sent')
+        self.assertEqual(self.sender.sent, [('2', 'b')])
+
+if __name__ == '__main__':
+    unittest.main()
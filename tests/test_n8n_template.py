@@ -0,0 +1,47 @@
+import json
+import unittest
+
+try:
+    from src.services.n8n_manager import CompiledWorkflowTemplate, WORKFLOW_TEMPLATE
+except ImportError:
+    CompiledWorkflowTemplate = None
+
+@unittest.skipIf(CompiledWorkflowTemplate is None, "requests not available")
+class CompiledWorkflowTemplateTest(unittest.TestCase):
+    def setUp(self):
+        self.template = CompiledWorkflowTemplate(WORKFLOW_TEMPLATE)
+
+    def _webhook_node(self, workflow):
+        return next(node for node in workflow['nodes'] if node['type'] == 'n8n-nodes-base.webhook')
+
+    def test_render_fills_slots(self):
+        workflow = json.loads(self.template.render('WhatsApp GPT - Padaria', 'hook-1'))
+
+        self.assertEqual(workflow['name'], 'WhatsApp GPT - Padaria')
+        self.assertEqual(self._webhook_node(workflow)['webhookId'], 'hook-1')
+        self.assertEqual(len(workflow['nodes']), len(WORKFLOW_TEMPLATE['nodes']))
+
+    def test_values_containing_slot_markers_are_not_rescanned(self):
+        name = CompiledWorkflowTemplate.WEBHOOK_ID_SLOT
+
+        workflow = json.loads(self.template.render(name, 'hook-1'))
+
+        self.assertEqual(workflow['name'], name)
+        self.assertEqual(self._webhook_node(workflow)['webhookId'], 'hook-1')
+
+    def test_values_are_json_escaped(self):
+        name = 'Café "Central"\n'
+
+        workflow = json.loads(self.template.render(name, 'hook-1'))
+
+        self.assertEqual(workflow['name'], name)
+
+    def test_malformed_template_is_rejected(self):
+        broken = json.loads(json.dumps(WORKFLOW_TEMPLATE))
+        broken['nodes'].append(dict(broken['nodes'][0]))
+
+        with self.assertRaises(ValueError):
+            CompiledWorkflowTemplate(broken)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+try:
+    from flask import Flask
+    from src.models.user import db
+    from src.models.pooled_agent import PooledAgent
+    from src.services.provisioning_pool import ProvisioningPool, POOL_WORKFLOW_NAME
+except ImportError:
+    Flask = None
+
+class _FakeEvolution:
+    def __init__(self):
+        self.missing = set()
+        self.deleted = []
+
+    def check_connection_status(self, instance_name):
+        if instance_name in self.missing:
+            return {'success': False, 'error': 'Not Found'}
+        return {'success': True, 'status': 'connecting'}
+
+    def delete_instance(self, instance_name):
+        self.deleted.append(instance_name)
+        return {'success': True}
+
+class _FakeN8n:
+    shared = False
+
+    def __init__(self):
+        self.calls = []
+
+    def rename_workflow(self, workflow_id, name):
+        self.calls.append(('rename', workflow_id, name))
+        return {'success': True}
+
+    def deactivate_workflow(self, workflow_id):
+        self.calls.append(('deactivate', workflow_id))
+        return {'success': True}
+
+    def delete_workflow(self, workflow_id):
+        self.calls.append(('delete', workflow_id))
+        return {'success': True}
+
+@unittest.skipIf(Flask is None, "flask-sqlalchemy not available")
+class ProvisioningPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(self.path, 'test.db')}"
+        db.init_app(self.app)
+        self.context = self.app.app_context()
+        self.context.push()
+        db.create_all()
+
+        self.evolution = _FakeEvolution()
+        self.n8n = _FakeN8n()
+        self.pool = ProvisioningPool(self.evolution, self.n8n, target_size=0)
+        self.pool.target_size = 2
+        self.pool.max_age = 3600
+        # Refill only tears down in these tests
+        self.pool._provision_one = lambda: None
+
+    def tearDown(self):
+        db.session.remove()
+        self.context.pop()
+        shutil.rmtree(self.path)
+
+    def _add_agent(self, agent_id, age_seconds=0):
+        db.session.add(PooledAgent(
+            id=agent_id,
+            instance_id=f"instance_{agent_id}",
+            workflow_id=f"workflow_{agent_id}",
+            webhook_url='http://n8n/webhook',
+            status='available',
+            created_at=datetime.now() - timedelta(seconds=age_seconds)
+        ))
+        db.session.commit()
+
+    def test_claim_skips_instances_missing_upstream(self):
+        self._add_agent('gone', age_seconds=20)
+        self._add_agent('ok', age_seconds=10)
+        self.evolution.missing.add('instance_gone')
+
+        agent = self.pool.claim('client')
+
+        self.assertEqual(agent['id'], 'ok')
+        self.assertEqual(agent['client_id'], 'client')
+        self.assertIsNone(db.session.get(PooledAgent, 'gone'))
+        self.assertEqual(self.evolution.deleted, ['instance_gone'])
+        self.assertIn(('delete', 'workflow_gone'), self.n8n.calls)
+        self.assertEqual(self.pool.get_stats()['discarded'], 1)
+
+    def test_refill_expires_old_agents(self):
+        self._add_agent('old', age_seconds=7200)
+        self._add_agent('fresh', age_seconds=10)
+
+        self.pool.refill()
+
+        self.assertIsNone(db.session.get(PooledAgent, 'old'))
+        self.assertEqual(db.session.get(PooledAgent, 'fresh').status, 'available')
+        self.assertEqual(self.evolution.deleted, ['instance_old'])
+        self.assertEqual(self.pool.get_stats()['expired'], 1)
+
+    def test_release_after_restore_returns_pool_name(self):
+        self._add_agent('a')
+        agent = self.pool.claim('client')
+
+        self.pool.restore_workflow(agent)
+        self.assertTrue(self.pool.release(agent['id']))
+
+        self.assertIn(('rename', 'workflow_a', POOL_WORKFLOW_NAME), self.n8n.calls)
+        self.assertIn(('deactivate', 'workflow_a'), self.n8n.calls)
+        released = db.session.get(PooledAgent, 'a')
+        db.session.refresh(released)
+        self.assertEqual(released.status, 'available')
+        self.assertIsNone(released.client_id)
+
+    def test_empty_pool_is_a_miss(self):
+        self.assertIsNone(self.pool.claim('client'))
+        self.assertEqual(self.pool.get_stats()['misses'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
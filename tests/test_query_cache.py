@@ -0,0 +1,55 @@
+import time
+import unittest
+
+from src.services.query_cache import QueryResultCache
+
+class QueryResultCacheTest(unittest.TestCase):
+    def test_normalized_queries_share_an_entry(self):
+        cache = QueryResultCache(max_entries=8, ttl_seconds=60)
+        cache.put('ns', 'What are your  hours?', 5, {'success': True}, cost_ms=12.0)
+
+        self.assertEqual(cache.get('ns', 'what are your hours', 5), {'success': True, 'cached': True})
+        self.assertIsNone(cache.get('ns', 'what are your hours', 3))
+        self.assertIsNone(cache.get('other', 'what are your hours', 5))
+
+        stats = cache.get_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+        self.assertEqual(stats['latency_saved_ms'], 12.0)
+
+    def test_entries_expire_after_ttl(self):
+        cache = QueryResultCache(max_entries=8, ttl_seconds=0.05)
+        cache.put('ns', 'hours', 5, {'success': True}, cost_ms=1.0)
+        time.sleep(0.1)
+
+        self.assertIsNone(cache.get('ns', 'hours', 5))
+        stats = cache.get_stats()
+        self.assertEqual((stats['expirations'], stats['entries']), (1, 0))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = QueryResultCache(max_entries=2, ttl_seconds=60)
+        cache.put('ns', 'a', 5, {'query': 'a'}, cost_ms=1.0)
+        cache.put('ns', 'b', 5, {'query': 'b'}, cost_ms=1.0)
+        cache.get('ns', 'a', 5)
+        cache.put('ns', 'c', 5, {'query': 'c'}, cost_ms=1.0)
+
+        self.assertIsNotNone(cache.get('ns', 'a', 5))
+        self.assertIsNone(cache.get('ns', 'b', 5))
+        self.assertIsNotNone(cache.get('ns', 'c', 5))
+        self.assertEqual(cache.get_stats()['evictions'], 1)
+
+    def test_invalidation_drops_namespace_and_stale_puts(self):
+        cache = QueryResultCache(max_entries=8, ttl_seconds=60)
+        cache.put('ns', 'a', 5, {'query': 'a'}, cost_ms=1.0)
+        cache.put('other', 'a', 5, {'query': 'a'}, cost_ms=1.0)
+        generation = cache.generation('ns')
+
+        self.assertEqual(cache.invalidate_namespace('ns'), 1)
+        cache.put('ns', 'b', 5, {'query': 'b'}, cost_ms=1.0, generation=generation)
+
+        self.assertIsNone(cache.get('ns', 'a', 5))
+        self.assertIsNone(cache.get('ns', 'b', 5))
+        self.assertIsNotNone(cache.get('other', 'a', 5))
+        self.assertEqual(cache.get_stats('ns')['namespace_entries'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import threading
+import unittest
+
+from src.services.setup_orchestrator import SetupOrchestrator, SetupStep
+
+class SetupOrchestratorTest(unittest.TestCase):
+    def setUp(self):
+        self.orchestrator = SetupOrchestrator(max_workers=4)
+        self.events = []
+        self.lock = threading.Lock()
+
+    def _record(self, event):
+        with self.lock:
+            self.events.append(event)
+
+    def _step(self, name, succeed=True, **kwargs):
+        def run(inputs):
+            self._record(f"run:{name}")
+            return {'success': succeed, 'error': None if succeed else f"{name} failed"}
+
+        def rollback(result):
+            self._record(f"rollback:{name}")
+            return {'success': True}
+
+        return SetupStep(name=name, run=run, rollback=rollback, **kwargs)
+
+    def test_knowledge_is_not_queued_when_workflow_fails(self):
+        jobs = []
+        claimed = threading.Event()
+
+        def create_instance(inputs):
+            self._record('run:instance')
+            return {'success': True}
+
+        def create_workflow(inputs):
+            # Give an independent knowledge step every chance to be claimed first
+            claimed.wait(0.2)
+            return {'success': False, 'error': 'n8n unavailable'}
+
+        def queue_knowledge(inputs):
+            jobs.append('job')
+            claimed.set()
+            return {'success': True, 'job': {'job_id': 'job'}}
+
+        result = self.orchestrator.run([
+            SetupStep(name='instance', run=create_instance,
+                      rollback=lambda result: self._record('rollback:instance')),
+            SetupStep(name='workflow', run=create_workflow),
+            SetupStep(name='knowledge', run=queue_knowledge, depends_on=['instance', 'workflow'],
+                      rollback=lambda result: self._record('rollback:knowledge'))
+        ])
+
+        self.assertFalse(result['success'])
+        self.assertEqual(result['failed_step'], 'workflow')
+        self.assertEqual(jobs, [])
+        self.assertEqual(result['timings']['knowledge']['status'], 'skipped')
+        self.assertEqual(result['timings']['instance']['status'], 'rolled_back')
+        self.assertNotIn('rollback:knowledge', self.events)
+
+    def test_rollback_runs_in_reverse_completion_order(self):
+        result = self.orchestrator.run([
+            self._step('a'),
+            self._step('b', depends_on=['a']),
+            self._step('c', depends_on=['b']),
+            self._step('d', succeed=False, depends_on=['c'])
+        ])
+
+        self.assertFalse(result['success'])
+        rollbacks = [event for event in self.events if event.startswith('rollback:')]
+        self.assertEqual(rollbacks, ['rollback:c', 'rollback:b', 'rollback:a'])
+
+    def test_optional_failure_skips_dependents_only(self):
+        result = self.orchestrator.run([
+            self._step('a'),
+            self._step('b', succeed=False, required=False),
+            self._step('c', depends_on=['b']),
+            self._step('d', depends_on=['a'])
+        ])
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['timings']['c']['status'], 'skipped')
+        self.assertEqual(result['timings']['d']['status'], 'succeeded')
+        self.assertFalse(any(event.startswith('rollback:') for event in self.events))
+
+    def test_exception_in_step_fails_setup(self):
+        def explode(inputs):
+            raise RuntimeError('boom')
+
+        result = self.orchestrator.run([
+            self._step('a'),
+            SetupStep(name='b', run=explode, depends_on=['a'])
+        ])
+
+        self.assertFalse(result['success'])
+        self.assertIn('boom', result['error'])
+        self.assertEqual(result['timings']['a']['status'], 'rolled_back')
+
+    def test_unknown_dependency_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.orchestrator.run([self._step('a', depends_on=['missing'])])
+
+if __name__ == '__main__':
+    unittest.main()
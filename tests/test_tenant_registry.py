@@ -0,0 +1,94 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    from flask import Flask
+    from src.models.user import db
+    from src.models.tenant import Tenant
+    from src.services.tenant_registry import TenantRegistry
+except ImportError:
+    Flask = None
+
+@unittest.skipIf(Flask is None, "flask-sqlalchemy not available")
+class TenantRegistryTest(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(self.path, 'test.db')}"
+        db.init_app(self.app)
+        self.context = self.app.app_context()
+        self.context.push()
+        db.create_all()
+
+        self.registry = TenantRegistry(batch_size=100, flush_interval=60)
+        # Bound to the app without the background flusher, so writes stay queued until flush()
+        self.registry.app = self.app
+
+    def tearDown(self):
+        db.session.remove()
+        self.context.pop()
+        shutil.rmtree(self.path)
+
+    def test_writes_are_batched_into_one_flush(self):
+        for index in range(3):
+            self.registry.record(f'client{index}', instance_id=f'instance{index}', status='provisioning')
+        self.registry.update_instance('instance1', connection_status='open')
+
+        self.assertEqual(Tenant.query.count(), 0)
+        self.assertEqual(self.registry.get_stats()['pending'], 4)
+
+        self.assertEqual(self.registry.flush(), 4)
+
+        stats = self.registry.get_stats()
+        self.assertEqual((stats['flushes'], stats['rows_written'], stats['pending']), (1, 4, 0))
+        self.assertEqual(Tenant.query.count(), 3)
+        self.assertEqual(db.session.get(Tenant, 'client1').connection_status, 'open')
+
+    def test_lookups_see_pending_writes(self):
+        self.registry.record('client', instance_id='instance', workflow_id='workflow')
+        self.registry.update_instance('instance', connection_status='open')
+
+        tenant = self.registry.get_by_instance('instance')
+
+        self.assertEqual(tenant['client_id'], 'client')
+        self.assertEqual(tenant['connection_status'], 'open')
+        self.assertEqual(self.registry.get_by_workflow('workflow')['client_id'], 'client')
+        self.assertIsNone(self.registry.get_by_client('unknown'))
+
+    def test_conflicting_row_is_dead_lettered_without_losing_the_batch(self):
+        self.registry.record('first', instance_id='shared')
+        self.registry.record('second', instance_id='shared')
+        self.registry.record('third', instance_id='other')
+
+        self.assertEqual(self.registry.flush(), 2)
+
+        stats = self.registry.get_stats()
+        self.assertEqual((stats['flush_errors'], stats['dead_lettered'], stats['pending']), (1, 1, 0))
+        self.assertEqual(stats['dead_letters'][0]['client_id'], 'second')
+        self.assertEqual(sorted(tenant.client_id for tenant in Tenant.query.all()), ['first', 'third'])
+
+    def test_transient_row_failure_is_requeued(self):
+        write = self.registry._write
+        # Fails the batch and then the single-row retry
+        failures = [1, 2]
+
+        def flaky_write(pending, by_instance):
+            if 'flaky' in pending and failures:
+                failures.pop()
+                raise RuntimeError('database is locked')
+            return write(pending, by_instance)
+
+        self.registry._write = flaky_write
+        self.registry.record('flaky', status='active')
+        self.registry.record('steady', status='active')
+
+        self.assertEqual(self.registry.flush(), 1)
+        self.assertEqual(self.registry.get_stats()['pending'], 1)
+
+        self.assertEqual(self.registry.flush(), 1)
+        self.assertEqual(db.session.get(Tenant, 'flaky').status, 'active')
+
+if __name__ == '__main__':
+    unittest.main()
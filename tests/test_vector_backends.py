@@ -0,0 +1,85 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from src.services.vector_backends import LocalVectorBackend
+
+@unittest.skipIf(np is None, "numpy package not available")
+class LocalVectorBackendTest(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.backend = LocalVectorBackend(base_path=self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def _vectors(self, *ids):
+        return [
+            {'id': vector_id, 'values': [float(i == n) for i in range(4)], 'metadata': {'text': vector_id}}
+            for n, vector_id in enumerate(ids)
+        ]
+
+    def _reload(self):
+        return LocalVectorBackend(base_path=self.path)
+
+    def test_upsert_and_query(self):
+        self.backend.upsert(self._vectors('a', 'b', 'c'), namespace='ns')
+
+        matches = self.backend.query([0.0, 1.0, 0.0, 0.0], top_k=2, namespace='ns')
+
+        self.assertEqual([match['id'] for match in matches][0], 'b')
+        self.assertEqual(matches[0]['metadata'], {'text': 'b'})
+        self.assertAlmostEqual(matches[0]['score'], 1.0, places=5)
+        self.assertEqual(len(matches), 2)
+
+    def test_upsert_updates_existing_id(self):
+        self.backend.upsert(self._vectors('a', 'b'), namespace='ns')
+        self.backend.upsert([{'id': 'a', 'values': [0.0, 0.0, 1.0, 0.0], 'metadata': {'text': 'new'}}], namespace='ns')
+
+        for backend in (self.backend, self._reload()):
+            matches = backend.query([0.0, 0.0, 1.0, 0.0], top_k=1, namespace='ns')
+            self.assertEqual(matches[0]['id'], 'a')
+            self.assertEqual(matches[0]['metadata'], {'text': 'new'})
+            self.assertEqual(backend.describe_namespace('ns')['vector_count'], 2)
+
+    def test_delete_ids(self):
+        self.backend.upsert(self._vectors('a', 'b', 'c'), namespace='ns')
+        self.backend.delete_ids(['b'], namespace='ns')
+        self.backend.upsert(self._vectors('d'), namespace='ns')
+
+        for backend in (self.backend, self._reload()):
+            matches = backend.query([1.0, 0.0, 0.0, 0.0], top_k=10, namespace='ns')
+            self.assertEqual(sorted(match['id'] for match in matches), ['a', 'c', 'd'])
+            self.assertEqual(backend.query([0.0, 0.0, 1.0, 0.0], top_k=1, namespace='ns')[0]['id'], 'c')
+
+    def test_reload_after_appends(self):
+        self.backend.upsert(self._vectors('a'), namespace='ns')
+        self.backend.upsert(self._vectors('x', 'b'), namespace='ns')
+
+        backend = self._reload()
+
+        self.assertEqual(backend.describe_namespace('ns'), {'vector_count': 3, 'dimension': 4})
+        self.assertEqual(backend.query([0.0, 1.0, 0.0, 0.0], top_k=1, namespace='ns')[0]['id'], 'b')
+
+    def test_reload_drops_rows_without_metadata(self):
+        self.backend.upsert(self._vectors('a', 'b'), namespace='ns')
+        # A crash after the matrix append but before the metadata append
+        with open(os.path.join(self.path, 'ns', 'vectors.f32'), 'ab') as f:
+            f.write(np.ones(4, dtype=np.float32).tobytes())
+
+        backend = self._reload()
+        backend.upsert(self._vectors('x', 'y', 'c'), namespace='ns')
+
+        self.assertEqual(backend.describe_namespace('ns')['vector_count'], 5)
+        self.assertEqual(backend.query([0.0, 0.0, 1.0, 0.0], top_k=1, namespace='ns')[0]['id'], 'c')
+        # The stray all-ones row would score 1.0 here
+        self.assertAlmostEqual(backend.query([1.0, 1.0, 1.0, 1.0], top_k=1, namespace='ns')[0]['score'], 0.5, places=5)
+
+if __name__ == '__main__':
+    unittest.main()
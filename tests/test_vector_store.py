@@ -0,0 +1,195 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from src.services import vector_store
+from src.services.chunk_manifest import ChunkManifest
+from src.services.embedding_cache import EmbeddingCache
+from src.services.query_cache import QueryResultCache
+from src.services.vector_backends import VectorBackend
+
+HAS_LANGCHAIN = 'RecursiveCharacterTextSplitter' in vars(vector_store)
+
+class FakeEmbeddings:
+    """Deterministic embeddings that record every call"""
+
+    model = 'fake-embedding'
+
+    def __init__(self):
+        self.document_calls = []
+        self.query_calls = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _vector(text):
+        return [float(len(text)), float(sum(map(ord, text)) % 97), 1.0]
+
+    def embed_documents(self, texts):
+        with self._lock:
+            self.document_calls.append(list(texts))
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        with self._lock:
+            self.query_calls.append(text)
+        return self._vector(text)
+
+class FakeBackend(VectorBackend):
+    """In-memory backend whose upsert fails a configurable number of times"""
+
+    def __init__(self, upsert_failures=0):
+        self.upsert_failures = upsert_failures
+        self.upsert_calls = 0
+        self.namespaces = {}
+
+    def upsert(self, vectors, namespace):
+        self.upsert_calls += 1
+        if self.upsert_failures > 0:
+            self.upsert_failures -= 1
+            raise RuntimeError('upsert failed')
+        rows = self.namespaces.setdefault(namespace, {})
+        for vector in vectors:
+            rows[vector['id']] = vector
+
+    def query(self, vector, top_k, namespace):
+        rows = list(self.namespaces.get(namespace, {}).values())[:top_k]
+        return [{'id': row['id'], 'score': 1.0, 'metadata': row['metadata']} for row in rows]
+
+    def delete_ids(self, ids, namespace):
+        rows = self.namespaces.get(namespace, {})
+        for vector_id in ids:
+            rows.pop(vector_id, None)
+
+    def delete_namespace(self, namespace):
+        self.namespaces.pop(namespace, None)
+
+    def describe_namespace(self, namespace):
+        return {'vector_count': len(self.namespaces.get(namespace, {}))}
+
+@unittest.skipIf(not HAS_LANGCHAIN, 'langchain not installed')
+class VectorStoreManagerTest(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.embeddings = FakeEmbeddings()
+        self.backend = FakeBackend()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def _manager(self, **kwargs):
+        return vector_store.VectorStoreManager(
+            embeddings=self.embeddings,
+            backend=self.backend,
+            embedding_cache=EmbeddingCache(db_path=os.path.join(self.path, 'embeddings.db')),
+            chunk_manifest=ChunkManifest(db_path=os.path.join(self.path, 'manifest.db')),
+            query_cache=QueryResultCache(),
+            **kwargs
+        )
+
+    def test_embed_texts_batches_and_dedupes(self):
+        manager = self._manager(embed_batch_size=2, embed_max_concurrency=2)
+        texts = ['alpha', 'beta', 'alpha', 'gamma', 'delta', 'beta']
+
+        embeddings, report = manager._embed_texts(texts)
+
+        self.assertEqual(embeddings, [FakeEmbeddings._vector(text) for text in texts])
+        self.assertEqual(report['embedded'], 4)
+        self.assertEqual(report['cache_hits'], 2)
+        self.assertEqual([batch['size'] for batch in report['batches']], [2, 2])
+        embedded = sorted(text for call in self.embeddings.document_calls for text in call)
+        self.assertEqual(embedded, ['alpha', 'beta', 'delta', 'gamma'])
+
+    def test_embed_texts_skips_cached_texts(self):
+        manager = self._manager(embed_batch_size=8)
+        manager._embed_texts(['alpha', 'beta'])
+        self.embeddings.document_calls.clear()
+
+        embeddings, report = manager._embed_texts(['beta', 'gamma'])
+
+        self.assertEqual(self.embeddings.document_calls, [['gamma']])
+        self.assertEqual(embeddings[0], FakeEmbeddings._vector('beta'))
+        self.assertEqual((report['embedded'], report['cache_hits']), (1, 1))
+
+    def test_repeated_query_is_served_from_cache_until_ingestion(self):
+        manager = self._manager()
+        self.assertTrue(manager.process_text_content('c1', 'Opening hours are 9 to 5.')['success'])
+
+        first = manager.query_knowledge_base('c1', 'opening hours?')
+        second = manager.query_knowledge_base('c1', 'Opening hours')
+
+        self.assertEqual(first['total_results'], 1)
+        self.assertTrue(second['cached'])
+        self.assertEqual(len(self.embeddings.query_calls), 1)
+
+        manager.process_text_content('c1', 'We are closed on Sundays.')
+        third = manager.query_knowledge_base('c1', 'opening hours')
+
+        self.assertNotIn('cached', third)
+        self.assertEqual(third['total_results'], 2)
+
+    def test_deleting_client_data_invalidates_cached_queries(self):
+        manager = self._manager()
+        manager.process_text_content('c1', 'Opening hours are 9 to 5.')
+        manager.query_knowledge_base('c1', 'opening hours')
+
+        self.assertTrue(manager.delete_client_data('c1')['success'])
+
+        self.assertEqual(manager.query_knowledge_base('c1', 'opening hours')['total_results'], 0)
+
+    def _retrying_manager(self, max_retries):
+        env = {'UPSERT_MAX_RETRIES': str(max_retries), 'UPSERT_RETRY_BACKOFF_SECONDS': '0'}
+        with mock.patch.dict(os.environ, env):
+            return self._manager()
+
+    def test_upsert_retries_only_the_failed_batch(self):
+        manager = self._retrying_manager(max_retries=2)
+        self.backend.upsert_failures = 2
+
+        self.assertEqual(manager._upsert_with_retry([{'id': 'a', 'values': [1.0], 'metadata': {}}], 'ns'), 3)
+        self.assertEqual(self.backend.upsert_calls, 3)
+        self.assertIn('a', self.backend.namespaces['ns'])
+
+    def test_upsert_raises_after_max_retries(self):
+        manager = self._retrying_manager(max_retries=1)
+        self.backend.upsert_failures = 2
+
+        with self.assertRaises(RuntimeError):
+            manager._upsert_with_retry([{'id': 'a', 'values': [1.0], 'metadata': {}}], 'ns')
+        self.assertEqual(self.backend.upsert_calls, 2)
+
+    def test_ingestion_upserts_in_bounded_batches(self):
+        env = {'UPSERT_BATCH_SIZE': '2', 'UPSERT_MAX_RETRIES': '1', 'UPSERT_RETRY_BACKOFF_SECONDS': '0'}
+        with mock.patch.dict(os.environ, env):
+            manager = self._manager(embed_batch_size=3)
+        self.backend.upsert_failures = 1
+        chunks = [(i, vector_store.Document(page_content=f'chunk {i}', metadata={})) for i in range(5)]
+
+        result = manager._ingest_chunks('c1', 'client_c1', chunks)
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['chunks_processed'], 5)
+        self.assertEqual(sorted(batch['size'] for batch in result['upsert']['batches']), [1, 2, 2])
+        self.assertEqual(result['upsert']['vectors_upserted'], 5)
+        self.assertEqual(result['upsert']['retries'], 1)
+        self.assertEqual(len(self.backend.namespaces['client_c1']), 5)
+
+    def test_split_stream_matches_whole_text_split(self):
+        manager = self._manager()
+        paragraphs = [
+            f'Paragraph {i}. ' + ' '.join(f'word{i}_{j}' for j in range(60)) + '\n\n'
+            for i in range(60)
+        ]
+        text = ''.join(paragraphs)
+        expected = manager.text_splitter.split_text(text)
+
+        for segments in (paragraphs, [text[start:start + 700] for start in range(0, len(text), 700)]):
+            documents = list(manager._split_stream(iter(segments), {'source_file': 'doc.txt'}))
+
+            self.assertEqual([document.page_content for document in documents], expected)
+            self.assertTrue(all(document.metadata == {'source_file': 'doc.txt'} for document in documents))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+try:
+    from flask import Flask
+    from src.models.user import db
+    from src.routes import whatsapp_gpt
+    from src.services.message_pipeline import extract_inbound_message
+except ImportError:
+    Flask = None
+
+def _message_payload(message_id='ABC', from_me=False):
+    return {
+        'event': 'messages.upsert',
+        'instance': 'instance',
+        'data': {
+            'key': {'remoteJid': '5511999999999@s.whatsapp.net', 'fromMe': from_me, 'id': message_id},
+            'message': {'conversation': 'Oi'}
+        }
+    }
+
+@unittest.skipIf(Flask is None, "flask-sqlalchemy not available")
+class WebhookTokenTest(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(self.path, 'test.db')}"
+        self.app.register_blueprint(whatsapp_gpt.whatsapp_gpt_bp, url_prefix='/api/whatsapp-gpt')
+        db.init_app(self.app)
+        with self.app.app_context():
+            db.create_all()
+        self.client = self.app.test_client()
+
+        self.submitted = []
+        submit = mock.patch.object(
+            whatsapp_gpt.message_pipeline, 'submit',
+            side_effect=lambda payload, event_name=None: self.submitted.append(payload) or {'run_id': 'run'}
+        )
+        submit.start()
+        self.addCleanup(submit.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def _post(self, path, token='secret'):
+        with mock.patch.dict(os.environ, {'EVOLUTION_WEBHOOK_TOKEN': token or ''}):
+            return self.client.post(f'/api/whatsapp-gpt{path}', json=_message_payload())
+
+    def test_path_token_answers_messages(self):
+        response = self._post('/webhook/evolution/t/secret/messages-upsert')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['run_id'], 'run')
+        self.assertEqual(len(self.submitted), 1)
+
+    def test_query_token_is_accepted(self):
+        response = self._post('/webhook/evolution?token=secret')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.submitted), 1)
+
+    def test_wrong_or_missing_token_is_rejected(self):
+        for path in ('/webhook/evolution/t/wrong', '/webhook/evolution/t/wrong/messages-upsert', '/webhook/evolution'):
+            self.assertEqual(self._post(path).status_code, 403, path)
+
+        self.assertEqual(self.submitted, [])
+
+    def test_messages_are_not_answered_without_a_configured_token(self):
+        response = self._post('/webhook/evolution/messages-upsert', token=None)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.get_json()['run_id'])
+        self.assertEqual(self.submitted, [])
+
+@unittest.skipIf(Flask is None, "flask not available")
+class ExtractInboundMessageTest(unittest.TestCase):
+    def test_extracts_text_messages_from_contacts(self):
+        message = extract_inbound_message(_message_payload())
+
+        self.assertEqual(message, {
+            'instance_id': 'instance',
+            'remote_jid': '5511999999999@s.whatsapp.net',
+            'message_id': 'ABC',
+            'text': 'Oi'
+        })
+
+    def test_ignores_own_messages_and_other_events(self):
+        self.assertIsNone(extract_inbound_message(_message_payload(from_me=True)))
+        self.assertIsNone(extract_inbound_message({**_message_payload(), 'event': 'connection.update'}))
+
+        payload = _message_payload()
+        del payload['event']
+        self.assertIsNotNone(extract_inbound_message(payload, 'messages-upsert'))
+
+if __name__ == '__main__':
+    unittest.main()